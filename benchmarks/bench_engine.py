@@ -0,0 +1,44 @@
+"""
+Compare la collecte séquentielle et le moteur concurrent sur le faux serveur
+
+Usage: python -m benchmarks.bench_engine [--concurrency 8] [--latency 0.05]
+"""
+import argparse
+import json
+import tempfile
+from src.api.cache import ResponseCache
+from src.api.rate_limiter import TokenBucket
+from src.api.speedrun_api import SpeedrunAPI
+from src.data.collector import SpeedrunCollector
+from src.data.engine import CollectionEngine
+from .fake_api import FakeSpeedrunAPI
+
+def run_engine(fake: FakeSpeedrunAPI, concurrency: int, rate: float) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        collector = SpeedrunCollector(output_dir=tmp)
+        collector.api = SpeedrunAPI(base_url=fake.base_url, rate_limiter=TokenBucket(rate, concurrency),
+                                    cache=ResponseCache())
+        collector.metadata.api = collector.api
+        report = CollectionEngine(collector, max_concurrency=concurrency).run(list(fake.games))
+        report['endpoints'] = collector.api.get_stats()
+        return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--rate', type=float, default=1000.0, help="Jetons par seconde du limiteur")
+    parser.add_argument('--rate-limit-every', type=int, default=0)
+    parser.add_argument('--error-every', type=int, default=0)
+    args = parser.parse_args()
+
+    with FakeSpeedrunAPI(latency=args.latency, rate_limit_every=args.rate_limit_every,
+                         error_every=args.error_every) as fake:
+        results = {
+            'serial': run_engine(fake, 1, args.rate),
+            'concurrent': run_engine(fake, args.concurrency, args.rate)
+        }
+    print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    main()
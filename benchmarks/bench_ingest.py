@@ -0,0 +1,110 @@
+"""
+Microbenchmark de l'ingestion : chemin par run (validate_run_data +
+process_run_data + DataFrame + schéma de stockage) contre le lot
+vectorisé runs_to_frame, pour plusieurs tailles de lot
+
+Les runs JSON sont reconstruites à partir des CSV de data/, multipliées
+par --scale, avec une petite part de runs invalides.
+
+Usage: python -m benchmarks.bench_ingest [--scale 20] [--batch-sizes 200 2000]
+"""
+import argparse
+import gc
+import io
+import json
+import logging
+import random
+import time
+from pathlib import Path
+from typing import Dict, List
+import pandas as pd
+from src.data.ingest import columns_to_frame, runs_to_columns
+from src.data.processor import SpeedrunDataProcessor
+from src.data.storage import apply_schema
+from src.utils.platform_mapping import PLATFORM_NAMES
+from src.utils.validators import validate_run_data
+
+PLATFORM_IDS = {name: platform_id for platform_id, name in PLATFORM_NAMES.items()}
+
+def runs_from_csv(data_dir: Path, scale: int, invalid_ratio: float = 0.01, seed: int = 0) -> List[Dict]:
+    """Reconstruit des runs au format de l'API à partir des CSV collectés"""
+    rng = random.Random(seed)
+    frames = [pd.read_csv(path, dtype=str) for path in sorted(data_dir.glob('*.csv'))]
+    rows = pd.concat(frames, ignore_index=True).fillna('').to_dict('records')
+    runs = []
+    for copy in range(scale):
+        for row in rows:
+            run = {
+                'id': f"{row['run_id']}{copy}",
+                'category': row['category'],
+                'date': row['date'] or None,
+                'times': {'primary_t': float(row['time_seconds'])},
+                'players': [{'rel': 'user', 'id': row['player']}],
+                'status': {'status': 'verified'},
+                'system': {'platform': PLATFORM_IDS.get(row['platform'], row['platform']),
+                           'emulated': row['emulator'] == 'True'}
+            }
+            if rng.random() < invalid_ratio:
+                run['times'] = {'primary_t': None}
+            runs.append(run)
+    return runs
+
+def per_run_path(pages: List[List[Dict]]) -> pd.DataFrame:
+    processor = SpeedrunDataProcessor()
+    runs_data = []
+    for page in pages:
+        for run in page:
+            if validated_run := validate_run_data(run):
+                processed_run = processor.process_run_data(validated_run)
+                if processed_run:
+                    runs_data.append(processed_run)
+    return apply_schema(pd.DataFrame(runs_data))
+
+def batch_path(pages: List[List[Dict]]) -> pd.DataFrame:
+    return apply_schema(columns_to_frame([runs_to_columns(page)[0] for page in pages]))
+
+def timed(func, *args, repeat: int = 3):
+    """Meilleur temps sur plusieurs exécutions, ramasse-miettes désactivé (comme timeit)"""
+    best = float('inf')
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = func(*args)
+            best = min(best, time.perf_counter() - start)
+    finally:
+        gc.enable()
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--data-dir', type=Path, default=Path('data'))
+    parser.add_argument('--scale', type=int, default=20)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[200, 2000, 20000])
+    args = parser.parse_args()
+
+    # Les avertissements par run font partie du coût mesuré, sans polluer la sortie
+    logging.basicConfig(stream=io.StringIO(), level=logging.INFO)
+
+    runs = runs_from_csv(args.data_dir, args.scale)
+    results = {'runs': len(runs), 'batches': []}
+    for batch_size in args.batch_sizes:
+        pages = [runs[i:i + batch_size] for i in range(0, len(runs), batch_size)]
+        per_run_time, expected = timed(per_run_path, pages)
+        batch_time, actual = timed(batch_path, pages)
+
+        assert len(expected) == len(actual)
+        assert (expected['run_id'].to_numpy() == actual['run_id'].to_numpy()).all()
+        assert (expected['platform'].astype(object).to_numpy() == actual['platform'].astype(object).to_numpy()).all()
+
+        results['valid_runs'] = len(actual)
+        results['batches'].append({
+            'batch_size': batch_size,
+            'per_run_seconds': per_run_time,
+            'batch_seconds': batch_time,
+            'speedup': per_run_time / batch_time
+        })
+    print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    main()
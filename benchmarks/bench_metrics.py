@@ -0,0 +1,110 @@
+"""
+Benchmark du moteur de métriques : implémentation historique (passes
+multiples) contre le calcul vectorisé en une passe et le résumé
+fusionnable MetricsAccumulator, sur des runs synthétiques
+
+Usage: python -m benchmarks.bench_metrics [--runs 1000000] [--partitions 16]
+"""
+import argparse
+import json
+import math
+import time
+import numpy as np
+import pandas as pd
+from src.metrics.calculator import MetricsCalculator
+from src.metrics.streaming import MetricsAccumulator, calculate_run_metrics
+
+def synthetic_runs(count: int, seed: int = 0) -> pd.DataFrame:
+    """Runs synthétiques : temps log-normaux, dates sur 10 ans, joueurs et plateformes répétés"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'time_seconds': rng.lognormal(7.5, 0.15, count).astype('float32'),
+        'date': pd.Timestamp('2014-01-01') + pd.to_timedelta(rng.integers(0, 3650, count), unit='D'),
+        'player': pd.Categorical(rng.integers(0, max(count // 20, 1), count).astype(str)),
+        'platform': pd.Categorical(rng.choice(['NES', 'SNES', 'Nintendo 64', 'PC', 'Wii'], count)),
+        'emulator': rng.random(count) < 0.15
+    })
+
+def legacy_metrics(df: pd.DataFrame) -> dict:
+    """Copie de l'implémentation précédente de calculate_metrics (référence)"""
+    times_normalized = (df['time_seconds'] - df['time_seconds'].min()) / \
+                     (df['time_seconds'].max() - df['time_seconds'].min())
+    completion_variance = float(times_normalized.std() or 0)
+    time_spread = float(
+        ((df['time_seconds'].max() - df['time_seconds'].min()) /
+         df['time_seconds'].median()) if not df['time_seconds'].empty else 0
+    )
+    difficulty_score = float(((completion_variance * 0.6 + time_spread * 0.4) * 100))
+    return {
+        'total_runs': len(df),
+        'unique_players': df['player'].nunique(),
+        'avg_time': float(df['time_seconds'].mean()),
+        'median_time': float(df['time_seconds'].median()),
+        'std_time': float(df['time_seconds'].std()),
+        'best_time': float(df['time_seconds'].min()),
+        'platform_distribution': df['platform'].value_counts().to_dict(),
+        'emulator_percentage': float((df['emulator'].sum() / len(df)) * 100),
+        'runs_per_month': float(df.groupby(pd.to_datetime(df['date']).dt.to_period('M')).size().mean()),
+        'difficulty_score': difficulty_score
+    }
+
+def legacy_trend(df: pd.DataFrame) -> dict:
+    monthly_runs = df.groupby(pd.to_datetime(df['date']).dt.to_period('M')).size()
+    return {
+        'trend_coefficient': float(np.polyfit(range(len(monthly_runs)), monthly_runs, 1)[0]),
+        'monthly_growth': float(monthly_runs.pct_change().mean() * 100)
+    }
+
+def accumulate(df: pd.DataFrame, partitions: int) -> dict:
+    """Un résumé par partition, fusionnés ensuite (comme entre processus)"""
+    bounds = np.linspace(0, len(df), partitions + 1).astype(int)
+    accumulators = [MetricsAccumulator().update(df.iloc[start:end]) for start, end in zip(bounds[:-1], bounds[1:])]
+    total = accumulators[0]
+    for accumulator in accumulators[1:]:
+        total.merge(accumulator)
+    return total.to_metrics()
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+def relative_errors(expected: dict, actual: dict) -> dict:
+    errors = {}
+    for key, value in expected.items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            if math.isnan(value) and math.isnan(actual[key]):
+                errors[key] = 0.0
+            else:
+                errors[key] = abs(actual[key] - value) / max(abs(value), 1e-12)
+    return errors
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=1_000_000)
+    parser.add_argument('--partitions', type=int, default=16)
+    args = parser.parse_args()
+
+    df = synthetic_runs(args.runs)
+    legacy_time, expected = timed(legacy_metrics, df)
+    single_pass_time, actual = timed(calculate_run_metrics, df)
+    accumulator_time, approximate = timed(accumulate, df, args.partitions)
+    legacy_trend_time, expected_trend = timed(legacy_trend, df)
+    trend_time, actual_trend = timed(MetricsCalculator.calculate_trend_metrics, df)
+
+    print(json.dumps({
+        'runs': args.runs,
+        'legacy_seconds': legacy_time,
+        'single_pass_seconds': single_pass_time,
+        'single_pass_speedup': legacy_time / single_pass_time,
+        'single_pass_relative_error': relative_errors(expected, actual),
+        'accumulator_seconds': accumulator_time,
+        'accumulator_partitions': args.partitions,
+        'accumulator_relative_error': relative_errors(expected, approximate),
+        'trend_legacy_seconds': legacy_trend_time,
+        'trend_seconds': trend_time,
+        'trend_relative_error': relative_errors(expected_trend, actual_trend)
+    }, indent=2))
+
+if __name__ == '__main__':
+    main()
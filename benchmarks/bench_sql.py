@@ -0,0 +1,78 @@
+"""
+Benchmark de la base SQL embarquée : métriques par catégorie en SQL contre
+l'implémentation pandas (clean_data + calculate_metrics par partition), et
+requête filtrée sur une catégorie contre la relecture de sa partition
+
+Usage: python -m benchmarks.bench_sql [--categories 50] [--runs-per-category 5000] [--engine sqlite]
+"""
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+from src.data.database import RunDatabase
+from src.data.processor import SpeedrunDataProcessor
+from src.data.storage import get_storage
+from .bench_metrics import synthetic_runs
+
+METRICS = ['total_runs', 'unique_players', 'avg_time', 'median_time', 'std_time', 'best_time',
+           'emulator_percentage', 'runs_per_month', 'difficulty_score']
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+def pandas_metrics(storage) -> dict:
+    processor = SpeedrunDataProcessor()
+    return {partition: processor.calculate_metrics(processor.clean_data(storage.read(*partition)))
+            for partition in storage.list_partitions()}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--categories', type=int, default=50)
+    parser.add_argument('--runs-per-category', type=int, default=5000)
+    parser.add_argument('--engine', default='sqlite', choices=['sqlite', 'duckdb'])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = get_storage(Path(tmp), 'csv')
+        for index in range(args.categories):
+            df = synthetic_runs(args.runs_per_category, seed=index)
+            df.insert(0, 'run_id', [f"r{index}_{row}" for row in range(len(df))])
+            df['category'] = f"cat{index:04d}"
+            df['verified'] = True
+            storage.write(df, 'game', f"cat{index:04d}")
+
+        database = RunDatabase(str(Path(tmp) / 'runs.sqlite'), engine=args.engine)
+        _, load_seconds = timed(database.load_from_storage, storage)
+        reference, pandas_seconds = timed(pandas_metrics, storage)
+        sql_table, sql_seconds = timed(database.category_metrics)
+
+        errors = {metric: 0.0 for metric in METRICS}
+        for row in sql_table.itertuples():
+            expected = reference[(row.game_id, row.category_id)]
+            for metric in METRICS:
+                denominator = max(abs(expected[metric]), 1e-12)
+                errors[metric] = max(errors[metric], abs(getattr(row, metric) - expected[metric]) / denominator)
+
+        target = storage.list_partitions()[args.categories // 2]
+        _, pandas_one_seconds = timed(lambda: SpeedrunDataProcessor().calculate_metrics(
+            SpeedrunDataProcessor().clean_data(storage.read(*target))))
+        _, sql_one_seconds = timed(database.category_metrics, *target)
+        database.close()
+
+    results = {
+        'engine': args.engine,
+        'runs': args.categories * args.runs_per_category,
+        'load_seconds': load_seconds,
+        'all_categories': {'pandas_seconds': pandas_seconds, 'sql_seconds': sql_seconds,
+                           'speedup': pandas_seconds / sql_seconds},
+        'one_category': {'pandas_seconds': pandas_one_seconds, 'sql_seconds': sql_one_seconds,
+                         'speedup': pandas_one_seconds / sql_one_seconds},
+        'max_relative_error': errors
+    }
+    print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+"""
+Serveur HTTP local imitant l'API speedrun.com
+
+Sert /games/{id}/categories et /runs avec pagination et ETag, et peut
+injecter des réponses 429 ou 503 pour éprouver le limiteur et les reprises.
+"""
+import hashlib
+import json
+import random
+import threading
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import urlparse, parse_qs
+
+PLATFORMS = ['v06dr394', '7m6ylw9p', '83exk6l5', 'nzelkr6q', 'o0e3y2rw']
+
+def make_run(run_id: str, category_id: str, index: int, rng: random.Random) -> Dict:
+    """Construit une run au format de l'API speedrun.com"""
+    return {
+        'id': run_id,
+        'category': category_id,
+        'date': (date(2010, 1, 1) + timedelta(days=index)).isoformat(),
+        'times': {'primary_t': round(rng.uniform(1000, 3000), 3)},
+        'players': [{'rel': 'user', 'id': f"p{rng.randrange(500):05d}"}],
+        'status': {'status': 'verified'},
+        'system': {'platform': rng.choice(PLATFORMS), 'emulated': rng.random() < 0.15}
+    }
+
+class FakeSpeedrunAPI:
+    """
+    Jeu de données en mémoire et serveur associé
+
+    Args:
+        games: Nombre de jeux simulés
+        categories_per_game: Nombre de catégories par jeu
+        runs_per_category: Nombre de runs par catégorie
+        rate_limit_every: Répond 429 toutes les N requêtes (0 pour désactiver)
+        error_every: Répond 503 toutes les N requêtes (0 pour désactiver)
+        latency: Latence artificielle par requête en secondes
+    """
+    def __init__(self, games: int = 4, categories_per_game: int = 5, runs_per_category: int = 450,
+                 rate_limit_every: int = 0, error_every: int = 0, latency: float = 0.0, seed: int = 0):
+        rng = random.Random(seed)
+        self.games: Dict[str, List[Dict]] = {}
+        self.runs: Dict[str, List[Dict]] = {}
+        for g in range(games):
+            game_id = f"game{g:04d}"
+            self.games[game_id] = []
+            for c in range(categories_per_game):
+                category_id = f"{game_id}c{c:03d}"
+                self.games[game_id].append({'id': category_id, 'name': f"Category {c}"})
+                self.runs[category_id] = [
+                    make_run(f"{category_id}r{i:06d}", category_id, i, rng)
+                    for i in range(runs_per_category)
+                ]
+        self.rate_limit_every = rate_limit_every
+        self.error_every = error_every
+        self.latency = latency
+        self.request_count = 0
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _respond(self, path: str, query: Dict[str, List[str]]):
+        with self._lock:
+            self.request_count += 1
+            throttled = self.rate_limit_every and self.request_count % self.rate_limit_every == 0
+            failing = self.error_every and self.request_count % self.error_every == 0
+        if throttled:
+            return 429, {'status': 429, 'message': 'Too Many Requests'}, {'Retry-After': '1'}
+        if failing:
+            return 503, {'status': 503, 'message': 'Service Unavailable'}, {}
+
+        parts = path.strip('/').split('/')
+        if len(parts) == 2 and parts[0] == 'games':
+            if parts[1] not in self.games:
+                return 404, {'status': 404}, {}
+            game = {'id': parts[1], 'names': {'international': f"Game {parts[1]}"}, 'platforms': PLATFORMS}
+            embeds = query.get('embed', [''])[0].split(',')
+            if 'categories' in embeds:
+                game['categories'] = {'data': self.games[parts[1]]}
+            if 'platforms' in embeds:
+                game['platforms'] = {'data': [{'id': p, 'name': f"Platform {p}"} for p in PLATFORMS]}
+            return 200, {'data': game}, {}
+        if parts == ['platforms']:
+            return 200, {'data': [{'id': p, 'name': f"Platform {p}"} for p in PLATFORMS]}, {}
+        if len(parts) == 3 and parts[0] == 'games' and parts[2] == 'categories':
+            if parts[1] not in self.games:
+                return 404, {'status': 404}, {}
+            return 200, {'data': self.games[parts[1]]}, {}
+        if parts == ['runs']:
+            category_id = query.get('category', [''])[0]
+            offset = int(query.get('offset', ['0'])[0])
+            size = int(query.get('max', ['20'])[0])
+            runs = self.runs.get(category_id, [])
+            if query.get('direction', ['asc'])[0] == 'desc':
+                runs = runs[::-1]
+            page = runs[offset:offset + size]
+            if 'players' in query.get('embed', [''])[0].split(','):
+                page = [
+                    {**run, 'players': {'data': [
+                        {**player, 'names': {'international': f"Runner {player['id']}"}}
+                        if 'id' in player else player
+                        for player in run['players']
+                    ]}}
+                    for run in page
+                ]
+            return 200, {'data': page, 'pagination': {'offset': offset, 'max': size, 'size': len(page)}}, {}
+        return 404, {'status': 404}, {}
+
+    def add_runs(self, category_id: str, count: int, seed: int = 1) -> None:
+        """Ajoute de nouvelles runs (plus récentes) à une catégorie"""
+        rng = random.Random(seed)
+        runs = self.runs[category_id]
+        start = len(runs)
+        runs.extend(make_run(f"{category_id}r{i:06d}", category_id, i, rng) for i in range(start, start + count))
+
+    def start(self) -> 'FakeSpeedrunAPI':
+        """Démarre le serveur sur un port libre dans un thread dédié"""
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if fake.latency:
+                    threading.Event().wait(fake.latency)
+                url = urlparse(self.path)
+                status, payload, headers = fake._respond(url.path, parse_qs(url.query))
+                body = json.dumps(payload).encode()
+                if status == 200:
+                    etag = '"' + hashlib.md5(body).hexdigest() + '"'
+                    headers['ETag'] = etag
+                    if self.headers.get('If-None-Match') == etag:
+                        status, body = 304, b''
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> 'FakeSpeedrunAPI':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
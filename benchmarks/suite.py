@@ -0,0 +1,320 @@
+"""
+Suite de benchmarks de toute la chaîne, sur données synthétiques
+
+Étapes mesurées :
+- api_paging : pagination de SpeedrunAPI.get_runs sur le faux serveur local ;
+- ingest_per_run / ingest_columnar : validate_run_data + process_run_data
+  contre runs_to_frame ;
+- storage_read, clean_data, calculate_metrics, metrics_calculator : par partition ;
+- clean_runs_combined, compare_categories : nettoyage et analyse comparative en un lot ;
+- load_processed_data (cache de métriques froid puis chaud) ;
+- dashboard : catalogue, runs d'une catégorie, données de graphiques, agrégats, classement,
+  tableau comparatif, publication et lecture de l'instantané ;
+- imports : temps d'import de chaque commande (src/cli.py) dans un
+  interpréteur neuf, comparé à IMPORT_BUDGETS ; collect et build-metrics
+  ne doivent charger ni streamlit ni plotly.
+
+Les résultats (secondes et runs/s par étape, commit, versions) sont écrits
+en JSON ; --compare signale les étapes plus lentes qu'un résultat antérieur
+et un budget d'import dépassé fait aussi échouer la suite.
+
+Usage: python -m benchmarks.suite [--runs 100000] [--output benchmarks/results/<commit>.json]
+                                  [--compare ancien.json] [--only clean_data calculate_metrics]
+"""
+import argparse
+import gc
+import json
+import logging
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+import numpy as np
+import pandas as pd
+from config.api_config import API_CONFIG
+from config.settings import METRICS_CONFIG
+from src.api.cache import ResponseCache
+from src.api.rate_limiter import TokenBucket
+from src.api.speedrun_api import SpeedrunAPI
+from src.data.cleaning import clean_runs
+from src.data.ingest import runs_to_frame
+from src.data.processor import SpeedrunDataProcessor
+from src.data.storage import apply_schema, get_storage
+from src.metrics.batch import compare_categories, load_combined
+from src.metrics.calculator import MetricsCalculator
+from src.metrics.leaderboard import LeaderboardStore
+from src.metrics.rollups import RollupStore
+from src.utils import data_loader
+from src.utils.validators import validate_run_data
+from .fake_api import FakeSpeedrunAPI
+from .synthetic import SyntheticDataset
+
+RESULTS_DIR = Path(__file__).parent / 'results'
+ROOT_DIR = Path(__file__).resolve().parent.parent
+# Temps d'import maximal de chaque commande (secondes, hors démarrage de l'interpréteur)
+IMPORT_BUDGETS = {'collect': 1.5, 'build-metrics': 1.5, 'serve': 5.0}
+# Pile graphique : réservée à la page du tableau de bord
+PLOTTING_MODULES = ('streamlit', 'plotly')
+IMPORT_PROBE = (
+    "import json, sys, time\n"
+    "start = time.perf_counter()\n"
+    "import src.cli\n"
+    "src.cli.load({command!r})\n"
+    "print(json.dumps({{'seconds': time.perf_counter() - start, "
+    "'plotting': [name for name in {plotting!r} if name in sys.modules]}}))"
+)
+
+def timed(func: Callable, *args, repeat: int = 1):
+    """Meilleur temps sur repeat exécutions, ramasse-miettes désactivé (comme timeit)"""
+    best = float('inf')
+    result = None
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = func(*args)
+            best = min(best, time.perf_counter() - start)
+    finally:
+        gc.enable()
+    return best, result
+
+class Suite:
+    """Exécute les étapes sur un jeu de données synthétique écrit dans un dossier temporaire"""
+    def __init__(self, dataset: SyntheticDataset, data_dir: Path, sample_runs: int, repeat: int):
+        self.dataset = dataset
+        self.data_dir = data_dir
+        self.sample_runs = sample_runs
+        self.repeat = repeat
+        self.storage = get_storage(data_dir)
+        self.results: Dict[str, Dict] = {}
+        # Catégorie la plus volumineuse : cas le plus défavorable du tableau de bord
+        self.largest = max(dataset.run_counts, key=dataset.run_counts.get)
+
+    def record(self, name: str, seconds: float, runs: int, **extra) -> None:
+        self.results[name] = {'seconds': seconds, 'runs': runs,
+                              'runs_per_sec': runs / seconds if seconds > 0 else None, **extra}
+        logging.getLogger(__name__).info(f"{name}: {seconds:.4f}s ({runs} runs)")
+
+    def sample_pages(self) -> List[List[Dict]]:
+        """Pages JSON de la plus grande catégorie, limitées à sample_runs runs"""
+        pages, count = [], 0
+        for page in self.dataset.iter_pages(*self.largest):
+            pages.append(page)
+            count += len(page)
+            if count >= self.sample_runs:
+                break
+        return pages
+
+    # Étapes
+
+    def api_paging(self) -> None:
+        pages = self.sample_pages()
+        game_id, category_id = self.largest
+        with FakeSpeedrunAPI(games=0) as fake:
+            fake.games = {game_id: [{'id': category_id, 'name': 'Any%'}]}
+            fake.runs = {category_id: [run for page in pages for run in page]}
+            api = SpeedrunAPI(base_url=fake.base_url, rate_limiter=TokenBucket(1e6, 1e6), cache=ResponseCache())
+
+            def paginate() -> int:
+                offset = 0
+                while True:
+                    page = api.get_runs(game_id, category_id, offset).get('data') or []
+                    offset += len(page)
+                    if len(page) < API_CONFIG['runs_per_page']:
+                        return offset
+            seconds, runs = timed(paginate)
+        self.record('api_paging', seconds, runs, requests=api.request_count)
+
+    def ingestion(self) -> None:
+        pages = self.sample_pages()
+        runs = [run for page in pages for run in page]
+        processor = SpeedrunDataProcessor()
+        # Journalisation par run du chemin historique coupée : seul le traitement est mesuré
+        for name in ('src.utils.validators', 'src.data.processor'):
+            logging.getLogger(name).setLevel(logging.CRITICAL)
+
+        def per_run() -> pd.DataFrame:
+            rows = []
+            for run in runs:
+                if validated := validate_run_data(run):
+                    if processed := processor.process_run_data(validated):
+                        rows.append(processed)
+            return apply_schema(pd.DataFrame(rows))
+
+        seconds, _ = timed(per_run, repeat=self.repeat)
+        self.record('ingest_per_run', seconds, len(runs))
+        seconds, _ = timed(lambda: apply_schema(runs_to_frame(runs)[0]), repeat=self.repeat)
+        self.record('ingest_columnar', seconds, len(runs))
+
+    def per_partition(self) -> None:
+        processor = SpeedrunDataProcessor()
+        partitions = self.storage.list_partitions()
+        seconds, frames = timed(lambda: [self.storage.read(*partition) for partition in partitions])
+        total = sum(len(frame) for frame in frames)
+        self.record('storage_read', seconds, total)
+        seconds, cleaned = timed(lambda: [processor.clean_data(frame) for frame in frames], repeat=self.repeat)
+        self.record('clean_data', seconds, total)
+        seconds, _ = timed(lambda: [processor.calculate_metrics(frame) for frame in cleaned], repeat=self.repeat)
+        self.record('calculate_metrics', seconds, sum(len(frame) for frame in cleaned))
+
+        def calculator() -> None:
+            for frame in cleaned:
+                MetricsCalculator.calculate_difficulty_score(frame)
+                MetricsCalculator.calculate_trend_metrics(frame)
+        seconds, _ = timed(calculator, repeat=self.repeat)
+        self.record('metrics_calculator', seconds, sum(len(frame) for frame in cleaned))
+
+    def batch(self) -> None:
+        combined = load_combined(self.data_dir)
+        seconds, _ = timed(lambda: clean_runs(combined, by=['game_id', 'category_id']), repeat=self.repeat)
+        self.record('clean_runs_combined', seconds, len(combined))
+        seconds, table = timed(compare_categories, combined, repeat=self.repeat)
+        self.record('compare_categories', seconds, len(combined), categories=len(table))
+
+    def load_processed_data(self) -> None:
+        (self.data_dir / METRICS_CONFIG['cache_file']).unlink(missing_ok=True)
+        seconds, entries = timed(data_loader.load_processed_data, self.data_dir, False)
+        self.record('load_processed_data_cold', seconds, self.dataset.total_runs, categories=len(entries))
+        seconds, _ = timed(data_loader.load_processed_data, self.data_dir, False, repeat=self.repeat)
+        self.record('load_processed_data_warm', seconds, self.dataset.total_runs)
+
+    def dashboard(self) -> None:
+        game_id, category_id = self.largest
+        runs = self.dataset.run_counts[self.largest]
+        seconds, _ = timed(lambda: (LeaderboardStore(self.data_dir).build(), RollupStore(self.data_dir).build()))
+        self.record('index_build', seconds, self.dataset.total_runs)
+
+        data_loader._catalogues.clear()
+        seconds, _ = timed(data_loader.load_catalogue, self.data_dir)
+        self.record('dashboard_catalogue', seconds, self.dataset.total_runs)
+        data_loader._chart_data.cache_clear()
+        seconds, _ = timed(lambda: [data_loader.load_chart_data(self.data_dir, game_id, category_id, kind)
+                                    for kind in data_loader.CHART_KINDS])
+        self.record('dashboard_chart_data', seconds, runs)
+        seconds, _ = timed(data_loader.load_rollup, self.data_dir, game_id, category_id, 'week')
+        self.record('dashboard_rollup', seconds, runs)
+        seconds, _ = timed(data_loader.load_leaderboard, self.data_dir, game_id, category_id)
+        self.record('dashboard_leaderboard', seconds, runs)
+        data_loader._comparisons.clear()
+        seconds, _ = timed(data_loader.load_comparison, self.data_dir)
+        self.record('dashboard_comparison', seconds, self.dataset.total_runs)
+        seconds, _ = timed(data_loader.publish_snapshot, self.data_dir)
+        self.record('snapshot_publish', seconds, self.dataset.total_runs)
+        data_loader._snapshots.clear()
+        seconds, _ = timed(lambda: (data_loader.load_catalogue(self.data_dir),
+                                    data_loader.load_comparison(self.data_dir)))
+        self.record('snapshot_read', seconds, self.dataset.total_runs)
+
+    def imports(self) -> None:
+        for command, budget in IMPORT_BUDGETS.items():
+            code = IMPORT_PROBE.format(command=command, plotting=PLOTTING_MODULES)
+            best, plotting = float('inf'), []
+            for _ in range(self.repeat):
+                probe = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, cwd=ROOT_DIR)
+                if probe.returncode != 0:
+                    logging.getLogger(__name__).warning(
+                        f"import_{command} ignoré : {probe.stderr.strip().splitlines()[-1]}")
+                    break
+                measure = json.loads(probe.stdout)
+                best, plotting = min(best, measure['seconds']), measure['plotting']
+            else:
+                over = best > budget or (command != 'serve' and bool(plotting))
+                self.record(f'import_{command}', best, 0, budget=budget, plotting_modules=plotting,
+                            over_budget=over)
+
+    STAGES = {
+        'api_paging': api_paging,
+        'ingestion': ingestion,
+        'per_partition': per_partition,
+        'batch': batch,
+        'load_processed_data': load_processed_data,
+        'dashboard': dashboard,
+        'imports': imports
+    }
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=Path(__file__).parent).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(current: Dict, previous: Dict, threshold: float) -> List[str]:
+    """Étapes plus lentes que le résultat antérieur au-delà du seuil (1.2 : +20 %)"""
+    regressions = []
+    if current['parameters'].get('runs') != previous.get('parameters', {}).get('runs'):
+        print(f"Attention : échelles différentes ({previous.get('parameters', {}).get('runs')} -> "
+              f"{current['parameters'].get('runs')} runs)")
+    for name, stage in current['stages'].items():
+        before = previous.get('stages', {}).get(name)
+        if not before or not before.get('seconds'):
+            continue
+        ratio = stage['seconds'] / before['seconds']
+        print(f"{name:28s} {before['seconds']:10.4f}s -> {stage['seconds']:10.4f}s  x{ratio:.2f}")
+        if ratio > threshold:
+            regressions.append(name)
+    return regressions
+
+def main():
+    from src.utils.logging_config import setup_logging
+
+    parser = argparse.ArgumentParser(description="Suite de benchmarks de la chaîne complète")
+    parser.add_argument('--runs', type=int, default=100_000)
+    parser.add_argument('--games', type=int, default=4)
+    parser.add_argument('--categories', type=int, default=5, help="Catégories par jeu")
+    parser.add_argument('--sample-runs', type=int, default=20_000,
+                        help="Runs JSON utilisées pour la pagination et l'ingestion")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--only', nargs='*', choices=list(Suite.STAGES), default=None)
+    parser.add_argument('--output', type=Path, default=None)
+    parser.add_argument('--compare', type=Path, default=None, help="Résultat antérieur (JSON)")
+    parser.add_argument('--threshold', type=float, default=1.2)
+    args = parser.parse_args()
+
+    setup_logging(logging.WARNING)
+    logging.getLogger(__name__).setLevel(logging.INFO)
+    dataset = SyntheticDataset(args.runs, args.games, args.categories)
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        dataset.write(Path(tmp))
+        suite = Suite(dataset, Path(tmp), min(args.sample_runs, dataset.run_counts[max(
+            dataset.run_counts, key=dataset.run_counts.get)]), args.repeat)
+        suite.record('generate', time.perf_counter() - start, dataset.total_runs)
+        for name in args.only or Suite.STAGES:
+            Suite.STAGES[name](suite)
+
+    commit = git_commit()
+    results = {
+        'commit': commit,
+        'date': datetime.now().isoformat(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'versions': {'pandas': pd.__version__, 'numpy': np.__version__},
+        'parameters': vars(args) | {'output': None, 'compare': None},
+        'stages': suite.results
+    }
+    output = args.output or RESULTS_DIR / f"{commit or 'local'}-{args.runs}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2), encoding='utf-8')
+    print(f"Résultats écrits dans {output}")
+
+    failed = False
+    over_budget = [name for name, stage in suite.results.items() if stage.get('over_budget')]
+    if over_budget:
+        print(f"Budgets d'import dépassés: {', '.join(over_budget)}")
+        failed = True
+    if args.compare:
+        regressions = compare(results, json.loads(args.compare.read_text(encoding='utf-8')), args.threshold)
+        if regressions:
+            print(f"Régressions (> x{args.threshold}): {', '.join(regressions)}")
+            failed = True
+    if failed:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,231 @@
+"""
+Générateur de données synthétiques au format speedrun.com
+
+Produit, à une échelle configurable (10k à 10M runs), des runs JSON
+conformes à l'API (/runs) et un dossier de données complet (partitions
+du stockage et index de métadonnées) pour exercer toute la chaîne sans
+accès réseau. La génération est vectorisée par catégorie et les runs
+JSON sont produites page par page : la mémoire ne dépend pas de l'échelle.
+
+Distributions :
+- activité des joueurs en loi de puissance (quelques joueurs très actifs) ;
+- temps log-normaux autour d'un temps de référence par catégorie, selon
+  le niveau du joueur, en amélioration au fil des années, avec ~1 % de
+  valeurs aberrantes ;
+- dates sur dix ans, de plus en plus denses ; ~2 % sans date ;
+- statuts vérifiés à ~90 %, plateformes réelles, ~15 % sur émulateur ;
+- une petite part de runs invalides (sans temps, joueur invité sans ID).
+
+Usage: python -m benchmarks.synthetic data_synth [--runs 100000] [--games 4] [--categories 5]
+                                                 [--format csv] [--json runs.jsonl]
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from config.settings import METADATA_CONFIG
+from src.data.storage import apply_schema, get_storage
+from src.utils.platform_mapping import PLATFORM_NAMES
+
+ID_ALPHABET = np.array(list('0123456789abcdefghijklmnopqrstuvwxyz'))
+PLATFORM_IDS = np.array(list(PLATFORM_NAMES))
+PLATFORM_WEIGHTS = np.linspace(2.0, 0.2, len(PLATFORM_IDS)) / np.linspace(2.0, 0.2, len(PLATFORM_IDS)).sum()
+START_DATE = np.datetime64('2014-01-01', 'D')
+SPAN_DAYS = 3650
+# Les runs sont générées par blocs : mêmes runs pour le stockage et pour le JSON
+CHUNK_SIZE = 1_000_000
+
+def make_ids(rng: np.random.Generator, count: int) -> np.ndarray:
+    """IDs de 8 caractères [0-9a-z], comme ceux de speedrun.com"""
+    letters = ID_ALPHABET[rng.integers(0, len(ID_ALPHABET), (count, 8))]
+    return letters.view('<U8').ravel()
+
+class SyntheticDataset:
+    """
+    Jeux, catégories et runs synthétiques reproductibles
+
+    Args:
+        runs: Nombre total de runs, réparties inégalement entre les catégories
+        games: Nombre de jeux
+        categories_per_game: Nombre de catégories par jeu
+        players: Nombre de joueurs distincts (runs / 20 par défaut)
+        invalid_ratio: Part des runs JSON invalides (sans temps ou joueur invité)
+    """
+    def __init__(self, runs: int = 100_000, games: int = 4, categories_per_game: int = 5,
+                 players: Optional[int] = None, invalid_ratio: float = 0.005, seed: int = 0):
+        self.seed = seed
+        self.invalid_ratio = invalid_ratio
+        rng = np.random.default_rng(seed)
+        self.game_ids = make_ids(rng, games).tolist()
+        self.categories: List[Tuple[str, str, str]] = []
+        for game_id in self.game_ids:
+            for index, category_id in enumerate(make_ids(rng, categories_per_game).tolist()):
+                self.categories.append((game_id, category_id, 'Any%' if index == 0 else f"Category {index}"))
+        # Catégories principales plus jouées que les catégories annexes
+        weights = rng.pareto(1.2, len(self.categories)) + 0.2
+        counts = np.floor(weights / weights.sum() * runs).astype('int64')
+        counts[np.argmax(counts)] += runs - counts.sum()
+        keys = [(game_id, category_id) for game_id, category_id, _ in self.categories]
+        self.run_counts = dict(zip(keys, counts.tolist()))
+        self._positions = {key: position for position, key in enumerate(keys)}
+        self.player_ids = make_ids(rng, max(players or runs // 20, 1))
+        self.player_skill = rng.lognormal(0.0, 0.12, len(self.player_ids))
+        self.player_weights = 1.0 / np.arange(1, len(self.player_ids) + 1) ** 0.9
+        self.player_weights /= self.player_weights.sum()
+
+    @property
+    def total_runs(self) -> int:
+        return sum(self.run_counts.values())
+
+    def _rng(self, game_id: str, category_id: str, *stream: int) -> np.random.Generator:
+        return np.random.default_rng([self.seed, self._positions[(game_id, category_id)], *stream])
+
+    def category_columns(self, game_id: str, category_id: str, start: int = 0,
+                         count: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Colonnes des runs [start, start + count) d'une catégorie (triées par date croissante)"""
+        total = self.run_counts[(game_id, category_id)]
+        count = total - start if count is None else min(count, total - start)
+        rng = self._rng(game_id, category_id, start)
+        # Temps de référence de la catégorie : de quelques minutes à quelques heures
+        reference = self._rng(game_id, category_id).lognormal(7.0, 1.0)
+
+        # Dates de plus en plus denses : position relative u**0.6 sur la période
+        position = (np.arange(start, start + count) + rng.random(count)) / max(total, 1)
+        days = np.minimum((position ** 0.6 * SPAN_DAYS).astype('int64'), SPAN_DAYS - 1)
+        dates = (START_DATE + days).astype('datetime64[s]')
+        dates[rng.random(count) < 0.02] = np.datetime64('NaT')
+
+        players = rng.choice(len(self.player_ids), count, p=self.player_weights)
+        improvement = 1.0 + 0.3 * np.exp(-days / 1200)
+        times = reference * self.player_skill[players] * improvement * rng.lognormal(0.0, 0.04, count)
+        outliers = rng.random(count) < 0.01
+        times[outliers] *= rng.uniform(2.0, 5.0, outliers.sum())
+
+        return {
+            'run_id': make_ids(rng, count),
+            'category': np.full(count, category_id),
+            'date': dates,
+            'time_seconds': np.round(times, 3).astype('float32'),
+            'player': self.player_ids[players],
+            'verified': rng.random(count) < 0.9,
+            'platform': PLATFORM_IDS[rng.choice(len(PLATFORM_IDS), count, p=PLATFORM_WEIGHTS)],
+            'emulator': rng.random(count) < 0.15
+        }
+
+    def category_frame(self, game_id: str, category_id: str, start: int = 0,
+                       count: Optional[int] = None) -> pd.DataFrame:
+        """Runs d'une catégorie au schéma du stockage (plateformes résolues, comme à l'ingestion)"""
+        columns = self.category_columns(game_id, category_id, start, count)
+        columns['platform'] = pd.Series(columns['platform']).map(PLATFORM_NAMES).to_numpy()
+        return apply_schema(pd.DataFrame(columns))
+
+    def iter_pages(self, game_id: str, category_id: str, page_size: int = 200,
+                   embed_players: bool = False) -> Iterator[List[Dict]]:
+        """Pages de runs JSON au format de l'API /runs (embed=players si demandé)"""
+        total = self.run_counts[(game_id, category_id)]
+        for start in range(0, total, CHUNK_SIZE):
+            columns = self.category_columns(game_id, category_id, start, CHUNK_SIZE)
+            count = len(columns['run_id'])
+            invalid = self._rng(game_id, category_id, start, 1).random(count) < self.invalid_ratio
+            for page_start in range(0, count, page_size):
+                yield [self._run_json(columns, index, bool(invalid[index]), embed_players)
+                       for index in range(page_start, min(page_start + page_size, count))]
+
+    def iter_runs(self, game_id: str, category_id: str, **kwargs) -> Iterator[Dict]:
+        for page in self.iter_pages(game_id, category_id, **kwargs):
+            yield from page
+
+    def _run_json(self, columns: Dict[str, np.ndarray], index: int, invalid: bool,
+                  embed_players: bool) -> Dict:
+        run_id = str(columns['run_id'][index])
+        date = columns['date'][index]
+        player = {'rel': 'user', 'id': str(columns['player'][index]),
+                  'uri': f"https://www.speedrun.com/api/v1/users/{columns['player'][index]}"}
+        time_seconds = round(float(columns['time_seconds'][index]), 3)
+        if invalid and index % 2:
+            player = {'rel': 'guest', 'name': f"guest-{run_id}"}
+        elif invalid:
+            time_seconds = None
+        if embed_players:
+            players = {'data': [{**player, 'names': {'international': f"Runner {player.get('id')}"}}
+                                if player['rel'] == 'user' else player]}
+        else:
+            players = [player]
+        return {
+            'id': run_id,
+            'weblink': f"https://www.speedrun.com/run/{run_id}",
+            'game': None,
+            'level': None,
+            'category': str(columns['category'][index]),
+            'comment': None,
+            'status': ({'status': 'verified', 'examiner': None, 'verify-date': None}
+                       if columns['verified'][index] else {'status': 'new'}),
+            'players': players,
+            'date': None if np.isnat(date) else str(date.astype('datetime64[D]')),
+            'submitted': None,
+            'times': {'primary': None, 'primary_t': time_seconds,
+                      'realtime': None, 'realtime_t': time_seconds or 0},
+            'system': {'platform': str(columns['platform'][index]),
+                       'emulated': bool(columns['emulator'][index]), 'region': None},
+            'values': {}
+        }
+
+    def metadata(self) -> Dict:
+        """Index de métadonnées (format de MetadataIndex) : aucun appel réseau pour résoudre les noms"""
+        return {
+            'games': {game_id: {'name': f"Synthetic Game {index}", 'abbreviation': f"sg{index}"}
+                      for index, game_id in enumerate(self.game_ids)},
+            'categories': {category_id: {'name': name, 'game_id': game_id}
+                           for game_id, category_id, name in self.categories},
+            'platforms': dict(PLATFORM_NAMES),
+            'players': {str(player): f"Runner {player}" for player in self.player_ids},
+            'refreshed_at': time.time()
+        }
+
+    def write(self, data_dir: Path, fmt: Optional[str] = None) -> Path:
+        """Écrit toutes les partitions (par blocs) et l'index de métadonnées dans data_dir"""
+        data_dir = Path(data_dir)
+        storage = get_storage(data_dir, fmt)
+        for (game_id, category_id), total in self.run_counts.items():
+            for start in range(0, max(total, 1), CHUNK_SIZE):
+                frame = self.category_frame(game_id, category_id, start, CHUNK_SIZE)
+                if start == 0:
+                    storage.write(frame, game_id, category_id)
+                else:
+                    storage.append(frame, game_id, category_id)
+        (data_dir / METADATA_CONFIG['file']).write_text(json.dumps(self.metadata()), encoding='utf-8')
+        return data_dir
+
+    def write_json(self, path: Path, embed_players: bool = False) -> int:
+        """Écrit toutes les runs JSON, une par ligne ; renvoie leur nombre"""
+        written = 0
+        with open(path, 'w', encoding='utf-8') as handle:
+            for game_id, category_id, _ in self.categories:
+                for page in self.iter_pages(game_id, category_id, embed_players=embed_players):
+                    handle.writelines(json.dumps(run) + '\n' for run in page)
+                    written += len(page)
+        return written
+
+def main():
+    parser = argparse.ArgumentParser(description="Génération de données synthétiques")
+    parser.add_argument('data_dir', type=Path)
+    parser.add_argument('--runs', type=int, default=100_000)
+    parser.add_argument('--games', type=int, default=4)
+    parser.add_argument('--categories', type=int, default=5, help="Catégories par jeu")
+    parser.add_argument('--format', default=None, help="Format de stockage (STORAGE_CONFIG par défaut)")
+    parser.add_argument('--json', type=Path, default=None, help="Écrit aussi les runs JSON (une par ligne)")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    dataset = SyntheticDataset(args.runs, args.games, args.categories, seed=args.seed)
+    dataset.write(args.data_dir, args.format)
+    if args.json:
+        dataset.write_json(args.json)
+    print(json.dumps({'runs': dataset.total_runs, 'partitions': len(dataset.categories),
+                      'data_dir': str(args.data_dir)}))
+
+if __name__ == '__main__':
+    main()
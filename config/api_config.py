@@ -1,7 +1,51 @@
+import os
+
 API_CONFIG = {
     'base_url': 'https://www.speedrun.com/api/v1',
     'headers': {
-        'User-Agent': 'SpeedrunDataCollector/1.0'
+        'User-Agent': 'SpeedrunDataCollector/1.0',
+        'Accept-Encoding': 'gzip, deflate'
     },
-    'runs_per_page': 200
-}
\ No newline at end of file
+    'runs_per_page': 200,
+    # Les collectes qui alimentent l'index de métadonnées embarquent les noms des joueurs
+    # dans les pages de runs (embed=players) ; les autres appels reçoivent les pages simples
+    'embed_players': True,
+    # speedrun.com autorise 100 requêtes par minute et par IP
+    'requests_per_minute': 100,
+    'burst': 10,
+    'max_rate_limit_retries': 5,
+    # Session HTTP persistante et reprises sur erreurs transitoires
+    'pool_size': 16,
+    'timeout': 30,
+    'max_retries': 4,
+    'backoff_base': 0.5,
+    'backoff_max': 30.0
+}
+
+COLLECTION_CONFIG = {
+    'max_concurrency': 8,
+    # Runs parcourues par catégorie et par synchronisation (None : toutes les runs vérifiées) ;
+    # au-delà, l'historique manquant est rattrapé par les synchronisations suivantes
+    'max_runs': 1000,
+    # Taille des blocs lors du versement des pages reçues dans le stockage
+    'merge_chunk_size': 5000,
+    # Les runs sont vérifiées avec retard : on relit les N derniers jours déjà connus
+    'sync_overlap_days': 14
+}
+
+# Cache disque des réponses de l'API (SPEEDRUN_OFFLINE=1 pour servir uniquement depuis le cache)
+CACHE_CONFIG = {
+    'enabled': True,
+    'path': '.cache/speedrun_api.sqlite',
+    'max_bytes': 256 * 1024 * 1024,
+    'ttl': {
+        'categories': 7 * 24 * 3600,
+        'games': 7 * 24 * 3600,
+        'platforms': 7 * 24 * 3600,
+        'runs': 3600,
+        # Pages de synchronisation (direction=desc) : toujours revalidées (ETag), un cron ne rate aucune run
+        'runs_recent': 0,
+        'default': 24 * 3600
+    },
+    'offline': os.environ.get('SPEEDRUN_OFFLINE', '0') == '1'
+}
@@ -1,3 +1,5 @@
+import os
+
 GAMES = {
     'smb1': 'w6jve26j',  # Super Mario Bros.
     'sm64': 'o1y9wo6q',  # Super Mario 64
@@ -10,4 +12,116 @@ GAME_NAMES = {
     'o1y9wo6q': 'Super Mario 64',
     'pd0wq31e': 'Mega Man',
     '9d3rr0dl': 'Super Meat Boy'
-}
\ No newline at end of file
+}
+
+# Format de stockage des runs : 'csv' (historique) ou 'parquet' (nécessite pyarrow)
+STORAGE_CONFIG = {
+    'format': 'csv',
+    'parquet_compression': 'zstd',
+    # Lignes lues par bloc pour les lectures filtrées et les remplacements de runs
+    'chunk_size': 100_000
+}
+
+# Calcul des métriques : pool de processus et cache par empreinte de partition
+METRICS_CONFIG = {
+    'max_workers': None,  # None : nombre de CPU
+    'cache_file': '.metrics_cache.json',
+    'cache_version': 2,
+    # Résumés fusionnables par partition (src/metrics/streaming.py), tenus à jour par le collecteur
+    'accumulator_dir': '.accumulators'
+}
+
+# Nettoyage des runs (src/data/cleaning.py) : doublons par run_id et valeurs aberrantes par catégorie
+CLEANING_CONFIG = {
+    # 'iqr', 'mad' ou 'percentile'
+    'method': 'iqr',
+    'iqr_factor': 1.5,
+    'mad_threshold': 3.5,
+    'percentiles': (1, 99),
+    'max_workers': None  # None : nombre de CPU
+}
+
+# Index local des métadonnées (jeux, catégories, plateformes, joueurs)
+METADATA_CONFIG = {
+    'file': 'metadata.json',
+    'ttl': 24 * 3600,
+    # Délai avant de réessayer l'indexation d'un jeu en échec
+    'retry_after': 300
+}
+
+# Index des classements et records personnels (un fichier par catégorie)
+LEADERBOARD_CONFIG = {
+    'dir': '.leaderboards',
+    'top_k': 100
+}
+
+# Tableau de bord : nombre de catégories dont les runs restent en mémoire
+DASHBOARD_CONFIG = {
+    'rows_cache_size': 8,
+    # Données de graphiques agrégées (src/metrics/charts.py), en cache par catégorie et résolution
+    'chart_cache_size': 64,
+    'histogram_bins': 50,
+    'band_granularity': 'month',
+    'max_points': 1000,
+    # Instantané publié par le service de collecte (catalogue et tableau comparatif)
+    'snapshot_file': 'snapshot.json'
+}
+
+# Agrégats temporels (jour / semaine / mois) par catégorie
+ROLLUP_CONFIG = {
+    'dir': '.rollups',
+    # Taille du sketch de quantiles : médiane exacte jusqu'à sketch_k runs par période.
+    # Seuls les mois conservent leur sketch sur disque ; jours et semaines n'y gardent
+    # que summary_points quantiles (ou leurs temps exacts s'ils comptent moins de runs)
+    'sketch_k': 200,
+    'summary_points': 3
+}
+
+# Base analytique SQL des runs, alimentée par le collecteur ('sqlite' ou 'duckdb', optionnel)
+DATABASE_CONFIG = {
+    'enabled': True,
+    'engine': 'sqlite',
+    'file': 'runs.sqlite'
+}
+
+# Service de collecte planifiée (python -m src.data.daemon)
+SCHEDULER_CONFIG = {
+    'queue_file': '.jobs.sqlite',
+    # Intervalle de rafraîchissement des catégories, par défaut et par jeu (secondes)
+    'default_interval': 6 * 3600,
+    'intervals': {},
+    # Redécouverte des catégories de chaque jeu
+    'discovery_interval': 24 * 3600,
+    # Catégorie "chaude" : au moins hot_threshold nouvelles runs à la dernière synchronisation,
+    # rafraîchie hot_interval_factor fois plus souvent et servie en priorité
+    'hot_threshold': 5,
+    'hot_interval_factor': 0.25,
+    # Délai avant de réessayer une tâche en échec (doublé à chaque échec, borné par l'intervalle)
+    'retry_after': 300,
+    # Délai minimal entre deux publications de l'instantané
+    'publish_interval': 60,
+    'idle_sleep': 5.0
+}
+
+# Collecte répartie (python -m src.data.sharding) : plages de pages louées par des workers
+SHARDING_CONFIG = {
+    # File partagée (et seau de jetons commun), relative au dossier de données sauf chemin absolu
+    'queue_file': '.work.sqlite',
+    # Résultats par worker, fusionnés ensuite dans le stockage principal
+    'shards_dir': 'shards',
+    'pages_per_job': 10,
+    # Bail d'une plage : renouvelé toutes les heartbeat_interval secondes par le worker
+    'lease_seconds': 120,
+    'heartbeat_interval': 30,
+    # Plage en échec : nouvel essai après retry_after * 2**essais secondes, abandon après max_attempts
+    'max_attempts': 5,
+    'retry_after': 30,
+    'idle_sleep': 2.0
+}
+
+# Instrumentation (compteurs, histogrammes) ; SPEEDRUN_METRICS=0 pour la désactiver
+INSTRUMENTATION_CONFIG = {
+    'enabled': os.environ.get('SPEEDRUN_METRICS', '1') != '0',
+    # Écriture périodique des mesures en JSON (secondes)
+    'dump_interval': 60
+}
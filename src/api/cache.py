@@ -0,0 +1,147 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional
+import requests
+from config.api_config import CACHE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+class CacheMissError(requests.exceptions.RequestException):
+    """Ressource absente du cache alors que le mode hors-ligne est actif"""
+
+class CacheEntry(NamedTuple):
+    payload: Dict
+    etag: Optional[str]
+    last_modified: Optional[str]
+    stored_at: float
+
+class ResponseCache:
+    """
+    Cache SQLite des réponses JSON de l'API, avec TTL par endpoint et éviction LRU
+
+    Args:
+        path: Fichier SQLite (':memory:' pour un cache non persistant)
+        max_bytes: Taille maximale cumulée des corps de réponse
+        ttl: Durée de fraîcheur en secondes par endpoint ('default' en repli)
+    """
+    def __init__(self, path: str = ':memory:', max_bytes: Optional[int] = None,
+                 ttl: Optional[Dict[str, float]] = None):
+        if path != ':memory:':
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes or CACHE_CONFIG['max_bytes']
+        self.ttl = ttl or CACHE_CONFIG['ttl']
+        self.stats = {'hits': 0, 'misses': 0, 'stale': 0, 'revalidated': 0, 'evictions': 0}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                endpoint TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                stored_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                size INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed_at);
+        """)
+        self._total_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()[0]
+
+    def is_fresh(self, entry: CacheEntry, endpoint: str) -> bool:
+        """Indique si l'entrée est encore dans sa fenêtre de TTL"""
+        ttl = self.ttl.get(endpoint, self.ttl.get('default', 0))
+        return time.time() - entry.stored_at < ttl
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """Retourne l'entrée associée à la clé (sans tenir compte du TTL)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, etag, last_modified, stored_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+        return CacheEntry(json.loads(row[0]), row[1], row[2], row[3])
+
+    def put(self, key: str, endpoint: str, payload: Dict,
+            etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        """Enregistre une réponse puis évince les entrées les moins récemment utilisées"""
+        body = json.dumps(payload, separators=(',', ':'))
+        now = time.time()
+        with self._lock:
+            previous = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, endpoint, body, etag, last_modified, now, now, len(body))
+            )
+            self._total_bytes += len(body) - (previous[0] if previous else 0)
+            self._evict()
+            self._conn.commit()
+
+    def touch(self, key: str) -> None:
+        """Renouvelle la fraîcheur d'une entrée revalidée par un 304"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("UPDATE responses SET stored_at = ?, accessed_at = ? WHERE key = ?",
+                               (now, now, key))
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        while self._total_bytes > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT key, size FROM responses ORDER BY accessed_at LIMIT 64"
+            ).fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._total_bytes -= size
+                self.stats['evictions'] += 1
+                if self._total_bytes <= self.max_bytes:
+                    break
+
+    def record(self, outcome: str) -> None:
+        with self._lock:
+            self.stats[outcome] += 1
+
+    def get_stats(self) -> Dict[str, float]:
+        """Retourne les statistiques de succès / échecs du cache"""
+        with self._lock:
+            lookups = self.stats['hits'] + self.stats['misses'] + self.stats['stale']
+            return {
+                **self.stats,
+                'entries': self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0],
+                'bytes': self._total_bytes,
+                'hit_rate': self.stats['hits'] / lookups if lookups else 0.0
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+            self._total_bytes = 0
+
+_default_cache: Optional[ResponseCache] = None
+_default_cache_lock = threading.Lock()
+
+def get_default_cache() -> ResponseCache:
+    """Cache partagé par toutes les instances de SpeedrunAPI du processus"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            path = CACHE_CONFIG['path'] if CACHE_CONFIG['enabled'] else ':memory:'
+            try:
+                _default_cache = ResponseCache(path)
+            except sqlite3.Error as e:
+                logger.error(f"Cache disque indisponible ({e}), utilisation d'un cache mémoire")
+                _default_cache = ResponseCache(':memory:')
+        return _default_cache
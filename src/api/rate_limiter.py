@@ -0,0 +1,143 @@
+import sqlite3
+import threading
+import time
+import logging
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+class TokenBucket:
+    """
+    Limiteur de débit à seau de jetons, partagé entre threads
+
+    Args:
+        rate: Nombre de jetons ajoutés par seconde
+        capacity: Taille maximale du seau (rafale autorisée)
+    """
+    def __init__(self, rate: float, capacity: int = 1):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._last_refill = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def per_minute(cls, requests_per_minute: int, burst: int = 1) -> 'TokenBucket':
+        """Construit un limiteur à partir d'un budget par minute"""
+        return cls(requests_per_minute / 60.0, burst)
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._last_refill
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._last_refill = now
+
+    def acquire(self) -> float:
+        """
+        Bloque jusqu'à l'obtention d'un jeton
+
+        Returns:
+            Temps d'attente total en secondes
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._blocked_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = max(
+                    self._blocked_until - now,
+                    (1 - self._tokens) / self.rate
+                )
+            time.sleep(delay)
+            waited += delay
+
+    def pause(self, seconds: float) -> None:
+        """Suspend toutes les acquisitions (réponse 429 / Retry-After)"""
+        with self._lock:
+            until = time.monotonic() + seconds
+            if until > self._blocked_until:
+                logger.warning(f"Limite de taux atteinte, pause de {seconds:.1f}s")
+                self._blocked_until = until
+            self._tokens = 0.0
+
+class SqliteTokenBucket:
+    """
+    Seau de jetons partagé entre processus (et machines d'un même volume) via SQLite
+
+    Les processus qui utilisent la même clé se partagent le débit : une clé
+    par adresse IP sortante (nom de machine par défaut) reproduit la limite
+    de speedrun.com. Chaque acquisition est une transaction BEGIN IMMEDIATE.
+    """
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS rate_limits (
+        key TEXT PRIMARY KEY,
+        tokens REAL NOT NULL,
+        updated_at REAL NOT NULL,
+        blocked_until REAL NOT NULL DEFAULT 0
+    );
+    """
+
+    def __init__(self, path: Path, rate: float, capacity: int = 1, key: str = 'default'):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self.key = key
+        self._lock = threading.Lock()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(self.SCHEMA)
+        self._conn.execute("INSERT OR IGNORE INTO rate_limits (key, tokens, updated_at) VALUES (?, ?, ?)",
+                           (key, float(self.capacity), time.time()))
+
+    @classmethod
+    def per_minute(cls, path: Path, requests_per_minute: int, burst: int = 1,
+                   key: str = 'default') -> 'SqliteTokenBucket':
+        return cls(path, requests_per_minute / 60.0, burst, key)
+
+    def _update(self, consume: bool, pause: float = 0.0) -> float:
+        """Recharge le seau et prend un jeton si possible ; renvoie l'attente nécessaire (0 si obtenu)"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                tokens, updated_at, blocked_until = self._conn.execute(
+                    "SELECT tokens, updated_at, blocked_until FROM rate_limits WHERE key = ?", (self.key,)
+                ).fetchone()
+                now = time.time()
+                tokens = min(self.capacity, tokens + max(now - updated_at, 0.0) * self.rate)
+                delay = 0.0
+                if pause:
+                    blocked_until, tokens = max(blocked_until, now + pause), 0.0
+                elif consume:
+                    if now >= blocked_until and tokens >= 1:
+                        tokens -= 1
+                    else:
+                        delay = max(blocked_until - now, (1 - tokens) / self.rate)
+                self._conn.execute("UPDATE rate_limits SET tokens = ?, updated_at = ?, blocked_until = ? "
+                                   "WHERE key = ?", (tokens, now, blocked_until, self.key))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return delay
+
+    def acquire(self) -> float:
+        """Bloque jusqu'à l'obtention d'un jeton ; renvoie le temps d'attente total"""
+        waited = 0.0
+        while True:
+            delay = self._update(consume=True)
+            if not delay:
+                return waited
+            time.sleep(delay)
+            waited += delay
+
+    def pause(self, seconds: float) -> None:
+        """Suspend les acquisitions de tous les processus de la clé (réponse 429 / Retry-After)"""
+        logger.warning(f"Limite de taux atteinte, pause partagée de {seconds:.1f}s")
+        self._update(consume=False, pause=seconds)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
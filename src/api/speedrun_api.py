@@ -1,28 +1,208 @@
 from typing import Dict, List, Optional
 import requests
 import logging
-from config.api_config import API_CONFIG
+import random
+import threading
+import time
+from requests.adapters import HTTPAdapter
+from config.api_config import API_CONFIG, CACHE_CONFIG
+from .cache import CacheMissError, ResponseCache, get_default_cache
+from .rate_limiter import TokenBucket
+from ..utils import instrumentation
 
 logger = logging.getLogger(__name__)
 
+# Le budget de requêtes est imposé par IP : toutes les instances le partagent
+_shared_limiter = TokenBucket.per_minute(API_CONFIG['requests_per_minute'], API_CONFIG['burst'])
+
+RETRYABLE_STATUS = {500, 502, 503, 504}
+
+def _retry_after_seconds(response: requests.Response, default: float = 60.0) -> float:
+    """Extrait le délai de l'en-tête Retry-After (en secondes)"""
+    value = response.headers.get('Retry-After')
+    try:
+        return max(0.0, float(value)) if value is not None else default
+    except ValueError:
+        return default
+
+def _backoff_delay(attempt: int) -> float:
+    """Délai exponentiel avec gigue complète pour la tentative donnée"""
+    ceiling = min(API_CONFIG['backoff_max'], API_CONFIG['backoff_base'] * (2 ** attempt))
+    return random.uniform(0, ceiling)
+
+def _request_key(url: str, params: Optional[Dict]) -> str:
+    """Clé canonique d'une requête (URL + paramètres triés)"""
+    if not params:
+        return url
+    return url + '?' + '&'.join(f"{k}={params[k]}" for k in sorted(params))
+
 class SpeedrunAPI:
-    def __init__(self):
-        self.base_url = API_CONFIG['base_url']
+    def __init__(self, base_url: Optional[str] = None, rate_limiter: Optional[TokenBucket] = None,
+                 pool_size: Optional[int] = None, cache: Optional[ResponseCache] = None,
+                 offline: Optional[bool] = None):
+        self.base_url = base_url or API_CONFIG['base_url']
         self.headers = API_CONFIG['headers']
+        self.rate_limiter = rate_limiter or _shared_limiter
+        self.request_count = 0
+        self.session = self._create_session(pool_size or API_CONFIG['pool_size'])
+        # Le cache conserve aussi les validateurs HTTP (ETag / Last-Modified)
+        self.cache = cache or get_default_cache()
+        self.offline = CACHE_CONFIG['offline'] if offline is None else offline
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    def _create_session(self, pool_size: int) -> requests.Session:
+        """Crée une session keep-alive avec un pool de connexions dimensionné"""
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers.update(self.headers)
+        return session
+
+    def _record(self, endpoint: str, **increments: float) -> None:
+        if 'latency' in increments:
+            instrumentation.observe('speedrun_api_request_seconds', increments['latency'], endpoint=endpoint)
+        with self._lock:
+            stats = self._stats.setdefault(endpoint, {
+                'requests': 0, 'retries': 0, 'not_modified': 0, 'errors': 0,
+                'total_latency': 0.0, 'max_latency': 0.0
+            })
+            for key, value in increments.items():
+                if key == 'latency':
+                    stats['total_latency'] += value
+                    stats['max_latency'] = max(stats['max_latency'], value)
+                else:
+                    stats[key] += value
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """Retourne les compteurs de latence et de reprises par endpoint"""
+        with self._lock:
+            return {
+                endpoint: {
+                    **stats,
+                    'avg_latency': stats['total_latency'] / stats['requests'] if stats['requests'] else 0.0
+                }
+                for endpoint, stats in self._stats.items()
+            }
+
+    def _send(self, endpoint: str, url: str, params: Optional[Dict],
+              headers: Dict[str, str]) -> requests.Response:
+        """Envoie un GET en respectant le limiteur, avec reprises sur 429 et erreurs transitoires"""
+        attempt = 0
+        rate_limited = 0
+        while True:
+            self.rate_limiter.acquire()
+            with self._lock:
+                self.request_count += 1
+            start = time.perf_counter()
+            try:
+                response = self.session.get(url, params=params, headers=headers,
+                                            timeout=API_CONFIG['timeout'])
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                self._record(endpoint, requests=1, latency=time.perf_counter() - start)
+                instrumentation.increment('speedrun_api_requests_total', endpoint=endpoint, status='network_error')
+                if attempt >= API_CONFIG['max_retries']:
+                    self._record(endpoint, errors=1)
+                    raise
+                logger.warning(f"Erreur réseau sur {endpoint} ({e}), nouvelle tentative")
+            else:
+                self._record(endpoint, requests=1, latency=time.perf_counter() - start)
+                instrumentation.increment('speedrun_api_requests_total', endpoint=endpoint,
+                                          status=str(response.status_code))
+                if response.status_code == 429 and rate_limited < API_CONFIG['max_rate_limit_retries']:
+                    rate_limited += 1
+                    self._record(endpoint, retries=1)
+                    self.rate_limiter.pause(_retry_after_seconds(response))
+                    continue
+                if response.status_code not in RETRYABLE_STATUS or attempt >= API_CONFIG['max_retries']:
+                    if response.status_code >= 400:
+                        self._record(endpoint, errors=1)
+                    return response
+                logger.warning(f"Réponse {response.status_code} sur {endpoint}, nouvelle tentative")
+            self._record(endpoint, retries=1)
+            time.sleep(_backoff_delay(attempt))
+            attempt += 1
+
+    def _get(self, endpoint: str, url: str, params: Optional[Dict] = None) -> Dict:
+        """
+        GET servi depuis le cache tant que la réponse est fraîche, sinon
+        revalidé par requête conditionnelle (304 : corps en cache réutilisé)
+        """
+        key = _request_key(url, params)
+        cached = self.cache.get(key)
+        if cached and (self.offline or self.cache.is_fresh(cached, endpoint)):
+            self.cache.record('hits')
+            instrumentation.increment('speedrun_api_cache_total', endpoint=endpoint, result='hit')
+            return cached.payload
+        if self.offline:
+            self.cache.record('misses')
+            raise CacheMissError(f"Mode hors-ligne : {key} absent du cache")
+        self.cache.record('stale' if cached else 'misses')
+        instrumentation.increment('speedrun_api_cache_total', endpoint=endpoint,
+                                  result='stale' if cached else 'miss')
+
+        headers = {}
+        if cached and cached.etag:
+            headers['If-None-Match'] = cached.etag
+        if cached and cached.last_modified:
+            headers['If-Modified-Since'] = cached.last_modified
+
+        response = self._send(endpoint, url, params, headers)
+        if response.status_code == 304 and cached:
+            self._record(endpoint, not_modified=1)
+            self.cache.record('revalidated')
+            self.cache.touch(key)
+            return cached.payload
+        response.raise_for_status()
+        payload = response.json()
+        self.cache.put(key, endpoint, payload,
+                       response.headers.get('ETag'), response.headers.get('Last-Modified'))
+        return payload
 
     def get_game_categories(self, game_id: str) -> List[Dict]:
         """Récupère toutes les catégories d'un jeu"""
         url = f"{self.base_url}/games/{game_id}/categories"
         try:
-            response = requests.get(url, headers=self.headers)
-            response.raise_for_status()
-            return response.json()['data']
+            return self._get('categories', url)['data']
         except requests.exceptions.RequestException as e:
             logger.error(f"Erreur lors de la récupération des catégories: {e}")
             raise
 
-    def get_runs(self, game_id: str, category: Optional[str] = None, offset: int = 0) -> Dict:
-        """Récupère les runs avec pagination"""
+    def get_game(self, game_id: str, embed: Optional[str] = None) -> Dict:
+        """Récupère un jeu, avec ses ressources liées (ex. 'categories,platforms')"""
+        url = f"{self.base_url}/games/{game_id}"
+        try:
+            return self._get('games', url, {'embed': embed} if embed else None)['data']
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Erreur lors de la récupération du jeu {game_id}: {e}")
+            raise
+
+    def get_platforms(self) -> List[Dict]:
+        """Récupère la liste complète des plateformes (toutes les pages)"""
+        url = f"{self.base_url}/platforms"
+        platforms = []
+        offset = 0
+        try:
+            while True:
+                page = self._get('platforms', url, {'max': 200, 'offset': offset})['data']
+                platforms.extend(page)
+                if len(page) < 200:
+                    return platforms
+                offset += len(page)
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Erreur lors de la récupération des plateformes: {e}")
+            raise
+
+    def get_runs(self, game_id: str, category: Optional[str] = None, offset: int = 0,
+                 direction: Optional[str] = None, embed: Optional[str] = None) -> Dict:
+        """
+        Récupère les runs avec pagination (direction 'desc' : plus récentes d'abord)
+
+        embed='players' remplace la liste des joueurs par {'data': [joueurs complets]}.
+        Les pages 'desc' (synchronisation) relèvent du TTL 'runs_recent' : elles
+        sont revalidées à chaque appel au lieu d'être servies depuis le cache.
+        """
         params = {
             'game': game_id,
             'status': 'verified',
@@ -32,12 +212,14 @@ class SpeedrunAPI:
         }
         if category:
             params['category'] = category
+        if direction:
+            params['direction'] = direction
+        if embed:
+            params['embed'] = embed
 
         url = f"{self.base_url}/runs"
         try:
-            response = requests.get(url, headers=self.headers, params=params)
-            response.raise_for_status()
-            return response.json()
+            return self._get('runs_recent' if direction == 'desc' else 'runs', url, params)
         except requests.exceptions.RequestException as e:
             logger.error(f"Erreur lors de la récupération des runs: {e}")
-            raise
\ No newline at end of file
+            raise
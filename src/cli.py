@@ -0,0 +1,96 @@
+"""
+Points d'entrée en ligne de commande, à imports différés
+
+Chaque commande ne charge que le module dont elle a besoin (COMMANDS) : une
+collecte lancée par cron n'importe ni streamlit ni plotly, et seule la page
+du tableau de bord, exécutée par streamlit, charge la pile graphique. Ce
+module lui-même n'importe que la bibliothèque standard.
+
+Usage:
+    python main.py collect [--data-dir data] [--workers N] [--daemon]
+    python main.py build-metrics [--data-dir data] [--workers N] [--force]
+    python main.py serve [--data-dir data] [--port 8501]
+"""
+import argparse
+import importlib
+import logging
+import subprocess
+import sys
+from pathlib import Path
+from types import ModuleType
+from typing import List, Optional
+
+# Module chargé par chaque commande (budget d'import vérifié par benchmarks/suite.py)
+COMMANDS = {
+    'collect': 'src.data.daemon',
+    'build-metrics': 'src.metrics.pipeline',
+    'serve': 'src.visualization.dashboard'
+}
+
+MAIN_SCRIPT = Path(__file__).resolve().parent.parent / 'main.py'
+
+logger = logging.getLogger(__name__)
+
+def load(command: str) -> ModuleType:
+    return importlib.import_module(COMMANDS[command])
+
+def collect(args: argparse.Namespace) -> None:
+    load('collect').run(args.data_dir, args.workers, once=not args.daemon,
+                        metrics_port=args.metrics_port, metrics_dump=args.metrics_dump)
+
+def build_metrics(args: argparse.Namespace) -> None:
+    entries = load('build-metrics').build_metrics(args.data_dir, max_workers=args.workers, force=args.force)
+    logger.info(f"Métriques disponibles pour {len(entries)} catégories")
+
+def serve(args: argparse.Namespace) -> None:
+    """Lance streamlit sur main.py : la page est importée dans le processus streamlit"""
+    command = [sys.executable, '-m', 'streamlit', 'run', str(MAIN_SCRIPT), '--server.port', str(args.port),
+               '--', '--data-dir', str(args.data_dir)]
+    sys.exit(subprocess.call(command))
+
+def render_dashboard(argv: Optional[List[str]] = None) -> None:
+    """Page du tableau de bord (exécutée par streamlit run main.py)"""
+    parser = argparse.ArgumentParser(description="Tableau de bord")
+    parser.add_argument('--data-dir', type=Path, default=Path('data'))
+    args, _ = parser.parse_known_args(argv)
+    args.data_dir.mkdir(parents=True, exist_ok=True)
+    load('serve').Dashboard().run(args.data_dir)
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Speedrun Analytics")
+    subparsers = parser.add_subparsers(dest='command')
+
+    collect_parser = subparsers.add_parser('collect', help="Collecte des jeux suivis puis publication")
+    collect_parser.add_argument('--daemon', action='store_true',
+                                help="Service continu (file de tâches planifiées) au lieu d'une collecte unique")
+    collect_parser.add_argument('--metrics-port', type=int, default=None)
+    collect_parser.add_argument('--metrics-dump', type=Path, default=None)
+    collect_parser.set_defaults(handler=collect)
+
+    metrics_parser = subparsers.add_parser('build-metrics', help="Calcul des métriques par catégorie")
+    metrics_parser.add_argument('--force', action='store_true', help="Ignore le cache de métriques")
+    metrics_parser.set_defaults(handler=build_metrics)
+
+    serve_parser = subparsers.add_parser('serve', help="Tableau de bord streamlit")
+    serve_parser.add_argument('--port', type=int, default=8501)
+    serve_parser.set_defaults(handler=serve)
+
+    for subparser in (collect_parser, metrics_parser, serve_parser):
+        subparser.add_argument('--data-dir', type=Path, default=Path('data'))
+    for subparser in (collect_parser, metrics_parser):
+        subparser.add_argument('--workers', type=int, default=None)
+    return parser
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from .utils.logging_config import setup_logging
+
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command is None:
+        # Sans commande : tableau de bord, comme l'ancien point d'entrée
+        args = parser.parse_args(['serve'])
+    setup_logging()
+    args.handler(args)
+
+if __name__ == '__main__':
+    main()
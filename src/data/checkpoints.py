@@ -0,0 +1,49 @@
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class CheckpointStore:
+    """
+    Points de reprise de la synchronisation incrémentale, par (jeu, catégorie)
+
+    Chaque entrée contient la date et l'ID de la run la plus récente connue,
+    ainsi que l'offset atteint si une pagination a été interrompue.
+    """
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._checkpoints: Dict[str, Dict] = self._load()
+
+    def _load(self) -> Dict[str, Dict]:
+        if not self.path.exists():
+            return {}
+        try:
+            return json.loads(self.path.read_text(encoding='utf-8'))
+        except (OSError, ValueError) as e:
+            logger.error(f"Points de reprise illisibles ({self.path}), réinitialisation: {e}")
+            return {}
+
+    def _save(self) -> None:
+        # Écriture atomique : un arrêt brutal ne laisse jamais un fichier tronqué
+        tmp_path = self.path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps(self._checkpoints, indent=2, sort_keys=True), encoding='utf-8')
+        os.replace(tmp_path, self.path)
+
+    def get(self, game_id: str, category_id: str) -> Optional[Dict]:
+        with self._lock:
+            checkpoint = self._checkpoints.get(f"{game_id}_{category_id}")
+            return dict(checkpoint) if checkpoint else None
+
+    def update(self, game_id: str, category_id: str, **fields) -> None:
+        """Met à jour (et persiste) les champs du point de reprise"""
+        with self._lock:
+            checkpoint = self._checkpoints.setdefault(f"{game_id}_{category_id}", {})
+            checkpoint.update(fields)
+            checkpoint['updated_at'] = datetime.now().isoformat()
+            self._save()
@@ -0,0 +1,232 @@
+"""
+Nettoyage des runs : doublons, temps manquants et valeurs aberrantes
+
+Les doublons sont repérés par run_id (index de hachage, version la plus
+récente conservée) au sein de chaque groupe (catégorie, ou (game_id,
+category_id) pour le jeu de données complet). Les bornes des valeurs
+aberrantes sont calculées par groupe en une passe vectorisée sur les temps
+triés par (groupe, temps) :
+- 'iqr' : [Q1 - k * IQR, Q3 + k * IQR] (k = iqr_factor) ;
+- 'mad' : médiane ± seuil * 1.4826 * MAD (aucun filtre si MAD nul) ;
+- 'percentile' : percentiles [bas, haut] des temps.
+
+Le jeu de données complet peut être nettoyé en une fois (clean_dataset) ;
+les groupes sont alors répartis en lots de taille comparable traités en
+parallèle (les tris numpy libèrent le GIL).
+
+Usage: python -m src.data.cleaning [data_dir] [--method mad] [--workers N]
+"""
+import argparse
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from config.settings import CLEANING_CONFIG
+from .storage import RUN_COLUMNS, get_storage
+from ..utils import instrumentation
+
+logger = logging.getLogger(__name__)
+
+METHODS = ('iqr', 'mad', 'percentile')
+# Facteur de cohérence du MAD avec l'écart-type d'une loi normale
+MAD_SCALE = 1.4826
+# En dessous, le découpage en lots parallèles coûte plus qu'il ne rapporte
+PARALLEL_MIN_RUNS = 200_000
+
+SUMMARY_COLUMNS = ['input_runs', 'duplicates', 'missing_time', 'outliers', 'kept', 'lower_bound', 'upper_bound']
+
+class CleaningResult(NamedTuple):
+    data: pd.DataFrame
+    # Une ligne par groupe : SUMMARY_COLUMNS
+    summary: pd.DataFrame
+
+class Segments:
+    """Temps triés par (groupe, temps) et bornes des segments de chaque groupe"""
+    def __init__(self, codes: np.ndarray, times: np.ndarray, group_count: int):
+        # Tri par temps puis tri stable par groupe (tri radix si les codes tiennent sur 16 bits)
+        order = np.argsort(times)
+        narrow = codes[order].astype(np.int16 if group_count <= np.iinfo(np.int16).max else np.int32)
+        self.order = order[np.argsort(narrow, kind='stable')]
+        self.codes = codes[self.order]
+        self.times = times[self.order]
+        self.counts = np.bincount(self.codes, minlength=group_count)
+        self.offsets = np.cumsum(self.counts) - self.counts
+
+    def quantile(self, q: float) -> np.ndarray:
+        """Quantile par groupe (interpolation linéaire, comme pandas) ; NaN si vide"""
+        result = np.full(len(self.counts), np.nan)
+        present = self.counts > 0
+        position = self.offsets[present] + (self.counts[present] - 1) * q
+        lower = np.floor(position).astype('int64')
+        upper = np.ceil(position).astype('int64')
+        fraction = position - lower
+        result[present] = self.times[lower] + (self.times[upper] - self.times[lower]) * fraction
+        return result
+
+def outlier_bounds(segments: Segments, method: str = 'iqr', iqr_factor: Optional[float] = None,
+                   mad_threshold: Optional[float] = None,
+                   percentiles: Optional[Tuple[float, float]] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Bornes [basse, haute] des temps acceptés, par groupe (paramètres : CLEANING_CONFIG par défaut)"""
+    if method == 'iqr':
+        factor = CLEANING_CONFIG['iqr_factor'] if iqr_factor is None else iqr_factor
+        q1, q3 = segments.quantile(0.25), segments.quantile(0.75)
+        return q1 - factor * (q3 - q1), q3 + factor * (q3 - q1)
+    if method == 'mad':
+        threshold = CLEANING_CONFIG['mad_threshold'] if mad_threshold is None else mad_threshold
+        medians = segments.quantile(0.5)
+        deviations = Segments(segments.codes, np.abs(segments.times - medians[segments.codes]), len(medians))
+        spread = threshold * MAD_SCALE * deviations.quantile(0.5)
+        # MAD nul (majorité de temps identiques) : aucune run écartée
+        spread[spread == 0] = np.inf
+        return medians - spread, medians + spread
+    if method == 'percentile':
+        low, high = CLEANING_CONFIG['percentiles'] if percentiles is None else percentiles
+        return segments.quantile(low / 100), segments.quantile(high / 100)
+    raise ValueError(f"Méthode de nettoyage inconnue: {method} (attendu : {', '.join(METHODS)})")
+
+def _filter_chunk(codes: np.ndarray, times: np.ndarray, group_count: int,
+                  options: dict) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Masque des runs conservées et bornes de chaque groupe d'un lot"""
+    segments = Segments(codes, times, group_count)
+    low, high = outlier_bounds(segments, **options)
+    keep = np.zeros(len(times), dtype=bool)
+    keep[segments.order] = (segments.times >= low[segments.codes]) & (segments.times <= high[segments.codes])
+    return keep, low, high
+
+def _split_groups(counts: np.ndarray, parts: int) -> List[Tuple[int, int]]:
+    """Intervalles [début, fin) de groupes consécutifs, de nombres de runs comparables"""
+    targets = np.cumsum(counts)[-1] * np.arange(1, parts) / parts
+    cuts = np.unique(np.concatenate([[0], np.searchsorted(np.cumsum(counts), targets) + 1, [len(counts)]]))
+    return [(int(start), int(stop)) for start, stop in zip(cuts[:-1], cuts[1:]) if stop > start]
+
+def _group_codes(df: pd.DataFrame, by: List[str]) -> Tuple[np.ndarray, pd.Index]:
+    """Code entier du groupe de chaque run, à partir des codes (entiers) de chaque colonne"""
+    if not by:
+        return np.zeros(len(df), dtype='int64'), pd.RangeIndex(1)
+    factorized = [pd.factorize(df[column], use_na_sentinel=False) for column in by]
+    combined = np.zeros(len(df), dtype='int64')
+    for column_codes, uniques in factorized:
+        combined = combined * len(uniques) + column_codes
+    codes, groups = pd.factorize(combined)
+    # Valeurs de chaque colonne pour chaque groupe, décodées de droite à gauche
+    levels, rest = [], np.asarray(groups)
+    for _, uniques in reversed(factorized):
+        levels.insert(0, np.asarray(uniques, dtype=object)[rest % len(uniques)].astype(str))
+        rest = rest // len(uniques)
+    return codes, pd.MultiIndex.from_arrays(levels, names=by) if len(by) > 1 else pd.Index(levels[0], name=by[0])
+
+def clean_runs(df: pd.DataFrame, by: Optional[Sequence[str]] = None, method: Optional[str] = None,
+               workers: Optional[int] = None, sort: bool = True, **options) -> CleaningResult:
+    """
+    Nettoie des runs, groupe par groupe, en une passe vectorisée
+
+    Args:
+        df: Runs (schéma du stockage)
+        by: Colonnes des groupes (None : un seul groupe, par exemple une partition)
+        method: 'iqr', 'mad' ou 'percentile' (CLEANING_CONFIG['method'] par défaut)
+        workers: Lots de groupes traités en parallèle (CLEANING_CONFIG['max_workers'] par défaut)
+        sort: Trie les runs conservées par date (ordre stable au sein de chaque groupe)
+        options: iqr_factor, mad_threshold ou percentiles
+
+    Returns:
+        CleaningResult : runs conservées et résumé des rejets par groupe
+    """
+    method = method or CLEANING_CONFIG['method']
+    if method not in METHODS:
+        raise ValueError(f"Méthode de nettoyage inconnue: {method} (attendu : {', '.join(METHODS)})")
+    by = list(by or [])
+    if 'date' in df and not pd.api.types.is_datetime64_any_dtype(df['date']):
+        df = df.assign(date=pd.to_datetime(df['date'], errors='coerce'))
+
+    codes, group_index = _group_codes(df, by)
+    group_count = len(group_index)
+    input_runs = np.bincount(codes, minlength=group_count)
+
+    # Doublons : même run_id dans le même groupe (index de hachage sur des clés entières),
+    # dernière version conservée ; les runs sans run_id sont toutes gardées
+    if 'run_id' in df:
+        run_codes, run_ids = pd.factorize(df['run_id'])
+        keys = pd.Index(codes.astype('int64') * max(len(run_ids), 1) + run_codes)
+        duplicated = keys.duplicated(keep='last') & (run_codes >= 0)
+    else:
+        duplicated = df.duplicated(keep='first').to_numpy()
+    times = df['time_seconds'].to_numpy(dtype='float64', na_value=np.nan)
+    missing = np.isnan(times) & ~duplicated
+    candidates = np.flatnonzero(~duplicated & ~missing)
+    candidate_codes, candidate_times = codes[candidates], times[candidates]
+
+    workers = workers or CLEANING_CONFIG['max_workers'] or os.cpu_count() or 1
+    options = {'method': method, **options}
+    if workers > 1 and group_count > 1 and len(candidates) >= PARALLEL_MIN_RUNS:
+        chunk_counts = np.bincount(candidate_codes, minlength=group_count)
+        ranges = _split_groups(chunk_counts, workers)
+        by_group = np.argsort(candidate_codes, kind='stable')
+        offsets = np.concatenate([[0], np.cumsum(chunk_counts)])
+        keep_sorted = np.empty(len(candidates), dtype=bool)
+        low, high = np.full(group_count, np.nan), np.full(group_count, np.nan)
+
+        def run(group_range: Tuple[int, int]) -> None:
+            start, stop = group_range
+            positions = by_group[offsets[start]:offsets[stop]]
+            keep, chunk_low, chunk_high = _filter_chunk(candidate_codes[positions] - start,
+                                                        candidate_times[positions], stop - start, options)
+            keep_sorted[offsets[start]:offsets[stop]] = keep
+            low[start:stop], high[start:stop] = chunk_low, chunk_high
+
+        with ThreadPoolExecutor(max_workers=min(workers, len(ranges))) as pool:
+            list(pool.map(run, ranges))
+        keep = np.empty(len(candidates), dtype=bool)
+        keep[by_group] = keep_sorted
+    else:
+        keep, low, high = _filter_chunk(candidate_codes, candidate_times, group_count, options)
+
+    kept = candidates[keep]
+    kept_counts = np.bincount(codes[kept], minlength=group_count)
+    summary = pd.DataFrame({
+        'input_runs': input_runs,
+        'duplicates': np.bincount(codes[duplicated], minlength=group_count),
+        'missing_time': np.bincount(codes[missing], minlength=group_count),
+        'outliers': np.bincount(candidate_codes[~keep], minlength=group_count),
+        'kept': kept_counts,
+        'lower_bound': low,
+        'upper_bound': high
+    }, index=group_index)
+    for reason in ('duplicates', 'missing_time', 'outliers'):
+        instrumentation.increment('speedrun_runs_filtered_total', int(summary[reason].sum()), reason=reason)
+
+    data = df.iloc[kept]
+    if sort and 'date' in data:
+        data = data.sort_values('date', kind='stable')
+    return CleaningResult(data, summary)
+
+@instrumentation.timed('speedrun_stage_seconds', stage='clean_dataset')
+def clean_dataset(data_dir: Path, method: Optional[str] = None, workers: Optional[int] = None,
+                  fmt: Optional[str] = None, **options) -> CleaningResult:
+    """Lit et nettoie toutes les partitions en une fois, groupées par (game_id, category_id)"""
+    df = get_storage(Path(data_dir), fmt).read_all(columns=RUN_COLUMNS)
+    return clean_runs(df, by=['game_id', 'category_id'], method=method, workers=workers, **options)
+
+def main():
+    from ..utils.logging_config import setup_logging
+
+    parser = argparse.ArgumentParser(description="Nettoyage de toutes les catégories et résumé des rejets")
+    parser.add_argument('data_dir', type=Path, nargs='?', default=Path('data'))
+    parser.add_argument('--method', choices=METHODS, default=None)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--output', type=Path, default=None, help="Écrit le résumé des rejets (CSV)")
+    args = parser.parse_args()
+
+    setup_logging()
+    summary = clean_dataset(args.data_dir, method=args.method, workers=args.workers).summary
+    if args.output:
+        summary.to_csv(args.output)
+    with pd.option_context('display.width', 200, 'display.max_rows', None):
+        print(summary.to_string())
+    totals = summary[['input_runs', 'duplicates', 'missing_time', 'outliers', 'kept']].sum()
+    print(' | '.join(f"{name}: {value}" for name, value in totals.items()))
+
+if __name__ == '__main__':
+    main()
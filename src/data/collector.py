@@ -1,50 +1,306 @@
 import logging
+import numpy as np
 import pandas as pd
+from datetime import date, timedelta
 from pathlib import Path
-from typing import Optional, Dict, List
+from typing import Iterator, Optional, Dict, List, Tuple
 from ..api.speedrun_api import SpeedrunAPI
+from ..data.checkpoints import CheckpointStore
 from ..data.processor import SpeedrunDataProcessor
-from ..utils.validators import validate_run_data
+from ..data.storage import RUN_COLUMNS, StorageBackend, apply_schema, get_storage
+from ..data.ingest import columns_to_frame, extract_player_names, log_rejections, runs_to_columns
+from ..data.metadata import get_metadata_index
+from ..data.database import RunDatabase, get_database
+from ..metrics.leaderboard import LeaderboardStore
+from ..metrics.rollups import RollupStore
+from ..metrics.streaming import AccumulatorStore
+from ..utils import instrumentation
 from ..utils.error_handlers import handle_api_errors
-from config.settings import GAME_NAMES
+from config.settings import DATABASE_CONFIG, GAME_NAMES
+from config.api_config import API_CONFIG, COLLECTION_CONFIG
 
 logger = logging.getLogger(__name__)
 
+def _unchanged(previous: pd.DataFrame, fresh: pd.DataFrame) -> np.ndarray:
+    """Lignes identiques colonne à colonne (temps à la milliseconde près, valeurs nulles égales)"""
+    same = np.ones(len(fresh), dtype=bool)
+    for column in fresh.columns:
+        if column == 'time_seconds':
+            same &= np.isclose(previous[column].to_numpy('float64', na_value=np.nan),
+                               fresh[column].to_numpy('float64', na_value=np.nan), atol=5e-4, equal_nan=True)
+        else:
+            old, new = previous[column].astype(object).to_numpy(), fresh[column].astype(object).to_numpy()
+            same &= (old == new) | (pd.isna(old) & pd.isna(new))
+    return same
+
 class SpeedrunCollector:
-    def __init__(self, output_dir: str = "data"):
+    def __init__(self, output_dir: str = "data", storage: Optional[StorageBackend] = None):
         self.api = SpeedrunAPI()
         self.processor = SpeedrunDataProcessor()
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.storage = storage or get_storage(self.output_dir)
+        self.metadata = get_metadata_index(self.output_dir)
+        self.checkpoints = CheckpointStore(self.output_dir / '.checkpoints.json')
+        self.leaderboards = LeaderboardStore(self.output_dir, self.storage)
+        self.rollups = RollupStore(self.output_dir, self.storage)
+        self.accumulators = AccumulatorStore(self.output_dir, self.storage)
+        self.database: Optional[RunDatabase] = get_database(self.output_dir) if DATABASE_CONFIG['enabled'] else None
+
+    def _process_page(self, runs: List[Dict], context: str) -> Dict[str, np.ndarray]:
+        """Valide et convertit une page de runs brutes en un lot de colonnes typées"""
+        columns, rejected = runs_to_columns(runs)
+        log_rejections(rejected, context)
+        return columns
+
+    def iter_run_pages(self, game_id: str, category: Optional[str] = None, max_runs: Optional[int] = None,
+                       offset: int = 0, direction: Optional[str] = None, with_players: bool = False
+                       ) -> Iterator[Tuple[int, List[Dict], Dict[str, np.ndarray]]]:
+        """
+        Parcourt les pages de runs une à une (mode streaming)
+
+        Args:
+            max_runs: Nombre maximal de runs parcourues (None : toutes)
+            offset: Offset de départ (reprise)
+            direction: Ordre de tri par date ('desc' : plus récentes d'abord)
+            with_players: Embarque les noms des joueurs (index de métadonnées, si API_CONFIG['embed_players'])
+
+        Yields:
+            (offset après la page, runs brutes de la page, colonnes des runs valides)
+        """
+        embed = 'players' if with_players and API_CONFIG['embed_players'] else None
+        while max_runs is None or offset < max_runs:
+            response = self.api.get_runs(game_id, category, offset, direction=direction, embed=embed)
+            page = response.get('data') or []
+            if not page:
+                break
+
+            instrumentation.observe('speedrun_page_runs', len(page), endpoint='runs')
+            columns = self._process_page(page, f"{game_id}_{category}@{offset}")
+            if embed:
+                self.metadata.update_players(extract_player_names(page))
+            offset += len(page)
+            yield offset, page, columns
+
+            # Page incomplète : inutile de demander la suivante
+            if len(page) < API_CONFIG['runs_per_page']:
+                break
 
     @handle_api_errors
     def collect_game_data(self, game_id: str, category: Optional[str] = None, max_runs: int = 1000) -> pd.DataFrame:
         """Collecte les données pour un jeu spécifique"""
         logger.info(f"Collecte des données pour {GAME_NAMES.get(game_id, game_id)}")
-        runs_data = []
-        offset = 0
-        
-        while len(runs_data) < max_runs:
-            response = self.api.get_runs(game_id, category, offset)
-            if not response.get('data'):
+        batches = []
+        collected = 0
+
+        for _, _, batch in self.iter_run_pages(game_id, category):
+            batches.append(batch)
+            collected += len(batch.get('run_id', ()))
+            if collected >= max_runs:
+                break
+
+        return columns_to_frame(batches)
+
+    @handle_api_errors
+    def sync_category(self, game_id: str, category_id: str, max_runs: Optional[int] = None) -> int:
+        """
+        Synchronisation incrémentale d'une catégorie, en mémoire bornée
+
+        Les runs sont parcourues des plus récentes aux plus anciennes jusqu'à
+        dépasser le point de reprise (moins une marge de recouvrement). Chaque
+        page est écrite dans un fichier partiel dès sa réception, puis le
+        fichier partiel est versé par blocs dans le stockage, sans doublon :
+        la mémoire dépend de la taille des pages, pas de celle de la catégorie.
+
+        Un parcours arrêté par max_runs avant le point de reprise (ou avant la
+        fin de l'historique à la première synchronisation) n'avance pas le
+        point de reprise : il enregistre un rattrapage (offset atteint, borne
+        du parcours) que les synchronisations suivantes poursuivent avant de
+        revenir aux runs les plus récentes.
+
+        Args:
+            game_id: ID du jeu
+            category_id: ID de la catégorie
+            max_runs: Nombre maximal de runs parcourues (COLLECTION_CONFIG['max_runs']
+                par défaut, où None signifie toutes les runs vérifiées)
+
+        Returns:
+            Nombre de runs nouvellement ajoutées
+        """
+        if max_runs is None:
+            max_runs = COLLECTION_CONFIG['max_runs']
+        filename = f"{game_id}_{category_id}.csv"
+        partial_path = self.output_dir / f"{filename}.partial"
+        checkpoint = self.checkpoints.get(game_id, category_id) or {}
+
+        backfill = checkpoint.get('backfill')
+        if backfill:
+            cutoff, start = backfill.get('cutoff'), backfill['offset']
+            logger.info(f"Rattrapage de {filename} à partir de l'offset {start}")
+        else:
+            cutoff, start = None, 0
+            if checkpoint.get('latest_date'):
+                cutoff = (date.fromisoformat(checkpoint['latest_date'])
+                          - timedelta(days=COLLECTION_CONFIG['sync_overlap_days'])).isoformat()
+
+        # Reprise d'une pagination interrompue : les pages déjà lues sont dans le fichier partiel.
+        # En ordre décroissant, l'arrivée de nouvelles runs décale les offsets vers des
+        # runs plus récentes, déjà lues ou relues au retour vers les runs récentes
+        # (doublons éliminés à la fusion), jamais vers un trou.
+        offset = (checkpoint.get('pending_offset') or start) if partial_path.exists() else start
+        if offset != start:
+            logger.info(f"Reprise de {filename} à l'offset {offset}")
+        limit = None if max_runs is None else start + max_runs
+
+        reached_checkpoint = False
+        for offset, page, columns in self.iter_run_pages(game_id, category_id, limit, offset, 'desc',
+                                                          with_players=True):
+            runs = columns_to_frame([columns])
+            if cutoff:
+                reached_checkpoint = any(run.get('date') and run['date'] < cutoff for run in page)
+                if not runs.empty:
+                    runs = runs[runs['date'].isna() | (runs['date'] >= pd.Timestamp(cutoff))]
+            if not runs.empty:
+                runs.to_csv(partial_path, mode='a', header=not partial_path.exists(), index=False)
+
+            self.checkpoints.update(game_id, category_id, pending_offset=offset)
+            if reached_checkpoint:
                 break
-            
-            for run in response['data']:
-                if validated_run := validate_run_data(run):
-                    processed_run = self.processor.process_run_data(validated_run)
-                    if processed_run:
-                        runs_data.append(processed_run)
-            
-            offset += len(response['data'])
-            
-        return pd.DataFrame(runs_data) if runs_data else pd.DataFrame()
+
+        # Parcours complet : point de reprise atteint, ou historique épuisé avant la limite
+        complete = reached_checkpoint or limit is None or offset < limit
+        return self._merge_partial(game_id, category_id, partial_path, checkpoint.get('latest_date'),
+                                   None if complete else {'offset': offset, 'cutoff': cutoff})
+
+    def merge_file(self, game_id: str, category_id: str, path: Path) -> int:
+        """Verse un fichier de runs (CSV) dans le stockage, sans doublon, puis le supprime"""
+        checkpoint = self.checkpoints.get(game_id, category_id) or {}
+        return self._merge_partial(game_id, category_id, Path(path), checkpoint.get('latest_date'))
+
+    def _merge_partial(self, game_id: str, category_id: str, partial_path: Path,
+                       latest_date: Optional[str] = None, backfill: Optional[Dict] = None) -> int:
+        """
+        Verse le fichier partiel par blocs dans le stockage et avance le point de reprise
+
+        Les nouvelles runs sont ajoutées ; les runs déjà stockées et relues dans
+        la fenêtre de recouvrement remplacent leur version stockée si elles ont
+        changé (temps corrigé, statut, plateforme...).
+
+        Args:
+            backfill: Parcours incomplet ({'offset', 'cutoff'}) : le point de reprise
+                n'avance pas, le rattrapage est enregistré et garde la run la plus
+                récente vue, qui deviendra le point de reprise une fois terminé
+        """
+        added = corrected = 0
+        latest = None
+        if partial_path.exists():
+            # Seuls les IDs déjà stockés sont gardés en mémoire pour l'élimination des doublons
+            known_ids = set()
+            if self.storage.exists(game_id, category_id):
+                known_ids = set(self.storage.read(game_id, category_id, columns=['run_id'])['run_id'])
+
+            seen_again = []
+            # IDs lus comme texte : un ID numérique ('00123') ne doit pas différer de sa version stockée
+            text = {column: str for column in ('run_id', 'category', 'player', 'platform')}
+            for chunk in pd.read_csv(partial_path, chunksize=COLLECTION_CONFIG['merge_chunk_size'], dtype=text):
+                chunk = chunk.drop_duplicates(subset='run_id')
+                dates = pd.to_datetime(chunk['date'], errors='coerce')
+                if dates.notna().any():
+                    newest = chunk.loc[dates.idxmax()]
+                    if latest is None or newest['date'] > latest['date']:
+                        latest = newest
+                known = chunk['run_id'].isin(known_ids)
+                if known.any():
+                    seen_again.append(chunk[known])
+                chunk = chunk[~known]
+                if chunk.empty:
+                    continue
+                chunk = apply_schema(chunk)[RUN_COLUMNS]
+                with instrumentation.timer('speedrun_stage_seconds', stage='index_update'):
+                    self.leaderboards.update(game_id, category_id, chunk)
+                    self.rollups.update(game_id, category_id, chunk)
+                    self.accumulators.update(game_id, category_id, chunk)
+                with instrumentation.timer('speedrun_stage_seconds', stage='save'):
+                    self.storage.append(chunk, game_id, category_id)
+                    if self.database is not None:
+                        self.database.insert_runs(chunk, game_id, category_id)
+                instrumentation.increment('speedrun_runs_stored_total', len(chunk))
+                known_ids.update(chunk['run_id'])
+                added += len(chunk)
+
+            if seen_again:
+                corrected = self._apply_corrections(game_id, category_id, pd.concat(seen_again))
+            if added and not corrected:
+                self.leaderboards.save(game_id, category_id)
+                self.rollups.save(game_id, category_id)
+                self.accumulators.save(game_id, category_id)
+
+        # Run la plus récente vue depuis le début du parcours (rattrapages compris)
+        newest = (self.checkpoints.get(game_id, category_id) or {}).get('backfill') or {}
+        newest = {key: newest[key] for key in ('latest_date', 'latest_run_id') if newest.get(key)}
+        if latest is not None and latest['date'][:10] > newest.get('latest_date', ''):
+            newest = {'latest_date': latest['date'][:10], 'latest_run_id': latest['run_id']}
+
+        if backfill is not None:
+            self.checkpoints.update(game_id, category_id, backfill={**backfill, **newest})
+        else:
+            if newest and (not latest_date or newest['latest_date'] > latest_date):
+                self.checkpoints.update(game_id, category_id, **newest)
+            self.checkpoints.update(game_id, category_id, backfill=None)
+        self.checkpoints.update(game_id, category_id, pending_offset=None)
+        self.metadata.save()
+        partial_path.unlink(missing_ok=True)
+        logger.info(f"{added} nouvelles runs pour {GAME_NAMES.get(game_id, game_id)} ({category_id})"
+                    + (f", {corrected} runs corrigées" if corrected else ""))
+        return added
+
+    def _apply_corrections(self, game_id: str, category_id: str, seen_again: pd.DataFrame) -> int:
+        """
+        Remplace les runs stockées dont la version relue diffère
+
+        Seules les runs relues sont lues dans le stockage (lecture filtrée par
+        run_id) : la mémoire dépend du nombre de runs relues, pas de la taille
+        de la partition. Seules les corrections déclenchent un remplacement
+        dans la partition et la reconstruction de ses index (classement,
+        agrégats, résumé de métriques) ; la base SQL remplace les lignes concernées.
+
+        Returns:
+            Nombre de runs remplacées
+        """
+        fresh = apply_schema(seen_again.drop_duplicates(subset='run_id', keep='last'))[RUN_COLUMNS]
+        previous = self.storage.read_runs(game_id, category_id, fresh['run_id'])
+        previous = previous.drop_duplicates(subset='run_id').reset_index(drop=True)
+        previous['run_id'] = previous['run_id'].astype(str)
+        fresh = fresh.set_index('run_id').loc[previous['run_id']].reset_index()
+        changed = ~_unchanged(previous, fresh)
+        if not changed.any():
+            return 0
+
+        fresh = fresh[changed]
+        with instrumentation.timer('speedrun_stage_seconds', stage='save'):
+            self.storage.replace_runs(apply_schema(fresh)[RUN_COLUMNS], game_id, category_id)
+            if self.database is not None:
+                self.database.insert_runs(fresh, game_id, category_id, replace=True)
+        with instrumentation.timer('speedrun_stage_seconds', stage='index_update'):
+            self.leaderboards.rebuild(game_id, category_id)
+            self.rollups.rebuild(game_id, category_id)
+            self.accumulators.rebuild(game_id, category_id)
+        return len(fresh)
 
     def save_data(self, df: pd.DataFrame, filename: str) -> None:
-        """Sauvegarde les données dans un fichier CSV"""
+        """Sauvegarde les données via le backend de stockage ({game_id}_{category_id}.csv)"""
         try:
-            output_path = self.output_dir / filename
-            df.to_csv(output_path, index=False)
-            logger.info(f"Données sauvegardées dans {output_path}")
+            game_id, category_id = Path(filename).stem.split('_')
+            with instrumentation.timer('speedrun_stage_seconds', stage='save'):
+                self.storage.write(df, game_id, category_id)
+                if self.database is not None:
+                    self.database.replace_partition(df, game_id, category_id)
+            logger.info(f"Données sauvegardées pour {game_id}_{category_id} ({self.storage.name})")
         except Exception as e:
             logger.error(f"Erreur lors de la sauvegarde: {e}")
-            raise
\ No newline at end of file
+            raise
+
+    def sync_database(self) -> None:
+        """Recopie l'index de métadonnées (jeux, catégories, plateformes, joueurs) dans la base SQL"""
+        if self.database is not None:
+            self.database.upsert_metadata(self.metadata.snapshot())
@@ -0,0 +1,233 @@
+"""
+Représentation compacte des runs en mémoire
+
+Chaque colonne est encodée au plus juste : identifiants répétés
+(category, player, platform) en dictionnaire + codes entiers de la plus
+petite largeur possible, run_id en octets de largeur fixe, dates en jours
+(int32), temps en float32 et booléens compactés bit à bit. Un processus
+peut ainsi garder tout l'historique des jeux suivis (RunStore) et ne
+reconstruire un DataFrame que pour la catégorie consultée.
+
+Usage (rapport d'occupation mémoire du dossier data/):
+    python -m src.data.compact report data
+"""
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from .storage import BOOL_COLUMNS, CATEGORICAL_COLUMNS, RUN_COLUMNS, get_storage
+
+logger = logging.getLogger(__name__)
+
+_EPOCH = np.datetime64('1970-01-01', 'D')
+_NO_DATE = np.iinfo(np.int32).min
+
+def _code_dtype(size: int) -> np.dtype:
+    """Plus petit entier signé pouvant coder size modalités (et -1 pour les valeurs manquantes)"""
+    return np.min_scalar_type(-max(size, 1))
+
+class CompactRuns:
+    """Runs d'une partition (ou de plusieurs), encodées colonne par colonne"""
+    __slots__ = ('length', 'run_ids', 'dictionaries', 'codes', 'days', 'times', 'flags')
+
+    def __init__(self, length: int, run_ids: np.ndarray, dictionaries: Dict[str, np.ndarray],
+                 codes: Dict[str, np.ndarray], days: np.ndarray, times: np.ndarray,
+                 flags: Dict[str, np.ndarray]):
+        self.length = length
+        self.run_ids = run_ids
+        self.dictionaries = dictionaries
+        self.codes = codes
+        self.days = days
+        self.times = times
+        self.flags = flags
+
+    def __len__(self) -> int:
+        return self.length
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'CompactRuns':
+        """Encode un DataFrame au schéma des runs (colonnes absentes : valeurs manquantes)"""
+        length = len(df)
+        if 'run_id' in df:
+            run_ids = df['run_id'].astype(str).str.encode('utf-8').to_numpy(dtype=bytes)
+        else:
+            run_ids = np.zeros(length, dtype='S1')
+
+        dictionaries, codes = {}, {}
+        for column in CATEGORICAL_COLUMNS:
+            values = df[column] if column in df else pd.Series([None] * length, dtype=object)
+            column_codes, uniques = pd.factorize(values)
+            dictionaries[column] = np.asarray(uniques, dtype=object)
+            codes[column] = column_codes.astype(_code_dtype(len(uniques)))
+
+        if 'date' in df:
+            dates = pd.to_datetime(df['date'], errors='coerce').to_numpy(dtype='datetime64[D]')
+            days = np.where(np.isnat(dates), _NO_DATE, (dates - _EPOCH).astype('int64')).astype('int32')
+        else:
+            days = np.full(length, _NO_DATE, dtype='int32')
+        times = (df['time_seconds'].to_numpy(dtype='float32', na_value=np.nan) if 'time_seconds' in df
+                 else np.full(length, np.nan, dtype='float32'))
+        flags = {column: np.packbits(df[column].fillna(False).to_numpy(dtype=bool) if column in df
+                                     else np.zeros(length, dtype=bool))
+                 for column in BOOL_COLUMNS}
+        return cls(length, run_ids, dictionaries, codes, days, times, flags)
+
+    @classmethod
+    def concat(cls, parts: Iterable['CompactRuns']) -> 'CompactRuns':
+        """Concatène des runs compactes ; les dictionnaires sont fusionnés et les codes recalculés"""
+        parts = [part for part in parts if len(part)]
+        if not parts:
+            return cls.from_frame(pd.DataFrame(columns=RUN_COLUMNS))
+        if len(parts) == 1:
+            return parts[0]
+        dictionaries, codes = {}, {}
+        for column in CATEGORICAL_COLUMNS:
+            merged = pd.Index(np.concatenate([part.dictionaries[column] for part in parts])).unique()
+            remapped = []
+            for part in parts:
+                # -1 (valeur manquante) reste -1 : dernière entrée de la table de correspondance
+                mapping = np.append(merged.get_indexer(part.dictionaries[column]), -1)
+                remapped.append(mapping[part.codes[column]])
+            dictionaries[column] = np.asarray(merged, dtype=object)
+            codes[column] = np.concatenate(remapped).astype(_code_dtype(len(merged)))
+        width = max(part.run_ids.dtype.itemsize for part in parts)
+        flags = {column: np.packbits(np.concatenate([part.flag(column) for part in parts]))
+                 for column in BOOL_COLUMNS}
+        return cls(sum(len(part) for part in parts),
+                   np.concatenate([part.run_ids.astype(f'S{width}') for part in parts]),
+                   dictionaries, codes,
+                   np.concatenate([part.days for part in parts]),
+                   np.concatenate([part.times for part in parts]),
+                   flags)
+
+    def flag(self, column: str) -> np.ndarray:
+        """Colonne booléenne décompactée"""
+        return np.unpackbits(self.flags[column], count=self.length).astype(bool)
+
+    def to_frame(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Reconstruit un DataFrame au schéma de apply_schema (catégoriels, float32,
+        datetime64, booléens) ; les catégoriels partagent les codes compacts
+        """
+        columns = columns or RUN_COLUMNS
+        data = {}
+        for column in columns:
+            if column == 'run_id':
+                # Type texte par défaut de la version de pandas, comme une lecture du stockage
+                data[column] = np.char.decode(self.run_ids, 'utf-8').astype(object)
+            elif column in self.codes:
+                data[column] = pd.Categorical.from_codes(self.codes[column],
+                                                         categories=pd.Index(self.dictionaries[column]))
+            elif column == 'date':
+                dates = (self.days.astype('int64') + _EPOCH).astype('datetime64[ns]')
+                dates[self.days == _NO_DATE] = np.datetime64('NaT')
+                data[column] = dates
+            elif column == 'time_seconds':
+                data[column] = self.times
+            elif column in self.flags:
+                data[column] = self.flag(column)
+        return pd.DataFrame(data, columns=columns)
+
+    @property
+    def nbytes(self) -> int:
+        """Occupation mémoire des tableaux et des dictionnaires (chaînes comprises)"""
+        arrays = [self.run_ids, self.days, self.times, *self.codes.values(), *self.flags.values()]
+        total = sum(array.nbytes for array in arrays)
+        for dictionary in self.dictionaries.values():
+            total += dictionary.nbytes + sum(sys.getsizeof(value) for value in dictionary)
+        return total
+
+class RunStore:
+    """Historique complet des runs, en mémoire et compact, indexé par (jeu, catégorie)"""
+    def __init__(self):
+        self.partitions: Dict[Tuple[str, str], CompactRuns] = {}
+
+    def __len__(self) -> int:
+        return sum(len(runs) for runs in self.partitions.values())
+
+    @classmethod
+    def load(cls, data_dir: Path, fmt: Optional[str] = None) -> 'RunStore':
+        """Charge et encode toutes les partitions du stockage, une à la fois"""
+        store = cls()
+        storage = get_storage(Path(data_dir), fmt)
+        for game_id, category_id in storage.list_partitions():
+            try:
+                store.add(game_id, category_id, storage.read(game_id, category_id))
+            except Exception as e:
+                logger.error(f"Erreur lors du chargement de {game_id}_{category_id}: {e}")
+        return store
+
+    def add(self, game_id: str, category_id: str, df: pd.DataFrame) -> None:
+        """Ajoute un lot de runs à une partition"""
+        key = (game_id, category_id)
+        runs = CompactRuns.from_frame(df)
+        current = self.partitions.get(key)
+        self.partitions[key] = runs if current is None else CompactRuns.concat([current, runs])
+
+    def frame(self, game_id: str, category_id: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        return self.partitions[(game_id, category_id)].to_frame(columns)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(runs.nbytes for runs in self.partitions.values())
+
+def _deep_size(values: Iterable, seen: set) -> int:
+    """Taille des objets Python distincts (un objet partagé n'est compté qu'une fois)"""
+    total = 0
+    for value in values:
+        if id(value) not in seen:
+            seen.add(id(value))
+            total += sys.getsizeof(value)
+    return total
+
+def _records_bytes(df: pd.DataFrame) -> int:
+    """Occupation de df.to_dict('records') : dictionnaires, clés partagées et valeurs"""
+    records = df.to_dict('records')
+    seen: set = set()
+    total = sys.getsizeof(records) + _deep_size(records, seen)
+    for record in records:
+        total += _deep_size(record.values(), seen)
+    return total
+
+def memory_report(df: pd.DataFrame) -> Dict[str, float]:
+    """
+    Octets par run d'un lot selon sa représentation
+
+    Returns:
+        records (lignes en dictionnaires), object_frame (colonnes object),
+        schema_frame (apply_schema), compact (CompactRuns) et le rapport records / compact
+    """
+    count = max(len(df), 1)
+    object_frame = df.astype(object)
+    compact = CompactRuns.from_frame(df)
+    report = {
+        'runs': len(df),
+        'records': _records_bytes(object_frame) / count,
+        'object_frame': object_frame.memory_usage(deep=True).sum() / count,
+        'schema_frame': df.memory_usage(deep=True).sum() / count,
+        'compact': compact.nbytes / count
+    }
+    report['reduction'] = report['records'] / max(report['compact'], 1e-9)
+    report['reduction_vs_object_frame'] = report['object_frame'] / max(report['compact'], 1e-9)
+    return report
+
+def main():
+    from ..utils.logging_config import setup_logging
+
+    parser = argparse.ArgumentParser(description="Représentation compacte des runs")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    report_parser = subparsers.add_parser('report', help="Octets par run avant / après compactage")
+    report_parser.add_argument('data_dir', type=Path, nargs='?', default=Path('data'))
+    args = parser.parse_args()
+
+    setup_logging()
+    if args.command == 'report':
+        df = get_storage(args.data_dir).read_all(columns=RUN_COLUMNS)[RUN_COLUMNS]
+        print(json.dumps(memory_report(df), indent=2))
+
+if __name__ == '__main__':
+    main()
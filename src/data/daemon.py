@@ -0,0 +1,218 @@
+"""
+Service de collecte planifiée, indépendant du tableau de bord
+
+Les tâches (découverte des catégories de chaque jeu, synchronisation de
+chaque catégorie) sont tirées d'une file persistante (JobQueue) par un
+pool de threads ; le débit reste gouverné par le limiteur partagé de
+SpeedrunAPI. Chaque jeu a son intervalle de rafraîchissement
+(SCHEDULER_CONFIG['intervals']) ; une catégorie qui reçoit de nouvelles
+runs est rafraîchie plus souvent et servie en priorité. Après chaque
+vague de nouvelles runs, le catalogue et le tableau comparatif sont
+publiés dans un instantané (publish_snapshot) que lit le tableau de bord.
+
+SIGINT / SIGTERM : les tâches en cours se terminent, l'instantané est
+publié une dernière fois puis le service s'arrête. Un arrêt brutal est
+rattrapé au démarrage suivant (tâches interrompues remises en attente,
+reprise de la pagination via les points de reprise).
+
+Mesures : --metrics-port expose /metrics (Prometheus) et /metrics.json,
+--metrics-dump écrit périodiquement l'instantané JSON des mesures.
+
+Usage: python -m src.data.daemon [--data-dir data] [--once] [--metrics-port 9108]
+                                 [--metrics-dump data/metrics.json]
+"""
+import argparse
+import logging
+import signal
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional
+from .collector import SpeedrunCollector
+from .engine import CollectionEngine
+from .jobs import Job, JobQueue
+from ..utils import instrumentation
+from ..utils.data_loader import load_current_snapshot, publish_snapshot
+from config.api_config import COLLECTION_CONFIG
+from config.settings import GAME_NAMES, GAMES, INSTRUMENTATION_CONFIG, SCHEDULER_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Les catégories d'un jeu sont découvertes avant la synchronisation de ses runs
+DISCOVERY_PRIORITY = 1_000_000
+
+class CollectionDaemon:
+    """
+    Collecte continue des jeux suivis à partir d'une file de tâches persistante
+
+    Args:
+        collector: Collecteur partagé par les threads du service
+        game_ids: Jeux suivis
+        workers: Nombre de tâches exécutées simultanément
+    """
+    def __init__(self, collector: SpeedrunCollector, game_ids: List[str], workers: Optional[int] = None,
+                 max_runs: Optional[int] = None):
+        self.collector = collector
+        self.data_dir = collector.output_dir
+        self.game_ids = list(game_ids)
+        self.workers = workers or COLLECTION_CONFIG['max_concurrency']
+        self.max_runs = max_runs if max_runs is not None else COLLECTION_CONFIG['max_runs']
+        self.queue = JobQueue(self.data_dir / SCHEDULER_CONFIG['queue_file'])
+        self._stop = threading.Event()
+        self._dirty = threading.Event()
+        self._last_published = 0.0
+
+    def interval_for(self, game_id: str) -> float:
+        return SCHEDULER_CONFIG['intervals'].get(game_id, SCHEDULER_CONFIG['default_interval'])
+
+    def stop(self) -> None:
+        """Demande l'arrêt : les tâches en cours se terminent, aucune nouvelle n'est prise"""
+        if not self._stop.is_set():
+            logger.info("Arrêt du service de collecte demandé")
+        self._stop.set()
+
+    def seed(self) -> None:
+        """Remet en attente les tâches interrompues et planifie la découverte des jeux suivis"""
+        recovered = self.queue.recover()
+        if recovered:
+            logger.info(f"{recovered} tâches interrompues remises en attente")
+        for game_id in self.game_ids:
+            self.queue.schedule(Job('categories', game_id, priority=DISCOVERY_PRIORITY))
+        if load_current_snapshot(self.data_dir) is None:
+            # Premier démarrage ou données modifiées hors du service : publication dès la première occasion
+            self._dirty.set()
+
+    # Exécution des tâches
+
+    def run_job(self, job: Job) -> None:
+        """Exécute une tâche réservée et la replanifie (succès ou échec)"""
+        now = time.time()
+        try:
+            with instrumentation.timer('speedrun_job_seconds', kind=job.kind):
+                if job.kind == 'categories':
+                    self._discover(job.game_id)
+                else:
+                    added = self.collector.sync_category(job.game_id, job.category_id,
+                                                         max_runs=self.max_runs) or 0
+        except Exception as e:
+            retry = min(SCHEDULER_CONFIG['retry_after'] * 2 ** job.attempts, self.interval_for(job.game_id))
+            logger.error(f"Échec de la tâche {job.kind} {job.game_id}_{job.category_id}, "
+                         f"nouvelle tentative dans {retry:.0f}s: {e}")
+            instrumentation.increment('speedrun_jobs_total', kind=job.kind, status='failed')
+            self.queue.fail(job, str(e), now + retry)
+            return
+
+        instrumentation.increment('speedrun_jobs_total', kind=job.kind, status='done')
+        if job.kind == 'categories':
+            self.queue.complete(job, now + SCHEDULER_CONFIG['discovery_interval'], DISCOVERY_PRIORITY)
+            return
+
+        interval = self.interval_for(job.game_id)
+        priority = 0
+        if added >= SCHEDULER_CONFIG['hot_threshold']:
+            # Catégorie chaude : rafraîchie plus souvent et servie avant les autres
+            interval *= SCHEDULER_CONFIG['hot_interval_factor']
+            priority = added
+        if added:
+            self._dirty.set()
+        self.queue.complete(job, time.time() + interval, priority, added)
+
+    def _discover(self, game_id: str) -> None:
+        """Indexe les catégories d'un jeu et planifie la synchronisation des nouvelles"""
+        self.collector.metadata.ensure_fresh([game_id])
+        created = sum(self.queue.schedule(Job('runs', game_id, category['id']))
+                      for category in self.collector.api.get_game_categories(game_id))
+        if created:
+            logger.info(f"{created} nouvelles catégories planifiées pour {GAME_NAMES.get(game_id, game_id)}")
+
+    def _worker(self) -> None:
+        while not self._stop.is_set():
+            job = self.queue.claim()
+            if job is None:
+                wait = self.queue.next_due_in()
+                self._stop.wait(SCHEDULER_CONFIG['idle_sleep'] if wait is None
+                                else min(max(wait, 0.05), SCHEDULER_CONFIG['idle_sleep']))
+                continue
+            self.run_job(job)
+
+    # Publication
+
+    def publish(self, force: bool = False) -> bool:
+        """Publie l'instantané si de nouvelles runs sont arrivées (au plus une fois par publish_interval)"""
+        if not force and (not self._dirty.is_set()
+                          or time.time() - self._last_published < SCHEDULER_CONFIG['publish_interval']):
+            return False
+        self._dirty.clear()
+        try:
+            with instrumentation.timer('speedrun_stage_seconds', stage='sync_database'):
+                self.collector.sync_database()
+            publish_snapshot(self.data_dir)
+        except Exception as e:
+            logger.error(f"Erreur lors de la publication de l'instantané: {e}")
+            self._dirty.set()
+            return False
+        self._last_published = time.time()
+        return True
+
+    def serve(self) -> None:
+        """Boucle principale : threads de collecte et publication périodique, jusqu'à stop()"""
+        self.seed()
+        threads = [threading.Thread(target=self._worker, name=f'collect-{index}', daemon=True)
+                   for index in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        logger.info(f"Service de collecte démarré: {len(self.game_ids)} jeux, {self.workers} threads, "
+                    f"file {self.queue.stats()}")
+        try:
+            while not self._stop.wait(1.0):
+                self.publish()
+        finally:
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+            self.publish(force=self._dirty.is_set())
+            self.queue.close()
+            logger.info("Service de collecte arrêté")
+
+    def install_signal_handlers(self) -> None:
+        """Arrêt propre sur SIGINT / SIGTERM (à appeler depuis le thread principal)"""
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: self.stop())
+
+def run(data_dir: Path, workers: Optional[int] = None, once: bool = False,
+        metrics_port: Optional[int] = None, metrics_dump: Optional[Path] = None) -> None:
+    """Collecte unique (once) ou service continu jusqu'à SIGINT / SIGTERM"""
+    if metrics_port is not None:
+        instrumentation.serve_metrics(metrics_port)
+    if metrics_dump is not None:
+        instrumentation.start_json_dump(metrics_dump, INSTRUMENTATION_CONFIG['dump_interval'])
+    collector = SpeedrunCollector(output_dir=str(data_dir))
+    if once:
+        CollectionEngine(collector, max_concurrency=workers).run(list(GAMES.values()))
+        publish_snapshot(data_dir)
+    else:
+        daemon = CollectionDaemon(collector, list(GAMES.values()), workers=workers)
+        daemon.install_signal_handlers()
+        daemon.serve()
+    if metrics_dump is not None:
+        instrumentation.dump_json(metrics_dump)
+
+def main():
+    from ..utils.logging_config import setup_logging
+
+    parser = argparse.ArgumentParser(description="Service de collecte planifiée")
+    parser.add_argument('--data-dir', type=Path, default=Path('data'))
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--once', action='store_true',
+                        help="Une seule collecte de tous les jeux suivis, puis publication")
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help="Expose /metrics (Prometheus) et /metrics.json sur ce port")
+    parser.add_argument('--metrics-dump', type=Path, default=None,
+                        help="Écrit l'instantané JSON des mesures dans ce fichier")
+    args = parser.parse_args()
+
+    setup_logging()
+    run(args.data_dir, args.workers, args.once, args.metrics_port, args.metrics_dump)
+
+if __name__ == '__main__':
+    main()
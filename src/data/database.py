@@ -0,0 +1,354 @@
+"""
+Base analytique embarquée des runs collectées (SQLite, ou DuckDB si installé)
+
+Tables runs, games, categories, platforms et players, alimentées par le
+collecteur au fil de la synchronisation ; filtres et agrégats sont exécutés
+par le moteur SQL et seuls leurs résultats sont matérialisés en DataFrame.
+Une base jamais chargée (ou créée avant ce chargement) est remplie depuis
+le stockage à sa première ouverture (get_database), avant tout ajout.
+
+Usage:
+    python -m src.data.database [--data-dir data] build              (re)charge la base depuis le stockage
+    python -m src.data.database [--data-dir data] query "SELECT ..."  exécute une requête
+    python -m src.data.database [--data-dir data] metrics [--game ID] métriques par catégorie en SQL
+"""
+import argparse
+import logging
+import math
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+import pandas as pd
+from config.settings import DATABASE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    game_id TEXT PRIMARY KEY,
+    name TEXT,
+    abbreviation TEXT
+);
+CREATE TABLE IF NOT EXISTS categories (
+    category_id TEXT PRIMARY KEY,
+    game_id TEXT,
+    name TEXT
+);
+CREATE TABLE IF NOT EXISTS platforms (
+    platform_id TEXT PRIMARY KEY,
+    name TEXT
+);
+CREATE TABLE IF NOT EXISTS players (
+    player_id TEXT PRIMARY KEY,
+    name TEXT
+);
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    game_id TEXT NOT NULL,
+    category_id TEXT NOT NULL,
+    date TEXT,
+    time_seconds DOUBLE,
+    player TEXT,
+    verified BOOLEAN,
+    platform TEXT,
+    emulator BOOLEAN
+);
+CREATE INDEX IF NOT EXISTS idx_runs_category_time ON runs(game_id, category_id, time_seconds);
+CREATE INDEX IF NOT EXISTS idx_runs_date ON runs(date);
+CREATE INDEX IF NOT EXISTS idx_runs_player ON runs(player);
+CREATE INDEX IF NOT EXISTS idx_categories_game ON categories(game_id);
+CREATE TABLE IF NOT EXISTS info (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+RUN_FIELDS = ['run_id', 'game_id', 'category_id', 'date', 'time_seconds', 'player', 'verified',
+              'platform', 'emulator']
+
+def _quantile_sql(q: float) -> str:
+    """
+    Quantile q par catégorie (interpolation linéaire, comme pandas) sur une table
+    classée (colonnes t, rn à partir de 0 et n par catégorie)
+    """
+    position = f"(n - 1) * {q}"
+    lower = f"CAST(FLOOR({position}) AS INTEGER)"
+    upper = f"{lower} + CASE WHEN {position} > {lower} THEN 1 ELSE 0 END"
+    return (
+        f"MAX(CASE WHEN rn = {lower} THEN t END) + "
+        f"(MAX(CASE WHEN rn = {upper} THEN t END) "
+        f"- MAX(CASE WHEN rn = {lower} THEN t END)) * ({position} - {lower})"
+    )
+
+def _metrics_sql(where: str, clean: bool) -> str:
+    """
+    Requête des métriques de calculate_metrics, par catégorie
+
+    Avec clean, les runs hors des bornes IQR de leur catégorie (clean_data)
+    sont écartées avant le calcul.
+    """
+    ranked = """
+        SELECT game_id, category_id, time_seconds AS t, player, emulator, date,
+               ROW_NUMBER() OVER (PARTITION BY game_id, category_id ORDER BY time_seconds) - 1 AS rn,
+               COUNT(*) OVER (PARTITION BY game_id, category_id) AS n,
+               AVG(time_seconds) OVER (PARTITION BY game_id, category_id) AS mean
+        FROM {source}
+    """
+    source = f"(SELECT * FROM runs WHERE time_seconds IS NOT NULL {where})"
+    steps = [f"ranked AS ({ranked.format(source=source)})"]
+    if clean:
+        steps.append(f"""bounds AS (
+            SELECT game_id, category_id,
+                   {_quantile_sql(0.25)} AS q1,
+                   {_quantile_sql(0.75)} AS q3
+            FROM ranked GROUP BY game_id, category_id
+        )""")
+        steps.append("""kept AS (
+            SELECT r.game_id, r.category_id, r.t AS time_seconds, r.player, r.emulator, r.date
+            FROM ranked r JOIN bounds b ON r.game_id = b.game_id AND r.category_id = b.category_id
+            WHERE r.t >= b.q1 - 1.5 * (b.q3 - b.q1) AND r.t <= b.q3 + 1.5 * (b.q3 - b.q1)
+        )""")
+        steps.append(f"cleaned AS ({ranked.format(source='kept')})")
+    final = 'cleaned' if clean else 'ranked'
+    steps.append(f"""stats AS (
+        SELECT game_id, category_id,
+               COUNT(*) AS total_runs,
+               COUNT(DISTINCT player) AS unique_players,
+               AVG(t) AS avg_time,
+               {_quantile_sql(0.5)} AS median_time,
+               SQRT(SUM((t - mean) * (t - mean)) / NULLIF(COUNT(*) - 1, 0)) AS std_time,
+               MIN(t) AS best_time,
+               MAX(t) AS worst_time,
+               100.0 * SUM(CASE WHEN emulator THEN 1 ELSE 0 END) / COUNT(*) AS emulator_percentage,
+               1.0 * COUNT(date) / NULLIF(COUNT(DISTINCT SUBSTR(date, 1, 7)), 0) AS runs_per_month
+        FROM {final} GROUP BY game_id, category_id
+    )""")
+    return "WITH " + ",\n".join(steps) + """
+        SELECT game_id, category_id, total_runs, unique_players, avg_time, median_time, std_time,
+               best_time, emulator_percentage, runs_per_month,
+               (std_time / NULLIF(worst_time - best_time, 0) * 0.6
+                + (worst_time - best_time) / median_time * 0.4) * 100 AS difficulty_score
+        FROM stats ORDER BY game_id, category_id
+    """
+
+class RunDatabase:
+    """
+    Base SQL des runs et des métadonnées
+
+    Args:
+        path: Fichier de la base (':memory:' pour une base temporaire)
+        engine: 'sqlite' (bibliothèque standard) ou 'duckdb' (dépendance optionnelle)
+    """
+    def __init__(self, path: str = ':memory:', engine: Optional[str] = None):
+        self.engine = engine or DATABASE_CONFIG['engine']
+        if path != ':memory:':
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        if self.engine == 'duckdb':
+            try:
+                import duckdb
+            except ImportError as e:
+                raise ImportError("Le moteur DuckDB nécessite duckdb (pip install duckdb)") from e
+            self._conn = duckdb.connect(path)
+            for statement in filter(str.strip, SCHEMA.split(';')):
+                self._conn.execute(statement)
+        elif self.engine == 'sqlite':
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            try:
+                self._conn.execute("SELECT SQRT(4), FLOOR(2.5)")
+            except sqlite3.OperationalError:
+                # SQLite compilé sans les fonctions mathématiques
+                self._conn.create_function('SQRT', 1, lambda x: None if x is None else math.sqrt(x),
+                                           deterministic=True)
+                self._conn.create_function('FLOOR', 1, lambda x: None if x is None else math.floor(x),
+                                           deterministic=True)
+            if path != ':memory:':
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+        else:
+            raise ValueError(f"Moteur SQL inconnu: {self.engine}")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _commit(self) -> None:
+        # DuckDB valide chaque instruction hors transaction explicite : commit() y échouerait
+        if self.engine == 'sqlite':
+            self._conn.commit()
+
+    def _executemany(self, sql: str, rows: List[Tuple]) -> None:
+        with self._lock:
+            self._conn.executemany(sql, rows)
+            self._commit()
+
+    # Alimentation
+
+    def insert_runs(self, df: pd.DataFrame, game_id: str, category_id: str, replace: bool = False) -> int:
+        """Ajoute des runs (schéma de stockage) ; les run_id déjà présents sont ignorés, ou remplacés si replace"""
+        if df.empty:
+            return 0
+        dates = pd.to_datetime(df['date'], errors='coerce')
+        columns = {
+            'run_id': df['run_id'].astype(str),
+            'game_id': game_id,
+            'category_id': category_id,
+            'date': dates.dt.strftime('%Y-%m-%d').astype(object).where(dates.notna(), None),
+            'time_seconds': df['time_seconds'].astype('float64').astype(object).where(df['time_seconds'].notna(), None),
+            'player': df['player'].astype(object).where(df['player'].notna(), None),
+            'verified': df['verified'].fillna(False).astype(bool),
+            'platform': df['platform'].astype(object).where(df['platform'].notna(), None),
+            'emulator': df['emulator'].fillna(False).astype(bool)
+        }
+        rows = list(pd.DataFrame(columns, index=df.index)[RUN_FIELDS].itertuples(index=False, name=None))
+        placeholders = ', '.join('?' for _ in RUN_FIELDS)
+        verb = 'INSERT OR REPLACE' if replace else 'INSERT OR IGNORE'
+        self._executemany(f"{verb} INTO runs ({', '.join(RUN_FIELDS)}) VALUES ({placeholders})", rows)
+        return len(rows)
+
+    def replace_partition(self, df: pd.DataFrame, game_id: str, category_id: str) -> int:
+        """Remplace toutes les runs d'une catégorie"""
+        with self._lock:
+            self._conn.execute("DELETE FROM runs WHERE game_id = ? AND category_id = ?", (game_id, category_id))
+            self._commit()
+        return self.insert_runs(df, game_id, category_id)
+
+    def upsert_metadata(self, snapshot: Dict[str, Dict]) -> None:
+        """Recopie les jeux, catégories, plateformes et joueurs de l'index de métadonnées"""
+        tables = {
+            'games': [(game_id, game.get('name'), game.get('abbreviation'))
+                      for game_id, game in snapshot.get('games', {}).items()],
+            'categories': [(category_id, category.get('game_id'), category.get('name'))
+                           for category_id, category in snapshot.get('categories', {}).items()],
+            'platforms': list(snapshot.get('platforms', {}).items()),
+            'players': list(snapshot.get('players', {}).items())
+        }
+        for table, rows in tables.items():
+            if rows:
+                placeholders = ', '.join('?' for _ in rows[0])
+                self._executemany(f"INSERT OR REPLACE INTO {table} VALUES ({placeholders})", rows)
+
+    def load_from_storage(self, storage, metadata=None) -> int:
+        """Recharge la base depuis un backend de stockage (et l'index de métadonnées)"""
+        total = 0
+        with self._lock:
+            # Runs de partitions disparues du stockage comprises
+            self._conn.execute("DELETE FROM runs")
+            self._commit()
+        for game_id, category_id in storage.list_partitions():
+            total += self.insert_runs(storage.read(game_id, category_id), game_id, category_id)
+        if metadata is not None:
+            self.upsert_metadata(metadata.snapshot())
+        self._executemany("INSERT OR REPLACE INTO info VALUES (?, ?)", [('loaded_from_storage', str(total))])
+        logger.info(f"Base SQL chargée: {total} runs ({self.engine})")
+        return total
+
+    def is_loaded(self) -> bool:
+        """Vrai si la base a été chargée depuis le stockage au moins une fois"""
+        return not self.query("SELECT value FROM info WHERE key = 'loaded_from_storage'").empty
+
+    # Requêtes
+
+    def query(self, sql: str, params: Sequence = ()) -> pd.DataFrame:
+        """Exécute une requête et renvoie son résultat (seul le résultat est matérialisé)"""
+        with self._lock:
+            cursor = self._conn.execute(sql, list(params))
+            columns = [description[0] for description in cursor.description]
+            rows = cursor.fetchall()
+        return pd.DataFrame(rows, columns=columns)
+
+    def category_metrics(self, game_id: Optional[str] = None, category_id: Optional[str] = None,
+                         clean: bool = True) -> pd.DataFrame:
+        """
+        Métriques de calculate_metrics (hors distribution des plateformes) calculées en SQL
+
+        Args:
+            game_id, category_id: Filtres optionnels, appliqués avant tout calcul
+            clean: Écarte les valeurs aberrantes (bornes IQR de clean_data)
+        """
+        where, params = self._filters(game_id, category_id)
+        return self.query(_metrics_sql(where, clean), params)
+
+    def platform_distribution(self, game_id: Optional[str] = None,
+                              category_id: Optional[str] = None) -> pd.DataFrame:
+        where, params = self._filters(game_id, category_id)
+        return self.query(f"""
+            SELECT game_id, category_id, platform, COUNT(*) AS runs
+            FROM runs WHERE platform IS NOT NULL {where}
+            GROUP BY game_id, category_id, platform ORDER BY game_id, category_id, runs DESC
+        """, params)
+
+    def leaderboard(self, game_id: str, category_id: str, limit: int = 10) -> pd.DataFrame:
+        """Meilleur temps de chaque joueur d'une catégorie (noms des joueurs si connus)"""
+        return self.query("""
+            SELECT r.player, COALESCE(p.name, r.player) AS player_name, MIN(r.time_seconds) AS time_seconds
+            FROM runs r LEFT JOIN players p ON p.player_id = r.player
+            WHERE r.game_id = ? AND r.category_id = ? AND r.verified AND r.time_seconds IS NOT NULL
+            GROUP BY r.player, p.name ORDER BY time_seconds LIMIT ?
+        """, (game_id, category_id, limit))
+
+    @staticmethod
+    def _filters(game_id: Optional[str], category_id: Optional[str]) -> Tuple[str, List[str]]:
+        clauses, params = [], []
+        if game_id:
+            clauses.append("AND game_id = ?")
+            params.append(game_id)
+        if category_id:
+            clauses.append("AND category_id = ?")
+            params.append(category_id)
+        return ' '.join(clauses), params
+
+_databases: Dict[Path, RunDatabase] = {}
+_databases_lock = threading.Lock()
+
+def _database_path(data_dir: Path) -> Path:
+    return (Path(data_dir) / DATABASE_CONFIG['file']).resolve()
+
+def get_database(data_dir: Path = Path('data')) -> RunDatabase:
+    """Base partagée par dossier de données, chargée depuis le stockage à sa première ouverture"""
+    from .metadata import get_metadata_index
+    from .storage import get_storage
+
+    path = _database_path(data_dir)
+    with _databases_lock:
+        if path not in _databases:
+            database = RunDatabase(str(path))
+            if not database.is_loaded():
+                database.load_from_storage(get_storage(data_dir), get_metadata_index(data_dir))
+            _databases[path] = database
+        return _databases[path]
+
+def main():
+    from ..utils.logging_config import setup_logging
+    from .metadata import get_metadata_index
+    from .storage import get_storage
+
+    parser = argparse.ArgumentParser(description="Base SQL des runs collectées")
+    parser.add_argument('--data-dir', type=Path, default=Path('data'))
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('build', help="Recharge la base depuis le stockage")
+    query_parser = subparsers.add_parser('query', help="Exécute une requête SQL")
+    query_parser.add_argument('sql')
+    metrics_parser = subparsers.add_parser('metrics', help="Métriques par catégorie")
+    metrics_parser.add_argument('--game', default=None)
+    metrics_parser.add_argument('--category', default=None)
+    metrics_parser.add_argument('--no-clean', action='store_true', help="N'applique pas le filtre IQR")
+    args = parser.parse_args()
+
+    setup_logging()
+    if args.command == 'build':
+        # Ouverture directe : get_database chargerait déjà le stockage à la première ouverture
+        database = RunDatabase(str(_database_path(args.data_dir)))
+        database.load_from_storage(get_storage(args.data_dir), get_metadata_index(args.data_dir))
+        database.close()
+        return
+    database = get_database(args.data_dir)
+    if args.command == 'query':
+        print(database.query(args.sql).to_string(index=False))
+    elif args.command == 'metrics':
+        print(database.category_metrics(args.game, args.category, clean=not args.no_clean).to_string(index=False))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
+from .collector import SpeedrunCollector
+from config.api_config import COLLECTION_CONFIG
+from config.settings import GAME_NAMES
+
+logger = logging.getLogger(__name__)
+
+class CollectionEngine:
+    """
+    Collecte concurrente de plusieurs jeux et catégories
+
+    Les requêtes sont réparties sur un pool de threads borné ; le débit
+    global reste gouverné par le limiteur partagé de SpeedrunAPI.
+    """
+    def __init__(self, collector: SpeedrunCollector, max_concurrency: Optional[int] = None,
+                 max_runs: Optional[int] = None):
+        self.collector = collector
+        self.max_concurrency = max_concurrency or COLLECTION_CONFIG['max_concurrency']
+        self.max_runs = max_runs if max_runs is not None else COLLECTION_CONFIG['max_runs']
+
+    def _fetch_categories(self, game_id: str) -> Tuple[str, List[Dict]]:
+        return game_id, self.collector.api.get_game_categories(game_id)
+
+    def _collect_category(self, game_id: str, category_id: str) -> int:
+        return self.collector.sync_category(game_id, category_id, max_runs=self.max_runs)
+
+    def run(self, game_ids: List[str]) -> Dict:
+        """
+        Collecte toutes les catégories des jeux donnés
+
+        Returns:
+            Rapport d'exécution (requêtes, débit, durée, erreurs)
+        """
+        start = time.perf_counter()
+        requests_before = self.collector.api.request_count
+        report = {'categories': 0, 'runs': 0, 'errors': 0}
+
+        # Catégories et plateformes connues avant l'ingestion (noms résolus à la conversion)
+        self.collector.metadata.ensure_fresh(game_ids)
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+            category_futures = [pool.submit(self._fetch_categories, game_id) for game_id in game_ids]
+            run_futures = {}
+            for future in as_completed(category_futures):
+                try:
+                    game_id, categories = future.result()
+                except Exception as e:
+                    logger.error(f"Erreur lors de la récupération des catégories: {e}")
+                    report['errors'] += 1
+                    continue
+                for category in categories:
+                    run_futures[pool.submit(self._collect_category, game_id, category['id'])] = \
+                        (game_id, category['id'])
+
+            for future in as_completed(run_futures):
+                game_id, category_id = run_futures[future]
+                try:
+                    report['runs'] += future.result()
+                    report['categories'] += 1
+                except Exception as e:
+                    logger.error(f"Erreur lors de la collecte pour la catégorie {category_id} "
+                                 f"({GAME_NAMES.get(game_id, game_id)}): {e}")
+                    report['errors'] += 1
+
+        try:
+            self.collector.sync_database()
+        except Exception as e:
+            logger.error(f"Erreur lors de la mise à jour de la base SQL: {e}")
+
+        wall_time = time.perf_counter() - start
+        requests_made = self.collector.api.request_count - requests_before
+        report.update({
+            'requests': requests_made,
+            'wall_time': wall_time,
+            'requests_per_sec': requests_made / wall_time if wall_time > 0 else 0.0,
+            'max_concurrency': self.max_concurrency
+        })
+        logger.info(
+            f"Collecte terminée: {report['categories']} catégories, {report['runs']} runs, "
+            f"{requests_made} requêtes en {wall_time:.1f}s ({report['requests_per_sec']:.2f} req/s)"
+        )
+        return report
@@ -0,0 +1,130 @@
+import logging
+from operator import itemgetter
+from typing import Dict, List, Tuple
+import numpy as np
+import pandas as pd
+from ..utils import instrumentation
+from ..utils.platform_mapping import get_platform_name
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_FIELDS = ('id', 'category', 'date', 'times', 'players', 'status', 'system')
+
+_REQUIRED = frozenset(REQUIRED_FIELDS)
+_get_fields = itemgetter(*REQUIRED_FIELDS)
+_EMPTY: Dict = {}
+
+def first_player(players) -> object:
+    """ID du premier joueur, 'unknown' sans joueur, None si illisible (invité sans ID)"""
+    if isinstance(players, dict):
+        # Joueurs embarqués (embed=players) : {'data': [...]}
+        players = players.get('data')
+    if not players:
+        return 'unknown'
+    return players[0].get('id') if isinstance(players[0], dict) else None
+
+def _parse_dates(dates: np.ndarray) -> np.ndarray:
+    """Dates ISO de l'API (YYYY-MM-DD ou null) ; repli sur pandas si le format diffère"""
+    try:
+        return np.array([d or 'NaT' for d in dates], dtype='datetime64[D]').astype('datetime64[s]')
+    except ValueError:
+        return pd.to_datetime(dates, errors='coerce').to_numpy()
+
+def runs_to_columns(runs: List[Dict]) -> Tuple[Dict[str, np.ndarray], Dict[str, int]]:
+    """
+    Convertit un lot de runs brutes de l'API en colonnes typées (tableaux numpy)
+
+    Les contrôles de validate_run_data et process_run_data sont appliqués sous
+    forme de masques booléens : seuls un temps et un ID de joueur sont exigés
+    (une run sans plateforme est gardée, plateforme nulle). Les runs rejetées
+    sont comptées par motif au lieu d'être journalisées une à une.
+
+    Args:
+        runs: Liste de runs au format de l'API speedrun.com
+
+    Returns:
+        Colonnes des runs valides (schéma de stockage) et nombre de rejets par motif
+    """
+    complete = [run for run in runs if run.keys() >= _REQUIRED]
+    rejected = {'missing_fields': len(runs) - len(complete)}
+    if not complete:
+        instrumentation.increment('speedrun_runs_rejected_total', rejected['missing_fields'], reason='missing_fields')
+        return {}, {reason: count for reason, count in rejected.items() if count}
+
+    count = len(complete)
+    ids, categories, dates, times, players, statuses, systems = zip(*map(_get_fields, complete))
+    systems = [system or _EMPTY for system in systems]
+
+    time_values = np.fromiter(((t or _EMPTY).get('primary_t') or np.nan for t in times),
+                              dtype='float64', count=count)
+    player_ids = [first_player(p) for p in players]
+    platform_ids = [system.get('platform') for system in systems]
+
+    has_time = ~np.isnan(time_values)
+    valid = has_time & np.fromiter((p is not None for p in player_ids), dtype=bool, count=count)
+    rejected.update({
+        'missing_time': int((~has_time).sum()),
+        'invalid_player': int((has_time & ~valid).sum())
+    })
+    rejected = {reason: value for reason, value in rejected.items() if value}
+    for reason, value in rejected.items():
+        instrumentation.increment('speedrun_runs_rejected_total', value, reason=reason)
+
+    index = np.flatnonzero(valid)
+    instrumentation.increment('speedrun_runs_ingested_total', len(index))
+    if not len(index):
+        return {}, rejected
+
+    def take(values) -> np.ndarray:
+        return np.array(values, dtype=object)[index]
+
+    # Correspondance des plateformes sur les seules modalités distinctes du lot ;
+    # le code -1 (plateforme absente) désigne le None ajouté en fin de tableau
+    platform_codes, platform_uniques = pd.factorize(take(platform_ids))
+    platform_names = np.array([get_platform_name(p) for p in platform_uniques] + [None], dtype=object)
+
+    columns = {
+        'run_id': take(ids),
+        'category': take(categories),
+        'date': _parse_dates(take(dates)),
+        'time_seconds': time_values[index].astype('float32'),
+        'player': take(player_ids),
+        'verified': np.fromiter(((s or _EMPTY).get('status') == 'verified' for s in statuses),
+                                dtype=bool, count=count)[index],
+        'platform': platform_names[platform_codes],
+        'emulator': np.fromiter((bool(system.get('emulated')) for system in systems),
+                                dtype=bool, count=count)[index]
+    }
+    return columns, rejected
+
+def columns_to_frame(batches: List[Dict[str, np.ndarray]]) -> pd.DataFrame:
+    """Assemble des lots de colonnes en un seul DataFrame (une seule construction pandas)"""
+    batches = [batch for batch in batches if batch]
+    if not batches:
+        return pd.DataFrame()
+    if len(batches) == 1:
+        return pd.DataFrame(batches[0])
+    return pd.DataFrame({column: np.concatenate([batch[column] for batch in batches])
+                         for column in batches[0]})
+
+def runs_to_frame(runs: List[Dict]) -> Tuple[pd.DataFrame, Dict[str, int]]:
+    """Variante de runs_to_columns renvoyant directement un DataFrame"""
+    columns, rejected = runs_to_columns(runs)
+    return columns_to_frame([columns]), rejected
+
+def extract_player_names(runs: List[Dict]) -> Dict[str, str]:
+    """Noms des joueurs embarqués dans un lot de runs (embed=players)"""
+    names = {}
+    for run in runs:
+        players = run.get('players')
+        if isinstance(players, dict):
+            for player in players.get('data') or []:
+                name = (player.get('names') or _EMPTY).get('international')
+                if player.get('id') and name:
+                    names[player['id']] = name
+    return names
+
+def log_rejections(rejected: Dict[str, int], context: str) -> None:
+    """Journalise en une ligne les rejets agrégés d'un lot"""
+    if rejected:
+        logger.warning(f"{sum(rejected.values())} runs rejetées ({context}): {rejected}")
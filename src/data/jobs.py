@@ -0,0 +1,125 @@
+"""
+File de tâches persistante du service de collecte (SQLite)
+
+Une tâche est identifiée par (kind, game_id, category_id) : 'categories'
+redécouvre les catégories d'un jeu, 'runs' synchronise une catégorie.
+Chaque tâche porte sa prochaine échéance et sa priorité ; la file survit
+aux redémarrages et une tâche interrompue en cours d'exécution est remise
+en attente au démarrage suivant.
+"""
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    kind TEXT NOT NULL,
+    game_id TEXT NOT NULL,
+    category_id TEXT NOT NULL DEFAULT '',
+    next_run_at REAL NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_run_at REAL,
+    last_result INTEGER,
+    last_error TEXT,
+    PRIMARY KEY (kind, game_id, category_id)
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_due ON jobs (status, next_run_at);
+"""
+
+class Job(NamedTuple):
+    kind: str
+    game_id: str
+    category_id: str = ''
+    priority: int = 0
+    attempts: int = 0
+
+    @property
+    def key(self) -> tuple:
+        return (self.kind, self.game_id, self.category_id)
+
+class JobQueue:
+    """File de tâches planifiées, partagée entre les threads du service"""
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def recover(self) -> int:
+        """Remet en attente les tâches interrompues (arrêt brutal) ; renvoie leur nombre"""
+        with self._lock:
+            return self._conn.execute(
+                "UPDATE jobs SET status = 'pending', next_run_at = MIN(next_run_at, ?) WHERE status = 'running'",
+                (time.time(),)
+            ).rowcount
+
+    def schedule(self, job: Job, at: Optional[float] = None) -> bool:
+        """Ajoute une tâche si elle n'existe pas encore ; renvoie True si elle a été créée"""
+        with self._lock:
+            return self._conn.execute(
+                "INSERT OR IGNORE INTO jobs (kind, game_id, category_id, next_run_at, priority) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (*job.key, time.time() if at is None else at, job.priority)
+            ).rowcount > 0
+
+    def claim(self, now: Optional[float] = None) -> Optional[Job]:
+        """Réserve la tâche échue la plus prioritaire (puis la plus ancienne)"""
+        now = time.time() if now is None else now
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT kind, game_id, category_id, priority, attempts FROM jobs "
+                "WHERE status = 'pending' AND next_run_at <= ? "
+                "ORDER BY priority DESC, next_run_at LIMIT 1",
+                (now,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE jobs SET status = 'running', last_run_at = ? "
+                "WHERE kind = ? AND game_id = ? AND category_id = ?",
+                (now, *row[:3])
+            )
+        return Job(*row)
+
+    def complete(self, job: Job, next_run_at: float, priority: int = 0,
+                 result: Optional[int] = None) -> None:
+        """Termine une tâche et la replanifie"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'pending', next_run_at = ?, priority = ?, attempts = 0, "
+                "last_result = ?, last_error = NULL WHERE kind = ? AND game_id = ? AND category_id = ?",
+                (next_run_at, priority, result, *job.key)
+            )
+
+    def fail(self, job: Job, error: str, retry_at: float) -> None:
+        """Enregistre l'échec d'une tâche et la replanifie pour une nouvelle tentative"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'pending', next_run_at = ?, attempts = attempts + 1, "
+                "last_error = ? WHERE kind = ? AND game_id = ? AND category_id = ?",
+                (retry_at, error[:500], *job.key)
+            )
+
+    def next_due_in(self, now: Optional[float] = None) -> Optional[float]:
+        """Secondes avant la prochaine échéance (0 si une tâche est échue, None si la file est vide)"""
+        now = time.time() if now is None else now
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MIN(next_run_at) FROM jobs WHERE status = 'pending'"
+            ).fetchone()
+        return None if row[0] is None else max(row[0] - now, 0.0)
+
+    def stats(self) -> Dict[str, int]:
+        """Nombre de tâches par statut"""
+        with self._lock:
+            return dict(self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
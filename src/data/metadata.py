@@ -0,0 +1,170 @@
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+from config.settings import GAME_NAMES, METADATA_CONFIG
+from ..api.speedrun_api import SpeedrunAPI
+from ..utils.platform_mapping import register_platform_names
+
+logger = logging.getLogger(__name__)
+
+class MetadataIndex:
+    """
+    Index local des jeux, catégories, plateformes et joueurs
+
+    Alimenté en masse (jeux avec catégories et plateformes embarquées, liste
+    complète des plateformes, noms des joueurs embarqués dans les runs) et
+    stocké à côté des données ; toutes les recherches sont en O(1).
+    """
+    def __init__(self, path: Path, api: Optional[SpeedrunAPI] = None, ttl: Optional[float] = None):
+        self.path = Path(path)
+        self.ttl = ttl if ttl is not None else METADATA_CONFIG['ttl']
+        self._api = api
+        self._lock = threading.RLock()
+        self._refresh_thread: Optional[threading.Thread] = None
+        # Jeux dont la dernière indexation a échoué (pas de nouvel essai avant retry_after)
+        self._failed: Dict[str, float] = {}
+        self._data = self._load()
+        register_platform_names(self._data['platforms'])
+
+    @property
+    def api(self) -> SpeedrunAPI:
+        if self._api is None:
+            self._api = SpeedrunAPI()
+        return self._api
+
+    @api.setter
+    def api(self, api: SpeedrunAPI) -> None:
+        self._api = api
+
+    def _load(self) -> Dict:
+        data = {'games': {}, 'categories': {}, 'platforms': {}, 'players': {}, 'refreshed_at': 0}
+        if self.path.exists():
+            try:
+                data.update(json.loads(self.path.read_text(encoding='utf-8')))
+            except (OSError, ValueError) as e:
+                logger.error(f"Index de métadonnées illisible ({self.path}): {e}")
+        return data
+
+    def save(self) -> None:
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix('.tmp')
+            tmp_path.write_text(json.dumps(self._data, ensure_ascii=False, sort_keys=True), encoding='utf-8')
+            os.replace(tmp_path, self.path)
+
+    # Recherches
+
+    def game_name(self, game_id: str) -> str:
+        game = self._data['games'].get(game_id)
+        return game['name'] if game else GAME_NAMES.get(game_id, game_id)
+
+    def category_name(self, category_id: str) -> Optional[str]:
+        category = self._data['categories'].get(category_id)
+        return category['name'] if category else None
+
+    def platform_name(self, platform_id: str) -> Optional[str]:
+        return self._data['platforms'].get(platform_id)
+
+    def player_name(self, player_id: str) -> Optional[str]:
+        return self._data['players'].get(player_id)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Copie des tables de l'index (jeux, catégories, plateformes, joueurs)"""
+        with self._lock:
+            return {table: dict(self._data[table]) for table in ('games', 'categories', 'platforms', 'players')}
+
+    def has_game(self, game_id: str) -> bool:
+        return game_id in self._data['games']
+
+    def needs_fetch(self, game_id: str) -> bool:
+        """Jeu absent de l'index et dont l'indexation n'a pas échoué récemment"""
+        failed_at = self._failed.get(game_id)
+        recently_failed = failed_at is not None and time.time() - failed_at < METADATA_CONFIG['retry_after']
+        return not self.has_game(game_id) and not recently_failed
+
+    # Alimentation
+
+    def update_players(self, names: Dict[str, str]) -> None:
+        """Ajoute des noms de joueurs (sauvegardés au prochain save)"""
+        if names:
+            with self._lock:
+                self._data['players'].update(names)
+
+    def _index_game(self, game: Dict) -> None:
+        game_id = game['id']
+        self._data['games'][game_id] = {
+            'name': (game.get('names') or {}).get('international') or GAME_NAMES.get(game_id, game_id),
+            'abbreviation': game.get('abbreviation')
+        }
+        for category in (game.get('categories') or {}).get('data', []):
+            self._data['categories'][category['id']] = {'name': category['name'], 'game_id': game_id}
+        platforms = game.get('platforms')
+        if isinstance(platforms, dict):
+            for platform in platforms.get('data', []):
+                self._data['platforms'][platform['id']] = platform['name']
+
+    def refresh(self, game_ids: Iterable[str], include_platforms: bool = True) -> None:
+        """Recharge en masse les jeux (catégories et plateformes embarquées) et les plateformes"""
+        games = []
+        for game_id in game_ids:
+            try:
+                games.append(self.api.get_game(game_id, embed='categories,platforms'))
+            except Exception as e:
+                self._failed[game_id] = time.time()
+                logger.error(f"Erreur lors de l'indexation du jeu {game_id}: {e}")
+        platforms = []
+        if include_platforms:
+            try:
+                platforms = self.api.get_platforms()
+            except Exception as e:
+                logger.error(f"Erreur lors de l'indexation des plateformes: {e}")
+
+        with self._lock:
+            for game in games:
+                self._index_game(game)
+            for platform in platforms:
+                self._data['platforms'][platform['id']] = platform['name']
+            self._data['refreshed_at'] = time.time()
+            register_platform_names(self._data['platforms'])
+            self.save()
+
+    def is_stale(self) -> bool:
+        return time.time() - self._data['refreshed_at'] > self.ttl
+
+    def ensure_fresh(self, game_ids: Iterable[str], background: bool = True) -> None:
+        """
+        Rafraîchit l'index si son TTL est dépassé
+
+        Le rafraîchissement est bloquant si un jeu demandé est absent de
+        l'index, en arrière-plan sinon (les anciennes valeurs restent servies).
+        """
+        game_ids = list(game_ids)
+        missing = [game_id for game_id in game_ids if self.needs_fetch(game_id)]
+        if missing or not background:
+            self.refresh(game_ids)
+        elif self.is_stale():
+            self.refresh_in_background(game_ids)
+
+    def refresh_in_background(self, game_ids: Iterable[str]) -> None:
+        with self._lock:
+            if self._refresh_thread and self._refresh_thread.is_alive():
+                return
+            self._refresh_thread = threading.Thread(
+                target=self.refresh, args=(list(game_ids),), name='metadata-refresh', daemon=True
+            )
+            self._refresh_thread.start()
+
+_indexes: Dict[Path, MetadataIndex] = {}
+_indexes_lock = threading.Lock()
+
+def get_metadata_index(data_dir: Path = Path('data')) -> MetadataIndex:
+    """Index partagé par dossier de données"""
+    path = (Path(data_dir) / METADATA_CONFIG['file']).resolve()
+    with _indexes_lock:
+        if path not in _indexes:
+            _indexes[path] = MetadataIndex(path)
+        return _indexes[path]
@@ -0,0 +1,515 @@
+"""
+Collecte répartie sur plusieurs workers (processus ou machines)
+
+Le travail est découpé en plages de pages (jeu × catégorie × offsets)
+rangées dans une file SQLite partagée (WorkQueue). Chaque worker loue une
+plage pour lease_seconds, renouvelle son bail pendant le traitement
+(heartbeat) et écrit les runs dans son propre dossier de résultats
+(data/shards/<worker>/) ; une plage dont le bail expire (worker arrêté
+brutalement) est reprise par un autre worker.
+
+Dès que la première page d'une plage est pleine, la plage suivante de la
+catégorie entre dans la file : plusieurs workers avancent dans une même
+grande catégorie. Une plage en échec met aussi la suivante en file, sauf
+si la plage précédente n'est pas terminée (catégorie inaccessible) : une
+mauvaise plage ne coupe pas le reste de la catégorie.
+
+Les plages d'offsets sont approximatives. Les runs sont parcourues par
+date croissante, mais cette date est celle de la partie, pas celle de la
+vérification : une run vérifiée pendant la collecte avec une date ancienne
+décale les offsets suivants (une run peut alors être lue deux fois ou
+sautée), et les runs supprimées entre deux pages laissent un trou. Les
+doublons sont éliminés à la fusion ; les runs sautées sont rattrapées par
+la synchronisation incrémentale du service de collecte (ordre décroissant,
+src/data/daemon.py) si leur date tombe dans sa fenêtre de recouvrement
+(sync_overlap_days), sinon par une nouvelle collecte répartie.
+
+Le débit est borné par un seau de jetons commun (SqliteTokenBucket, dans
+le fichier de la file), une clé par machine comme la limite par IP de
+speedrun.com.
+
+Une fois la file vidée, et sans plage abandonnée (sinon retry ou
+--force), merge_shards verse les résultats dans le stockage principal
+(doublons éliminés, classements, agrégats, base SQL et points
+de reprise à jour) ; les rafraîchissements suivants passent par le
+service de collecte (src/data/daemon.py).
+
+Usage:
+    python -m src.data.sharding plan [--games ID ...] [--games-file jeux.txt]
+    python -m src.data.sharding work [--threads 4]      (sur chaque machine)
+    python -m src.data.sharding status
+    python -m src.data.sharding retry                  (relance les plages abandonnées)
+    python -m src.data.sharding merge
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import signal
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from .collector import SpeedrunCollector
+from .ingest import columns_to_frame, extract_player_names, log_rejections, runs_to_columns
+from .metadata import MetadataIndex, get_metadata_index
+from .storage import RUN_COLUMNS, apply_schema, get_storage
+from ..api.rate_limiter import SqliteTokenBucket
+from ..api.speedrun_api import SpeedrunAPI
+from ..utils import instrumentation
+from config.api_config import API_CONFIG
+from config.settings import GAMES, METADATA_CONFIG, SHARDING_CONFIG
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS work (
+    game_id TEXT NOT NULL,
+    category_id TEXT NOT NULL,
+    start_offset INTEGER NOT NULL,
+    end_offset INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    owner TEXT,
+    lease_expires_at REAL,
+    available_at REAL NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    runs INTEGER,
+    shard TEXT,
+    last_error TEXT,
+    PRIMARY KEY (game_id, category_id, start_offset)
+);
+CREATE INDEX IF NOT EXISTS idx_work_status ON work (status, start_offset);
+"""
+
+class WorkItem(NamedTuple):
+    game_id: str
+    category_id: str
+    start_offset: int
+    end_offset: int
+    attempts: int = 0
+
+    @property
+    def key(self) -> tuple:
+        return (self.game_id, self.category_id, self.start_offset)
+
+    @property
+    def following(self) -> 'WorkItem':
+        """Plage suivante de la catégorie, de même taille"""
+        return WorkItem(self.game_id, self.category_id, self.end_offset,
+                        2 * self.end_offset - self.start_offset)
+
+    def __str__(self) -> str:
+        return f"{self.game_id}_{self.category_id}[{self.start_offset}:{self.end_offset}]"
+
+def queue_path(data_dir: Path) -> Path:
+    return Path(data_dir) / SHARDING_CONFIG['queue_file']
+
+def shards_root(data_dir: Path) -> Path:
+    return Path(data_dir) / SHARDING_CONFIG['shards_dir']
+
+class WorkQueue:
+    """
+    File de plages à baux, partagée entre processus par un fichier SQLite
+
+    Chaque processus ouvre sa propre connexion ; les locations se font dans
+    des transactions BEGIN IMMEDIATE (verrou d'écriture du fichier).
+    """
+    def __init__(self, path: Path, lease_seconds: Optional[float] = None):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lease_seconds = lease_seconds or SHARDING_CONFIG['lease_seconds']
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    @staticmethod
+    def _enqueue_following(conn: sqlite3.Connection, item: WorkItem) -> None:
+        """Met en file la plage qui suit une plage en échec, si la plage précédente est terminée"""
+        previous = conn.execute(
+            "SELECT status FROM work WHERE game_id = ? AND category_id = ? AND end_offset = ?",
+            (item.game_id, item.category_id, item.start_offset)
+        ).fetchone()
+        # Deux plages consécutives en échec : catégorie inaccessible, inutile d'avancer davantage
+        if item.start_offset == 0 or (previous is not None and previous[0] == 'done'):
+            conn.execute(
+                "INSERT OR IGNORE INTO work (game_id, category_id, start_offset, end_offset) VALUES (?, ?, ?, ?)",
+                (*item.following.key, item.following.end_offset)
+            )
+
+    def enqueue(self, item: WorkItem) -> bool:
+        """Ajoute une plage si elle n'existe pas encore ; renvoie True si elle a été créée"""
+        with self._lock:
+            return self._conn.execute(
+                "INSERT OR IGNORE INTO work (game_id, category_id, start_offset, end_offset) VALUES (?, ?, ?, ?)",
+                (*item.key, item.end_offset)
+            ).rowcount > 0
+
+    def lease(self, owner: str, now: Optional[float] = None) -> Optional[WorkItem]:
+        """Loue la plage disponible de plus petit offset (ou dont le bail a expiré)"""
+        now = time.time() if now is None else now
+        with self._transaction() as conn:
+            while True:
+                row = conn.execute(
+                    "SELECT game_id, category_id, start_offset, end_offset, attempts, status, owner FROM work "
+                    "WHERE (status = 'pending' AND available_at <= ?) "
+                    "OR (status = 'leased' AND lease_expires_at < ?) "
+                    "ORDER BY start_offset, attempts LIMIT 1",
+                    (now, now)
+                ).fetchone()
+                if row is None:
+                    return None
+                item = WorkItem(*row[:5])
+                if row[5] == 'leased':
+                    # Worker arrêté sans rendre sa plage : la reprise compte comme un essai
+                    logger.warning(f"Bail expiré de {row[6]} sur {item}, plage reprise par {owner}")
+                    item = item._replace(attempts=item.attempts + 1)
+                    if item.attempts >= SHARDING_CONFIG['max_attempts']:
+                        conn.execute("UPDATE work SET status = 'failed', owner = NULL, attempts = ?, "
+                                     "last_error = 'bail expiré' WHERE game_id = ? AND category_id = ? "
+                                     "AND start_offset = ?", (item.attempts, *item.key))
+                        self._enqueue_following(conn, item)
+                        continue
+                conn.execute(
+                    "UPDATE work SET status = 'leased', owner = ?, lease_expires_at = ?, attempts = ? "
+                    "WHERE game_id = ? AND category_id = ? AND start_offset = ?",
+                    (owner, now + self.lease_seconds, item.attempts, *item.key)
+                )
+                return item
+
+    def heartbeat(self, item: WorkItem, owner: str) -> bool:
+        """Prolonge le bail ; False si la plage a été reprise par un autre worker"""
+        with self._lock:
+            return self._conn.execute(
+                "UPDATE work SET lease_expires_at = ? WHERE game_id = ? AND category_id = ? "
+                "AND start_offset = ? AND status = 'leased' AND owner = ?",
+                (time.time() + self.lease_seconds, *item.key, owner)
+            ).rowcount > 0
+
+    def complete(self, item: WorkItem, owner: str, runs: int, shard: str) -> bool:
+        """Termine une plage louée ; False si le bail avait été perdu"""
+        with self._lock:
+            return self._conn.execute(
+                "UPDATE work SET status = 'done', owner = NULL, runs = ?, shard = ?, last_error = NULL "
+                "WHERE game_id = ? AND category_id = ? AND start_offset = ? AND status = 'leased' AND owner = ?",
+                (runs, shard, *item.key, owner)
+            ).rowcount > 0
+
+    def fail(self, item: WorkItem, owner: str, error: str) -> bool:
+        """
+        Rend une plage en échec : nouvel essai différé, abandon après max_attempts
+
+        La plage suivante entre dans la file sans attendre la réussite de celle-ci.
+
+        Returns:
+            False si le bail avait été perdu
+        """
+        attempts = item.attempts + 1
+        status = 'failed' if attempts >= SHARDING_CONFIG['max_attempts'] else 'pending'
+        with self._transaction() as conn:
+            updated = conn.execute(
+                "UPDATE work SET status = ?, owner = NULL, attempts = ?, available_at = ?, last_error = ? "
+                "WHERE game_id = ? AND category_id = ? AND start_offset = ? AND status = 'leased' AND owner = ?",
+                (status, attempts, time.time() + SHARDING_CONFIG['retry_after'] * 2 ** item.attempts,
+                 error[:500], *item.key, owner)
+            ).rowcount > 0
+            if updated:
+                self._enqueue_following(conn, item)
+        if status == 'failed' and updated:
+            logger.error(f"Plage {item} abandonnée après {attempts} essais: {error}")
+        return updated
+
+    def failed(self) -> List[Tuple[WorkItem, str]]:
+        """Plages abandonnées après max_attempts, avec leur dernière erreur"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT game_id, category_id, start_offset, end_offset, attempts, last_error FROM work "
+                "WHERE status = 'failed' ORDER BY game_id, category_id, start_offset"
+            ).fetchall()
+        return [(WorkItem(*row[:5]), row[5]) for row in rows]
+
+    def retry_failed(self) -> int:
+        """Remet en file les plages abandonnées (essais remis à zéro)"""
+        with self._lock:
+            return self._conn.execute(
+                "UPDATE work SET status = 'pending', attempts = 0, available_at = 0 WHERE status = 'failed'"
+            ).rowcount
+
+    def stats(self) -> Dict[str, int]:
+        """Nombre de plages par statut et runs collectées"""
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT status, COUNT(*) FROM work GROUP BY status").fetchall())
+            runs = self._conn.execute("SELECT COALESCE(SUM(runs), 0) FROM work").fetchone()[0]
+        return {**counts, 'runs': runs}
+
+    def is_drained(self) -> bool:
+        """Plus aucune plage en attente ni louée"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM work WHERE status IN ('pending', 'leased')"
+            ).fetchone()[0] == 0
+
+def plan(queue: WorkQueue, data_dir: Path, game_ids: Iterable[str], pages_per_job: Optional[int] = None) -> int:
+    """Indexe les jeux (catégories embarquées) et met en file la première plage de chaque catégorie"""
+    game_ids = set(game_ids)
+    span = (pages_per_job or SHARDING_CONFIG['pages_per_job']) * API_CONFIG['runs_per_page']
+    index = get_metadata_index(data_dir)
+    index.refresh(sorted(game_ids))
+    index.save()
+    created = sum(queue.enqueue(WorkItem(info['game_id'], category_id, 0, span))
+                  for category_id, info in index.snapshot()['categories'].items() if info['game_id'] in game_ids)
+    logger.info(f"{created} plages planifiées pour {len(game_ids)} jeux")
+    return created
+
+class ShardWorker:
+    """
+    Traite des plages louées et écrit leurs runs dans son propre dossier de résultats
+
+    Args:
+        queue: File partagée
+        data_dir: Dossier de données (résultats dans data_dir/shards/<name>)
+        name: Identifiant unique du worker (propriétaire des baux)
+        api: Client partagé par les workers du processus
+    """
+    def __init__(self, queue: WorkQueue, data_dir: Path, name: str, api: SpeedrunAPI):
+        self.queue = queue
+        self.name = name
+        self.api = api
+        self.shard_dir = shards_root(data_dir) / name
+        self.storage = get_storage(self.shard_dir)
+        # Noms des joueurs embarqués dans les pages, versés dans l'index principal par merge_shards
+        self.players = MetadataIndex(self.shard_dir / METADATA_CONFIG['file'])
+        self.current: Optional[WorkItem] = None
+        self.lost = threading.Event()
+        self.items = 0
+        self.runs = 0
+
+    def process(self, item: WorkItem) -> Optional[int]:
+        """Lit les pages de la plage ; renvoie le nombre de runs écrites (None si le bail est perdu)"""
+        per_page = API_CONFIG['runs_per_page']
+        embed = 'players' if API_CONFIG['embed_players'] else None
+        batches = []
+        offset = item.start_offset
+        while offset < item.end_offset and not self.lost.is_set():
+            page = self.api.get_runs(item.game_id, item.category_id, offset, direction='asc',
+                                     embed=embed).get('data') or []
+            if offset == item.start_offset and len(page) == per_page:
+                # Première page pleine : la plage suivante peut être louée sans attendre celle-ci
+                self.queue.enqueue(item.following)
+            if not page:
+                break
+            instrumentation.observe('speedrun_page_runs', len(page), endpoint='runs')
+            columns, rejected = runs_to_columns(page)
+            log_rejections(rejected, f"{item.game_id}_{item.category_id}@{offset}")
+            self.players.update_players(extract_player_names(page))
+            batches.append(columns)
+            offset += len(page)
+            if len(page) < per_page:
+                break
+
+        if self.lost.is_set():
+            return None
+        runs = columns_to_frame(batches)
+        if not runs.empty:
+            self.storage.append(apply_schema(runs)[RUN_COLUMNS], item.game_id, item.category_id)
+            self.players.save()
+        return len(runs)
+
+    def run(self, stop: threading.Event) -> None:
+        """Loue et traite des plages jusqu'à stop ou jusqu'à ce que la file soit vidée"""
+        while not stop.is_set():
+            item = self.queue.lease(self.name)
+            if item is None:
+                if self.queue.is_drained():
+                    return
+                stop.wait(SHARDING_CONFIG['idle_sleep'])
+                continue
+            self.lost.clear()
+            self.current = item
+            try:
+                with instrumentation.timer('speedrun_job_seconds', kind='shard'):
+                    runs = self.process(item)
+            except Exception as e:
+                logger.error(f"Échec de la plage {item} ({self.name}): {e}")
+                instrumentation.increment('speedrun_jobs_total', kind='shard', status='failed')
+                self.queue.fail(item, self.name, str(e))
+                continue
+            finally:
+                self.current = None
+            if runs is None or not self.queue.complete(item, self.name, runs, self.name):
+                # Plage reprise par un autre worker : ses runs éventuelles sont dédoublonnées à la fusion
+                logger.warning(f"Bail perdu sur {item} ({self.name})")
+                continue
+            instrumentation.increment('speedrun_jobs_total', kind='shard', status='done')
+            self.items += 1
+            self.runs += runs
+
+def run_workers(data_dir: Path, threads: int = 1, name: Optional[str] = None, path: Optional[Path] = None,
+                stop: Optional[threading.Event] = None) -> Dict:
+    """
+    Lance threads workers dans ce processus jusqu'à ce que la file soit vidée (ou stop)
+
+    Les baux sont renouvelés par le thread appelant toutes les heartbeat_interval secondes.
+
+    Returns:
+        Rapport (plages, runs, requêtes, durée)
+    """
+    name = name or f"{socket.gethostname()}-{os.getpid()}"
+    path = path or queue_path(data_dir)
+    stop = stop or threading.Event()
+    queue = WorkQueue(path)
+    limiter = SqliteTokenBucket.per_minute(path, API_CONFIG['requests_per_minute'], API_CONFIG['burst'],
+                                           key=socket.gethostname())
+    api = SpeedrunAPI(rate_limiter=limiter)
+    # Noms de plateformes de l'index principal, résolus à la conversion des runs
+    get_metadata_index(data_dir)
+
+    start = time.perf_counter()
+    workers = [ShardWorker(queue, data_dir, f"{name}-{index}", api) for index in range(threads)]
+    pool = [threading.Thread(target=worker.run, args=(stop,), name=worker.name, daemon=True) for worker in workers]
+    for thread in pool:
+        thread.start()
+    logger.info(f"{threads} workers démarrés ({name}), file {queue.stats()}")
+    try:
+        while True:
+            alive = [thread for thread in pool if thread.is_alive()]
+            if not alive:
+                break
+            alive[0].join(SHARDING_CONFIG['heartbeat_interval'])
+            for worker in workers:
+                item = worker.current
+                if item is not None and not queue.heartbeat(item, worker.name):
+                    worker.lost.set()
+    finally:
+        stop.set()
+        queue.close()
+        limiter.close()
+
+    report = {
+        'worker': name,
+        'items': sum(worker.items for worker in workers),
+        'runs': sum(worker.runs for worker in workers),
+        'requests': api.request_count,
+        'seconds': time.perf_counter() - start
+    }
+    logger.info(f"Workers {name} arrêtés: {report}")
+    return report
+
+def merge_shards(data_dir: Path, queue: Optional[WorkQueue] = None, force: bool = False) -> Dict[Tuple[str, str], int]:
+    """
+    Verse les résultats de tous les workers dans le stockage principal, puis les supprime
+
+    Refusée (RuntimeError) tant que la file n'est pas vidée ou qu'une plage a
+    été abandonnée : les runs de ces plages manqueraient. force fusionne quand
+    même, en journalisant les plages manquantes.
+
+    Returns:
+        Nombre de runs nouvellement ajoutées par (game_id, category_id)
+    """
+    if queue is not None:
+        failed = queue.failed()
+        missing = ', '.join(f"{item} ({error})" for item, error in failed[:5])
+        if not force and not queue.is_drained():
+            raise RuntimeError(f"La file n'est pas vidée ({queue.stats()}) : fusion refusée sans force")
+        if not force and failed:
+            raise RuntimeError(f"{len(failed)} plages abandonnées ({missing}) : fusion refusée sans force, "
+                               f"relancez-les avec retry")
+        if failed:
+            logger.warning(f"Fusion forcée malgré {len(failed)} plages abandonnées: {missing}")
+    root = shards_root(data_dir)
+    shard_dirs = sorted(path for path in root.iterdir() if path.is_dir()) if root.exists() else []
+    if not shard_dirs:
+        return {}
+
+    collector = SpeedrunCollector(output_dir=str(data_dir))
+    for shard_dir in shard_dirs:
+        collector.metadata.update_players(MetadataIndex(shard_dir / METADATA_CONFIG['file']).snapshot()['players'])
+    storages = [get_storage(shard_dir) for shard_dir in shard_dirs]
+    partitions = sorted({partition for storage in storages for partition in storage.list_partitions()})
+
+    added = {}
+    for game_id, category_id in partitions:
+        # Partitions des workers concaténées dans un fichier partiel, versé par blocs sans doublon
+        partial_path = Path(data_dir) / f"{game_id}_{category_id}.shards.partial"
+        partial_path.unlink(missing_ok=True)
+        for storage in storages:
+            if storage.exists(game_id, category_id):
+                storage.read(game_id, category_id).to_csv(partial_path, mode='a', header=not partial_path.exists(),
+                                                          index=False)
+        added[(game_id, category_id)] = collector.merge_file(game_id, category_id, partial_path)
+
+    collector.sync_database()
+    for shard_dir in shard_dirs:
+        shutil.rmtree(shard_dir)
+    logger.info(f"{sum(added.values())} runs fusionnées depuis {len(shard_dirs)} dossiers de résultats")
+    return added
+
+def _read_game_ids(args: argparse.Namespace) -> List[str]:
+    game_ids = list(args.games or [])
+    if args.games_file:
+        game_ids += [line.strip() for line in args.games_file.read_text(encoding='utf-8').splitlines()
+                     if line.strip() and not line.startswith('#')]
+    return game_ids or list(GAMES.values())
+
+def main():
+    from ..utils.data_loader import publish_snapshot
+    from ..utils.logging_config import setup_logging
+
+    parser = argparse.ArgumentParser(description="Collecte répartie sur plusieurs workers")
+    parser.add_argument('command', choices=['plan', 'work', 'status', 'retry', 'merge'])
+    parser.add_argument('--data-dir', type=Path, default=Path('data'))
+    parser.add_argument('--queue', type=Path, default=None, help="File partagée (data_dir/.work.sqlite par défaut)")
+    parser.add_argument('--games', nargs='*', default=None, help="IDs des jeux (GAMES par défaut)")
+    parser.add_argument('--games-file', type=Path, default=None, help="Un ID de jeu par ligne")
+    parser.add_argument('--pages-per-job', type=int, default=None)
+    parser.add_argument('--threads', type=int, default=1, help="Workers de ce processus")
+    parser.add_argument('--name', default=None, help="Préfixe des workers (machine-pid par défaut)")
+    parser.add_argument('--force', action='store_true', help="Fusionne même si la file n'est pas vidée ou si des plages ont été abandonnées")
+    args = parser.parse_args()
+
+    setup_logging()
+    path = args.queue or queue_path(args.data_dir)
+    if args.command == 'work':
+        stop = threading.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: stop.set())
+        print(json.dumps(run_workers(args.data_dir, args.threads, args.name, path, stop)))
+        return
+
+    queue = WorkQueue(path)
+    try:
+        if args.command == 'plan':
+            plan(queue, args.data_dir, _read_game_ids(args), args.pages_per_job)
+        elif args.command == 'retry':
+            logger.info(f"{queue.retry_failed()} plages remises en file")
+        elif args.command == 'merge':
+            added = merge_shards(args.data_dir, queue, args.force)
+            publish_snapshot(args.data_dir)
+            print(json.dumps({'categories': len(added), 'runs': sum(added.values()),
+                              'failed_ranges': len(queue.failed())}))
+            return
+        print(json.dumps(queue.stats()))
+    finally:
+        queue.close()
+
+if __name__ == '__main__':
+    main()
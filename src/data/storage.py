@@ -0,0 +1,316 @@
+"""
+Backends de stockage des runs collectées
+
+Usage (migration du dossier data/ vers Parquet):
+    python -m src.data.storage migrate data --target parquet
+"""
+import argparse
+import logging
+import os
+import shutil
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+import pandas as pd
+from config.settings import STORAGE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+RUN_COLUMNS = ['run_id', 'category', 'date', 'time_seconds', 'player', 'verified', 'platform', 'emulator']
+CATEGORICAL_COLUMNS = ['category', 'player', 'platform']
+BOOL_COLUMNS = ['verified', 'emulator']
+
+def apply_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """Applique le schéma explicite des runs (catégoriels, float32, datetime64, booléens)"""
+    df = df.copy()
+    for column in CATEGORICAL_COLUMNS:
+        if column in df:
+            df[column] = df[column].astype('category')
+    if 'time_seconds' in df:
+        df['time_seconds'] = df['time_seconds'].astype('float32')
+    if 'date' in df:
+        df['date'] = pd.to_datetime(df['date'], errors='coerce')
+    for column in BOOL_COLUMNS:
+        if column in df:
+            df[column] = df[column].fillna(False).astype(bool)
+    return df
+
+class StorageBackend:
+    """Interface commune des backends : une partition par (jeu, catégorie)"""
+    name = 'base'
+
+    def __init__(self, data_dir: Path):
+        self.data_dir = Path(data_dir)
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+
+    def exists(self, game_id: str, category_id: str) -> bool:
+        raise NotImplementedError
+
+    def write(self, df: pd.DataFrame, game_id: str, category_id: str) -> None:
+        """Remplace le contenu de la partition"""
+        raise NotImplementedError
+
+    def append(self, df: pd.DataFrame, game_id: str, category_id: str) -> None:
+        """Ajoute des runs à la partition"""
+        raise NotImplementedError
+
+    def read(self, game_id: str, category_id: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        raise NotImplementedError
+
+    def read_runs(self, game_id: str, category_id: str, run_ids: Iterable[str]) -> pd.DataFrame:
+        """Runs de la partition dont l'ID est demandé"""
+        df = self.read(game_id, category_id)
+        return df[df['run_id'].astype(str).isin(set(run_ids))].reset_index(drop=True)
+
+    def replace_runs(self, df: pd.DataFrame, game_id: str, category_id: str) -> None:
+        """Remplace les runs stockées de même run_id par celles de df"""
+        stored = self.read(game_id, category_id)
+        stored = stored[~stored['run_id'].astype(str).isin(set(df['run_id'].astype(str)))]
+        self.write(pd.concat([stored, df], ignore_index=True)[RUN_COLUMNS], game_id, category_id)
+
+    def list_partitions(self) -> List[Tuple[str, str]]:
+        raise NotImplementedError
+
+    def partition_files(self, game_id: str, category_id: str) -> List[Path]:
+        raise NotImplementedError
+
+    def fingerprint(self, game_id: str, category_id: str) -> str:
+        """Empreinte (taille + date de modification) des fichiers d'une partition"""
+        stats = [path.stat() for path in self.partition_files(game_id, category_id)]
+        return ';'.join(f"{stat.st_size}:{stat.st_mtime_ns}" for stat in stats)
+
+    def read_all(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Lit toutes les partitions, avec les colonnes game_id et category_id"""
+        frames = []
+        for game_id, category_id in self.list_partitions():
+            df = self.read(game_id, category_id, columns)
+            frames.append(df.assign(game_id=game_id, category_id=category_id))
+        if not frames:
+            return pd.DataFrame(columns=(columns or RUN_COLUMNS) + ['game_id', 'category_id'])
+        combined = pd.concat(frames, ignore_index=True)
+        return combined.astype({'game_id': 'category', 'category_id': 'category'})
+
+    def size_bytes(self) -> int:
+        raise NotImplementedError
+
+class CsvStorage(StorageBackend):
+    """Un fichier {game_id}_{category_id}.csv par catégorie (format historique)"""
+    name = 'csv'
+
+    def path_for(self, game_id: str, category_id: str) -> Path:
+        return self.data_dir / f"{game_id}_{category_id}.csv"
+
+    def exists(self, game_id: str, category_id: str) -> bool:
+        return self.path_for(game_id, category_id).exists()
+
+    def partition_files(self, game_id: str, category_id: str) -> List[Path]:
+        path = self.path_for(game_id, category_id)
+        return [path] if path.exists() else []
+
+    def write(self, df: pd.DataFrame, game_id: str, category_id: str) -> None:
+        df.to_csv(self.path_for(game_id, category_id), index=False)
+
+    def append(self, df: pd.DataFrame, game_id: str, category_id: str) -> None:
+        path = self.path_for(game_id, category_id)
+        df.to_csv(path, mode='a', header=not path.exists(), index=False)
+
+    def read(self, game_id: str, category_id: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        dtypes = {column: 'category' for column in CATEGORICAL_COLUMNS}
+        dtypes['time_seconds'] = 'float32'
+        df = pd.read_csv(self.path_for(game_id, category_id), usecols=columns, dtype=dtypes)
+        return apply_schema(df)
+
+    def read_runs(self, game_id: str, category_id: str, run_ids: Iterable[str]) -> pd.DataFrame:
+        """Lecture par blocs : seules les runs demandées restent en mémoire"""
+        run_ids = set(run_ids)
+        dtypes = {column: 'category' for column in CATEGORICAL_COLUMNS}
+        dtypes['time_seconds'] = 'float32'
+        chunks = pd.read_csv(self.path_for(game_id, category_id), dtype=dtypes,
+                             chunksize=STORAGE_CONFIG['chunk_size'])
+        matches = [chunk[chunk['run_id'].astype(str).isin(run_ids)] for chunk in chunks]
+        return apply_schema(pd.concat(matches, ignore_index=True))
+
+    def replace_runs(self, df: pd.DataFrame, game_id: str, category_id: str) -> None:
+        """Réécriture par blocs dans un fichier temporaire, remplacé atomiquement"""
+        path = self.path_for(game_id, category_id)
+        tmp_path = path.with_suffix('.tmp')
+        replaced = set(df['run_id'].astype(str))
+        columns = RUN_COLUMNS
+        # Lignes conservées recopiées sous forme de texte, sans conversion
+        chunks = pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=STORAGE_CONFIG['chunk_size'])
+        with open(tmp_path, 'w', newline='', encoding='utf-8') as output:
+            for number, chunk in enumerate(chunks):
+                columns = list(chunk.columns)
+                chunk[~chunk['run_id'].isin(replaced)].to_csv(output, header=number == 0, index=False)
+            df[columns].to_csv(output, header=output.tell() == 0, index=False)
+        os.replace(tmp_path, path)
+
+    def list_partitions(self) -> List[Tuple[str, str]]:
+        partitions = []
+        for csv_file in sorted(self.data_dir.glob('*.csv')):
+            parts = csv_file.stem.split('_')
+            if len(parts) == 2:
+                partitions.append((parts[0], parts[1]))
+        return partitions
+
+    def size_bytes(self) -> int:
+        return sum(self.path_for(*partition).stat().st_size for partition in self.list_partitions())
+
+class ParquetStorage(StorageBackend):
+    """
+    Jeu de données Parquet partitionné runs/game_id=.../category_id=.../part-*.parquet
+
+    Nécessite pyarrow (dépendance optionnelle).
+    """
+    name = 'parquet'
+
+    def __init__(self, data_dir: Path):
+        super().__init__(data_dir)
+        try:
+            import pyarrow as pa
+            import pyarrow.compute as pc
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Le backend Parquet nécessite pyarrow (pip install pyarrow)") from e
+        self._pa = pa
+        self._pq = pq
+        self._pc = pc
+        self.root = self.data_dir / 'runs'
+        self.schema = pa.schema([
+            ('run_id', pa.string()),
+            ('category', pa.dictionary(pa.int32(), pa.string())),
+            ('date', pa.timestamp('ms')),
+            ('time_seconds', pa.float32()),
+            ('player', pa.dictionary(pa.int32(), pa.string())),
+            ('verified', pa.bool_()),
+            ('platform', pa.dictionary(pa.int32(), pa.string())),
+            ('emulator', pa.bool_())
+        ])
+
+    def path_for(self, game_id: str, category_id: str) -> Path:
+        return self.root / f"game_id={game_id}" / f"category_id={category_id}"
+
+    def exists(self, game_id: str, category_id: str) -> bool:
+        return any(self.path_for(game_id, category_id).glob('*.parquet'))
+
+    def partition_files(self, game_id: str, category_id: str) -> List[Path]:
+        return sorted(self.path_for(game_id, category_id).glob('*.parquet'))
+
+    def _to_table(self, df: pd.DataFrame):
+        df = apply_schema(df)[RUN_COLUMNS]
+        return self._pa.Table.from_pandas(df, schema=self.schema, preserve_index=False)
+
+    def _write_part(self, df: pd.DataFrame, partition: Path) -> None:
+        partition.mkdir(parents=True, exist_ok=True)
+        part_number = len(list(partition.glob('part-*.parquet')))
+        self._pq.write_table(self._to_table(df), partition / f"part-{part_number:05d}.parquet",
+                             compression=STORAGE_CONFIG['parquet_compression'])
+
+    def write(self, df: pd.DataFrame, game_id: str, category_id: str) -> None:
+        partition = self.path_for(game_id, category_id)
+        if partition.exists():
+            shutil.rmtree(partition)
+        self._write_part(df, partition)
+
+    def append(self, df: pd.DataFrame, game_id: str, category_id: str) -> None:
+        self._write_part(df, self.path_for(game_id, category_id))
+
+    def read(self, game_id: str, category_id: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        table = self._pq.read_table(self.path_for(game_id, category_id), columns=columns,
+                                    schema=self.schema)
+        return table.to_pandas()
+
+    def read_runs(self, game_id: str, category_id: str, run_ids: Iterable[str]) -> pd.DataFrame:
+        """Lecture filtrée sur run_id (prédicat évalué par pyarrow)"""
+        table = self._pq.read_table(self.path_for(game_id, category_id), schema=self.schema,
+                                    filters=[('run_id', 'in', sorted(set(run_ids)))])
+        return table.to_pandas()
+
+    def replace_runs(self, df: pd.DataFrame, game_id: str, category_id: str) -> None:
+        """Réécrit uniquement les fichiers contenant une run remplacée, puis ajoute les nouvelles versions"""
+        replaced = sorted(set(df['run_id'].astype(str)))
+        for path in self.partition_files(game_id, category_id):
+            ids = self._pq.read_table(path, columns=['run_id']).column('run_id')
+            if not self._pc.any(self._pc.is_in(ids, value_set=self._pa.array(replaced))).as_py():
+                continue
+            table = self._pq.read_table(path, schema=self.schema)
+            keep = self._pc.invert(self._pc.is_in(table.column('run_id'), value_set=self._pa.array(replaced)))
+            tmp_path = path.with_suffix('.tmp')
+            self._pq.write_table(table.filter(keep), tmp_path,
+                                 compression=STORAGE_CONFIG['parquet_compression'])
+            os.replace(tmp_path, path)
+        self.append(df, game_id, category_id)
+
+    def list_partitions(self) -> List[Tuple[str, str]]:
+        partitions = []
+        for game_dir in sorted(self.root.glob('game_id=*')):
+            for category_dir in sorted(game_dir.glob('category_id=*')):
+                partitions.append((game_dir.name.split('=', 1)[1], category_dir.name.split('=', 1)[1]))
+        return partitions
+
+    def read_all(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Lecture unique du jeu de données, limitée aux colonnes demandées"""
+        if not self.root.exists():
+            return super().read_all(columns)
+        import pyarrow.dataset as ds
+        dataset = ds.dataset(self.root, format='parquet', partitioning='hive')
+        projection = None if columns is None else list(columns) + ['game_id', 'category_id']
+        return dataset.to_table(columns=projection).to_pandas()
+
+    def size_bytes(self) -> int:
+        return sum(path.stat().st_size for path in self.root.rglob('*.parquet'))
+
+BACKENDS = {
+    CsvStorage.name: CsvStorage,
+    ParquetStorage.name: ParquetStorage
+}
+
+def get_storage(data_dir: Path, fmt: Optional[str] = None) -> StorageBackend:
+    """Instancie le backend configuré (STORAGE_CONFIG['format'] par défaut)"""
+    fmt = fmt or STORAGE_CONFIG['format']
+    if fmt not in BACKENDS:
+        raise ValueError(f"Format de stockage inconnu: {fmt}")
+    return BACKENDS[fmt](data_dir)
+
+def migrate(data_dir: Path, source: str = 'csv', target: str = 'parquet') -> dict:
+    """
+    Copie toutes les partitions d'un backend vers un autre
+
+    Returns:
+        Nombre de partitions et de runs migrées, tailles avant / après
+    """
+    source_storage = get_storage(data_dir, source)
+    target_storage = get_storage(data_dir, target)
+    report = {'partitions': 0, 'runs': 0}
+    for game_id, category_id in source_storage.list_partitions():
+        try:
+            df = source_storage.read(game_id, category_id)
+            target_storage.write(df, game_id, category_id)
+            report['partitions'] += 1
+            report['runs'] += len(df)
+        except Exception as e:
+            logger.error(f"Erreur lors de la migration de {game_id}_{category_id}: {e}")
+    report['source_bytes'] = source_storage.size_bytes()
+    report['target_bytes'] = target_storage.size_bytes()
+    logger.info(
+        f"Migration {source} -> {target}: {report['partitions']} partitions, {report['runs']} runs, "
+        f"{report['source_bytes']} -> {report['target_bytes']} octets"
+    )
+    return report
+
+def main():
+    from ..utils.logging_config import setup_logging
+
+    parser = argparse.ArgumentParser(description="Gestion du stockage des runs")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    migrate_parser = subparsers.add_parser('migrate', help="Migre les données vers un autre format")
+    migrate_parser.add_argument('data_dir', type=Path, nargs='?', default=Path('data'))
+    migrate_parser.add_argument('--source', choices=list(BACKENDS), default='csv')
+    migrate_parser.add_argument('--target', choices=list(BACKENDS), default='parquet')
+    args = parser.parse_args()
+
+    setup_logging()
+    if args.command == 'migrate':
+        migrate(args.data_dir, args.source, args.target)
+
+if __name__ == '__main__':
+    main()
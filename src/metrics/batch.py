@@ -0,0 +1,189 @@
+"""
+Analyse comparative de toutes les catégories en un seul lot vectorisé
+
+Les runs de toutes les catégories (colonnes game_id et category_id, voir
+StorageBackend.read_all) sont triées une fois par (catégorie, temps) ;
+toutes les métriques sont ensuite obtenues par positions dans les segments
+triés et par comptages groupés (np.bincount), sans boucle Python par
+catégorie.
+
+Avec clean=True, le nettoyage de SpeedrunDataProcessor.clean_data
+(doublons, repérés par run_id, et valeurs aberrantes par catégorie, voir
+src/data/cleaning.py) est appliqué à tout le lot en une passe : les
+métriques sont celles de calculate_metrics, catégorie par catégorie. Les
+runs sans temps sont ignorées.
+
+Usage: python -m src.metrics.batch [data_dir] [--output comparaison.csv]
+"""
+import argparse
+import logging
+from pathlib import Path
+from typing import Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from ..data.cleaning import Segments, clean_runs
+from ..data.storage import get_storage
+from ..utils import instrumentation
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PERCENTILES = (10, 25, 75, 90)
+
+_EPOCH = np.datetime64('1970-01-01', 'D')
+
+def _distinct_per_group(codes: np.ndarray, values: np.ndarray, group_count: int) -> np.ndarray:
+    """Nombre de valeurs distinctes (codes entiers >= 0) par catégorie, via un tri de paires"""
+    width = int(values.max()) + 1 if len(values) else 1
+    pairs = np.sort(codes.astype('int64') * width + values)
+    first = np.ones(len(pairs), dtype=bool)
+    first[1:] = pairs[1:] != pairs[:-1]
+    return np.bincount(pairs[first] // width, minlength=group_count)
+
+def _prepare(df: pd.DataFrame, clean: bool) -> Tuple[pd.DataFrame, np.ndarray, pd.MultiIndex, Segments]:
+    """Nettoyage éventuel et segments triés des runs ; renvoie aussi les codes de catégorie"""
+    if clean:
+        df = clean_runs(df, by=['game_id', 'category_id'], sort=False).data
+    df = df[df['time_seconds'].notna()]
+    # Codes de catégorie à partir des codes (entiers) des jeux et des catégories
+    game_codes, games = pd.factorize(df['game_id'])
+    category_codes, categories = pd.factorize(df['category_id'])
+    pair_codes = game_codes.astype('int64') * len(categories) + category_codes
+    codes, pairs = pd.factorize(pair_codes)
+    # groups : (game_id, category_id) de chaque code de catégorie
+    groups = pd.MultiIndex.from_arrays([np.asarray(games, dtype=object)[pairs // len(categories)].astype(str),
+                                        np.asarray(categories, dtype=object)[pairs % len(categories)].astype(str)])
+    times = df['time_seconds'].to_numpy(dtype='float64')
+    return df, codes, groups, Segments(codes, times, len(groups))
+
+@instrumentation.timed('speedrun_stage_seconds', stage='compare_categories')
+def compare_categories(df: pd.DataFrame, clean: bool = True,
+                       percentiles: Sequence[int] = DEFAULT_PERCENTILES) -> pd.DataFrame:
+    """
+    Métriques de toutes les catégories d'un jeu de données combiné
+
+    Args:
+        df: Runs avec les colonnes game_id et category_id
+        clean: Applique le nettoyage de clean_data (doublons, valeurs aberrantes par catégorie)
+        percentiles: Percentiles des temps à calculer (colonnes p10, p25, ...)
+
+    Returns:
+        Une ligne par catégorie : total_runs, unique_players, avg_time, median_time,
+        std_time, best_time, pNN, emulator_percentage, runs_per_month, difficulty_score
+        (trié par difficulté décroissante)
+    """
+    if df.empty:
+        return pd.DataFrame(columns=['game_id', 'category_id', 'total_runs'])
+    df, codes, groups, segments = _prepare(df, clean)
+    group_count = len(groups)
+    counts = segments.counts
+    safe_counts = np.maximum(counts, 1)
+
+    times = segments.times
+    means = np.bincount(segments.codes, weights=times, minlength=group_count) / safe_counts
+    squares = np.bincount(segments.codes, weights=(times - means[segments.codes]) ** 2, minlength=group_count)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        stds = np.where(counts > 1, np.sqrt(squares / np.maximum(counts - 1, 1)), np.nan)
+    present = counts > 0
+    best = np.full(group_count, np.nan)
+    worst = np.full(group_count, np.nan)
+    best[present] = times[segments.offsets[present]]
+    worst[present] = times[segments.offsets[present] + counts[present] - 1]
+    medians = segments.quantile(0.5)
+
+    # Joueurs distincts par catégorie, joueurs manquants exclus (code -1)
+    player_codes, _ = pd.factorize(df['player'])
+    known = player_codes >= 0
+    unique_players = _distinct_per_group(codes[known], player_codes[known], group_count)
+
+    emulator = df['emulator'].fillna(False).to_numpy(dtype=bool)
+    emulator_percentage = np.bincount(codes, weights=emulator, minlength=group_count) / safe_counts * 100
+
+    # Moyenne des runs par mois actif : runs datées / mois distincts
+    dates = pd.to_datetime(df['date'], errors='coerce')
+    dated = dates.notna().to_numpy()
+    days = (dates[dated].to_numpy(dtype='datetime64[ns]').astype('datetime64[D]') - _EPOCH).astype('int64')
+    first_day = days.min() if len(days) else 0
+    day_counts = np.bincount(days - first_day) if len(days) else np.zeros(0, dtype='int64')
+    present_days = np.flatnonzero(day_counts) + first_day
+    # Mois de chaque jour distinct, puis de chaque run
+    month_of_day = np.zeros(len(day_counts), dtype='int64')
+    month_of_day[present_days - first_day] = (present_days + _EPOCH).astype('datetime64[M]').astype('int64')
+    months = month_of_day[days - first_day]
+    active_months = _distinct_per_group(codes[dated], months - (months.min() if len(months) else 0), group_count)
+    dated_runs = np.bincount(codes[dated], minlength=group_count)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        runs_per_month = np.where(active_months > 0, dated_runs / np.maximum(active_months, 1), np.nan)
+
+        # Score de difficulté (difficulty_from_stats), vectorisé
+        spread = worst - best
+        completion_variance = np.where(spread != 0, stds / spread, np.nan)
+        difficulty = (completion_variance * 0.6 + spread / medians * 0.4) * 100
+
+    table = pd.DataFrame({
+        'game_id': groups.get_level_values(0),
+        'category_id': groups.get_level_values(1),
+        'total_runs': counts,
+        'unique_players': unique_players,
+        'avg_time': means,
+        'median_time': medians,
+        'std_time': stds,
+        'best_time': best,
+        **{f"p{p}": segments.quantile(p / 100) for p in percentiles},
+        'emulator_percentage': emulator_percentage,
+        'runs_per_month': runs_per_month,
+        'difficulty_score': difficulty
+    })
+    table = table[present]
+    table.insert(table.columns.get_loc('difficulty_score') + 1, 'difficulty_rank',
+                 table['difficulty_score'].rank(ascending=False, method='min').astype('Int64'))
+    return table.sort_values('difficulty_score', ascending=False, ignore_index=True)
+
+def platform_breakdown(df: pd.DataFrame, clean: bool = True) -> pd.DataFrame:
+    """
+    Distribution des plateformes de toutes les catégories (format long)
+
+    Returns:
+        game_id, category_id, platform, runs, share (pourcentage de la catégorie)
+    """
+    if df.empty:
+        return pd.DataFrame(columns=['game_id', 'category_id', 'platform', 'runs', 'share'])
+    df, codes, groups, segments = _prepare(df, clean)
+    platform_codes, platforms = pd.factorize(df['platform'])
+    known = platform_codes >= 0
+    matrix = np.bincount(codes[known].astype('int64') * len(platforms) + platform_codes[known],
+                         minlength=len(groups) * len(platforms)).reshape(len(groups), len(platforms))
+    group_index, platform_index = np.nonzero(matrix)
+    runs = matrix[group_index, platform_index]
+    return pd.DataFrame({
+        'game_id': groups.get_level_values(0)[group_index],
+        'category_id': groups.get_level_values(1)[group_index],
+        'platform': np.asarray(platforms, dtype=object)[platform_index].astype(str),
+        'runs': runs,
+        'share': runs / segments.counts[group_index] * 100
+    })
+
+def load_combined(data_dir: Path, fmt: Optional[str] = None) -> pd.DataFrame:
+    """Runs de toutes les catégories, lues en une fois depuis le stockage"""
+    return get_storage(Path(data_dir), fmt).read_all(
+        columns=['run_id', 'date', 'time_seconds', 'player', 'platform', 'emulator']
+    )
+
+def main():
+    from ..utils.logging_config import setup_logging
+
+    parser = argparse.ArgumentParser(description="Comparaison de toutes les catégories")
+    parser.add_argument('data_dir', type=Path, nargs='?', default=Path('data'))
+    parser.add_argument('--output', type=Path, default=None, help="Fichier CSV du tableau comparatif")
+    parser.add_argument('--no-clean', action='store_true', help="N'applique pas le filtre IQR")
+    args = parser.parse_args()
+
+    setup_logging()
+    table = compare_categories(load_combined(args.data_dir), clean=not args.no_clean)
+    if args.output:
+        table.to_csv(args.output, index=False)
+        logger.info(f"Tableau comparatif de {len(table)} catégories écrit dans {args.output}")
+    else:
+        print(table.to_string(index=False))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+Données de graphiques agrégées côté serveur, de taille bornée
+
+Les graphiques au niveau des runs (distribution des temps, temps en
+fonction de la date) ne reçoivent jamais toutes les runs d'une catégorie :
+- histogram : classes de temps (bins fixes) ;
+- quantile_bands : quantiles des temps par période (jour, semaine, mois),
+  calculés en une passe sur les temps triés par (période, temps) ;
+- downsample : série temps / date réduite à max_points points par
+  Largest-Triangle-Three-Buckets (LTTB), qui garde les extrêmes visibles.
+
+La taille des résultats dépend de la résolution demandée (classes,
+périodes, points), jamais du nombre de runs.
+"""
+from typing import Sequence
+import numpy as np
+import pandas as pd
+from ..data.cleaning import Segments
+from .rollups import GRANULARITIES, period_starts
+
+DEFAULT_QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+
+_EPOCH = np.datetime64('1970-01-01', 'D')
+
+def _dated_times(runs: pd.DataFrame):
+    """Jours depuis 1970-01-01 et temps des runs datées et chronométrées"""
+    dates = pd.to_datetime(runs['date'], errors='coerce').to_numpy(dtype='datetime64[ns]')
+    times = runs['time_seconds'].to_numpy(dtype='float64', na_value=np.nan)
+    mask = ~np.isnat(dates) & ~np.isnan(times)
+    return dates[mask], times[mask]
+
+def histogram(runs: pd.DataFrame, bins: int = 50) -> pd.DataFrame:
+    """Classes de temps : left, right, runs"""
+    times = runs['time_seconds'].to_numpy(dtype='float64', na_value=np.nan)
+    times = times[~np.isnan(times)]
+    if not len(times):
+        return pd.DataFrame(columns=['left', 'right', 'runs'])
+    counts, edges = np.histogram(times, bins=bins)
+    return pd.DataFrame({'left': edges[:-1], 'right': edges[1:], 'runs': counts})
+
+def quantile_bands(runs: pd.DataFrame, granularity: str = 'month',
+                   quantiles: Sequence[float] = DEFAULT_QUANTILES) -> pd.DataFrame:
+    """
+    Quantiles des temps par période
+
+    Returns:
+        period (premier jour), runs, best_time et une colonne qNN par quantile (q10, q50, ...)
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Granularité inconnue: {granularity}")
+    columns = ['period', 'runs', 'best_time'] + [f"q{round(q * 100)}" for q in quantiles]
+    dates, times = _dated_times(runs)
+    if not len(times):
+        return pd.DataFrame(columns=columns)
+    days = (dates.astype('datetime64[D]') - _EPOCH).astype('int64')
+    periods, codes = np.unique(period_starts(days, granularity), return_inverse=True)
+    segments = Segments(codes.astype('int64'), times, len(periods))
+    return pd.DataFrame({
+        'period': (periods + _EPOCH).astype('datetime64[ns]'),
+        'runs': segments.counts,
+        'best_time': segments.times[segments.offsets],
+        **{column: segments.quantile(q) for column, q in zip(columns[3:], quantiles)}
+    })
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Positions des points retenus par LTTB (x croissant) ; tous les points si threshold >= len(x)"""
+    length = len(x)
+    if threshold >= length or threshold < 3:
+        return np.arange(length)
+    # threshold - 2 compartiments entre le premier et le dernier point
+    edges = np.linspace(1, length - 1, threshold - 1).astype('int64')
+    # Moyennes de chaque compartiment par sommes cumulées
+    cumulative_x = np.concatenate([[0.0], np.cumsum(x)])
+    cumulative_y = np.concatenate([[0.0], np.cumsum(y)])
+    sizes = edges[1:] - edges[:-1]
+    mean_x = (cumulative_x[edges[1:]] - cumulative_x[edges[:-1]]) / sizes
+    mean_y = (cumulative_y[edges[1:]] - cumulative_y[edges[:-1]]) / sizes
+    # Le compartiment suivant du dernier est le dernier point
+    mean_x = np.append(mean_x[1:], x[-1])
+    mean_y = np.append(mean_y[1:], y[-1])
+
+    selected = np.empty(threshold, dtype='int64')
+    selected[0], selected[-1] = 0, length - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        # Aire du triangle (point retenu précédent, candidat, moyenne du compartiment suivant)
+        area = np.abs((x[previous] - mean_x[bucket]) * (y[start:stop] - y[previous])
+                      - (x[previous] - x[start:stop]) * (mean_y[bucket] - y[previous]))
+        previous = start + int(np.argmax(area))
+        selected[bucket + 1] = previous
+    return selected
+
+def downsample(runs: pd.DataFrame, max_points: int = 1000) -> pd.DataFrame:
+    """Série temps / date (triée par date) réduite à max_points points : date, time_seconds"""
+    dates, times = _dated_times(runs)
+    order = np.argsort(dates, kind='stable')
+    dates, times = dates[order], times[order]
+    days = (dates - dates[0]) / np.timedelta64(1, 'D') if len(dates) else np.zeros(0)
+    kept = lttb(days.astype('float64'), times, max_points)
+    return pd.DataFrame({'date': dates[kept], 'time_seconds': times[kept]})
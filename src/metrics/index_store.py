@@ -0,0 +1,106 @@
+"""
+Index dérivés des runs, persistés par partition (jeu, catégorie)
+
+Un index est mis à jour par lots pendant la collecte puis sauvegardé avec
+l'empreinte de sa partition ; il est reconstruit depuis le stockage lorsque
+cette empreinte ne correspond plus (données modifiées hors collecte).
+"""
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+import pandas as pd
+from ..data.storage import StorageBackend, get_storage
+
+logger = logging.getLogger(__name__)
+
+class PartitionIndexStore:
+    """
+    Index de toutes les catégories, un fichier JSON par partition
+
+    Les sous-classes définissent index_class (update(df), to_dict(),
+    from_dict(), attribut fingerprint), dirname et label.
+    """
+    index_class = None
+    dirname = ''
+    label = 'index'
+
+    def __init__(self, data_dir: Path, storage: Optional[StorageBackend] = None):
+        self.data_dir = Path(data_dir)
+        self.directory = self.data_dir / self.dirname
+        self.storage = storage or get_storage(self.data_dir)
+        self._indexes: Dict[Tuple[str, str], object] = {}
+        self._lock = threading.Lock()
+
+    def path_for(self, game_id: str, category_id: str) -> Path:
+        return self.directory / f"{game_id}_{category_id}.json"
+
+    def _load(self, game_id: str, category_id: str):
+        path = self.path_for(game_id, category_id)
+        if path.exists():
+            try:
+                return self.index_class.from_dict(json.loads(path.read_text(encoding='utf-8')))
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                logger.warning(f"Index illisible ({path}): {e}")
+        return self.index_class()
+
+    def get(self, game_id: str, category_id: str, rebuild: bool = True):
+        """Index d'une catégorie, reconstruit depuis le stockage s'il est périmé"""
+        with self._lock:
+            key = (game_id, category_id)
+            index = self._indexes.get(key)
+            if index is None:
+                index = self._load(game_id, category_id)
+            if rebuild and self.storage.exists(game_id, category_id):
+                fingerprint = self.storage.fingerprint(game_id, category_id)
+                if index.fingerprint != fingerprint:
+                    index = self._rebuild(game_id, category_id, fingerprint)
+            self._indexes[key] = index
+            return index
+
+    def rebuild(self, game_id: str, category_id: str):
+        """Reconstruit et sauvegarde l'index depuis le stockage (runs remplacées, pas seulement ajoutées)"""
+        with self._lock:
+            index = self._rebuild(game_id, category_id, self.storage.fingerprint(game_id, category_id))
+            self._indexes[(game_id, category_id)] = index
+            return index
+
+    def _rebuild(self, game_id: str, category_id: str, fingerprint: str):
+        index = self.index_class()
+        index.update(self.storage.read(game_id, category_id))
+        index.fingerprint = fingerprint
+        self._write(game_id, category_id, index)
+        logger.info(f"Index reconstruit ({self.label}) pour {game_id}_{category_id}")
+        return index
+
+    def update(self, game_id: str, category_id: str, df: pd.DataFrame):
+        """Intègre de nouvelles runs (sauvegardées au prochain save)"""
+        # L'index est validé contre le stockage au premier lot seulement :
+        # les lots suivants modifient l'empreinte de la partition
+        index = self._indexes.get((game_id, category_id))
+        if index is None:
+            index = self.get(game_id, category_id)
+        with self._lock:
+            return index.update(df)
+
+    def save(self, game_id: str, category_id: str) -> None:
+        """Sauvegarde l'index d'une catégorie avec l'empreinte actuelle de sa partition"""
+        with self._lock:
+            index = self._indexes.get((game_id, category_id))
+            if index is None:
+                return
+            index.fingerprint = self.storage.fingerprint(game_id, category_id)
+            self._write(game_id, category_id, index)
+
+    def _write(self, game_id: str, category_id: str, index) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.path_for(game_id, category_id)
+        tmp_path = path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps(index.to_dict()), encoding='utf-8')
+        os.replace(tmp_path, path)
+
+    def build(self) -> Dict[Tuple[str, str], object]:
+        """Charge (et reconstruit si besoin) les index de toutes les partitions"""
+        return {partition: self.get(*partition) for partition in self.storage.list_partitions()}
@@ -0,0 +1,165 @@
+"""
+Index des classements et des records personnels par catégorie
+
+Pour chaque catégorie, l'index conserve le meilleur temps de chaque joueur
+dans une liste triée (top-k et rang d'un temps par recherche dichotomique),
+l'historique des records personnels de chaque joueur et la progression du
+record du monde. Il est mis à jour par lots au fil de l'ingestion et
+persisté par partition : le tableau de bord n'a jamais à relire les runs.
+
+Les runs sont celles du schéma de SpeedrunDataProcessor (run_id, date,
+time_seconds, player, verified) ; seules les runs vérifiées avec un temps
+sont classées. Le filtrage des valeurs aberrantes de clean_data n'est pas
+appliqué : il écarterait le record du monde.
+"""
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from config.settings import LEADERBOARD_CONFIG
+from .index_store import PartitionIndexStore
+
+def _insert_record(records: List[list], record: list) -> bool:
+    """
+    Insère un record dans une progression triée par date (temps strictement décroissants)
+
+    Une run plus ancienne que la fin de la progression est acceptée : les
+    records postérieurs qu'elle ne bat plus sont retirés. Une date n'a
+    qu'un record (le meilleur temps du jour).
+    """
+    date, time = record[0], record[1]
+    # [date] précède toute entrée de même date (pas de key= avant Python 3.10)
+    position = bisect_left(records, [date])
+    if position and records[position - 1][1] <= time:
+        return False
+    if position < len(records) and records[position][0] == date and records[position][1] <= time:
+        return False
+    end = position
+    while end < len(records) and records[end][1] >= time:
+        end += 1
+    records[position:end] = [record]
+    return True
+
+def _rows(runs: pd.DataFrame) -> zip:
+    """(joueur, temps, run_id, jour ISO ou None) des runs d'un lot, en objets Python"""
+    days = runs['date'].dt.strftime('%Y-%m-%d').astype(object).where(runs['date'].notna(), None)
+    return zip(runs['player'].tolist(), runs['time'].tolist(), runs['run_id'].tolist(), days.tolist())
+
+class CategoryLeaderboard:
+    """Classement, records personnels et progression du record d'une catégorie"""
+    def __init__(self):
+        # (meilleur temps, joueur) triés : top-k et rangs en O(log n)
+        self._ranking: List[Tuple[float, str]] = []
+        self._best: Dict[str, list] = {}
+        self.pb_history: Dict[str, List[list]] = {}
+        self.wr_progression: List[list] = []
+        self.fingerprint = ''
+
+    def __len__(self) -> int:
+        return len(self._ranking)
+
+    def _improve(self, player: str, time: float, run_id: str, date: Optional[str]) -> bool:
+        current = self._best.get(player)
+        if current is not None and time >= current[0]:
+            return False
+        if current is not None:
+            del self._ranking[bisect_left(self._ranking, (current[0], player))]
+        insort(self._ranking, (time, player))
+        self._best[player] = [time, run_id, date]
+        return True
+
+    def add_run(self, player: str, time: float, run_id: str, date: Optional[str] = None) -> bool:
+        """Intègre une run ; renvoie True si c'est un nouveau record personnel"""
+        if date:
+            _insert_record(self.pb_history.setdefault(player, []), [date, time, run_id])
+            _insert_record(self.wr_progression, [date, time, player, run_id])
+        return self._improve(player, time, run_id, date)
+
+    def update(self, df: pd.DataFrame) -> int:
+        """
+        Intègre un lot de runs
+
+        Le classement n'est modifié qu'une fois par joueur (meilleur temps du
+        lot) ; seules les runs qui battent les temps antérieurs du lot, par
+        joueur ou toutes runs confondues, sont proposées aux historiques.
+
+        Returns:
+            Nombre de records personnels améliorés
+        """
+        if df.empty:
+            return 0
+        runs = pd.DataFrame({
+            'run_id': df['run_id'].astype(str),
+            'date': pd.to_datetime(df['date'], errors='coerce'),
+            'time': df['time_seconds'].astype('float64'),
+            'player': df['player'].astype(str)
+        })
+        if 'verified' in df:
+            runs = runs[df['verified'].fillna(False).astype(bool).to_numpy()]
+        runs = runs[runs['time'].notna() & (runs['time'] > 0)]
+        if runs.empty:
+            return 0
+
+        dated = runs[runs['date'].notna()].sort_values(['date', 'time'], kind='stable')
+        best_so_far = dated.groupby('player', sort=False)['time'].cummin()
+        previous = best_so_far.groupby(dated['player'], sort=False).shift().fillna(np.inf)
+        for player, time, run_id, day in _rows(dated[dated['time'] < previous]):
+            _insert_record(self.pb_history.setdefault(player, []), [day, time, run_id])
+        previous = dated['time'].cummin().shift().fillna(np.inf)
+        for player, time, run_id, day in _rows(dated[dated['time'] < previous]):
+            _insert_record(self.wr_progression, [day, time, player, run_id])
+
+        # Classement : meilleure run du lot de chaque joueur (runs sans date comprises)
+        fastest = runs.loc[runs.groupby('player', sort=False)['time'].idxmin()]
+        improved = 0
+        for player, time, run_id, day in _rows(fastest):
+            improved += self._improve(player, time, run_id, day)
+        return improved
+
+    # Requêtes
+
+    def top(self, k: int = 10) -> List[Dict]:
+        """k meilleurs joueurs (temps égaux : même rang)"""
+        return [self._entry(player, time) for time, player in self._ranking[:k]]
+
+    def rank_of(self, time: float) -> int:
+        """Rang qu'obtiendrait un temps dans le classement actuel"""
+        return bisect_left(self._ranking, (time, '')) + 1
+
+    def player_entry(self, player: str) -> Optional[Dict]:
+        best = self._best.get(player)
+        return self._entry(player, best[0]) if best else None
+
+    def _entry(self, player: str, time: float) -> Dict:
+        _, run_id, date = self._best[player]
+        return {'rank': self.rank_of(time), 'player': player, 'time_seconds': time,
+                'run_id': run_id, 'date': date}
+
+    def world_record(self) -> Optional[Dict]:
+        return self.top(1)[0] if self._ranking else None
+
+    # Persistance
+
+    def to_dict(self) -> Dict:
+        return {
+            'fingerprint': self.fingerprint,
+            'best': {player: self._best[player] for _, player in self._ranking},
+            'pb_history': self.pb_history,
+            'wr_progression': self.wr_progression
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'CategoryLeaderboard':
+        board = cls()
+        board.fingerprint = data.get('fingerprint', '')
+        board._best = data.get('best', {})
+        board._ranking = sorted((best[0], player) for player, best in board._best.items())
+        board.pb_history = data.get('pb_history', {})
+        board.wr_progression = data.get('wr_progression', [])
+        return board
+
+class LeaderboardStore(PartitionIndexStore):
+    """Index des classements de toutes les catégories (data/.leaderboards/)"""
+    index_class = CategoryLeaderboard
+    dirname = LEADERBOARD_CONFIG['dir']
+    label = 'classement'
@@ -0,0 +1,165 @@
+"""
+Étape de calcul des métriques par catégorie
+
+Les catégories sont traitées en parallèle dans un pool de processus et les
+résultats sont conservés par empreinte de partition : seules les catégories
+modifiées depuis le dernier calcul sont recalculées.
+
+live_metrics fusionne les résumés par partition (AccumulatorStore), tenus à
+jour par le collecteur à chaque synchronisation : métriques d'un jeu ou de
+tout le dossier sans relire les runs, sur données non nettoyées et aux
+tolérances de src/metrics/streaming.py.
+
+Usage: python -m src.metrics.pipeline [data_dir] [--workers N] [--force] [--live]
+"""
+import argparse
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from config.settings import CLEANING_CONFIG, METRICS_CONFIG, STORAGE_CONFIG
+from ..data.processor import SpeedrunDataProcessor
+from ..data.storage import get_storage
+from .streaming import AccumulatorStore
+from ..utils import instrumentation
+
+logger = logging.getLogger(__name__)
+
+_cache_lock = threading.Lock()
+
+def _compute_partition(data_dir: str, fmt: str, game_id: str, category_id: str) -> Dict:
+    """Nettoie une partition et calcule ses métriques (exécuté dans un processus du pool)"""
+    processor = SpeedrunDataProcessor()
+    df = get_storage(Path(data_dir), fmt).read(game_id, category_id)
+    return processor.calculate_metrics(processor.clean_data(df))
+
+def _cleaning_signature() -> Dict:
+    """Paramètres du nettoyage qui influent sur les métriques (forme JSON)"""
+    return json.loads(json.dumps({key: value for key, value in CLEANING_CONFIG.items() if key != 'max_workers'}))
+
+def _load_cache(path: Path) -> Dict[str, Dict]:
+    if not path.exists():
+        return {}
+    try:
+        cache = json.loads(path.read_text(encoding='utf-8'))
+    except (OSError, ValueError) as e:
+        logger.warning(f"Cache de métriques illisible ({path}): {e}")
+        return {}
+    # Métriques calculées avec un autre nettoyage : recalculées
+    if cache.get('version') != METRICS_CONFIG['cache_version'] or cache.get('cleaning') != _cleaning_signature():
+        return {}
+    return cache.get('partitions', {})
+
+def _save_cache(path: Path, partitions: Dict[str, Dict]) -> None:
+    tmp_path = path.with_suffix('.tmp')
+    payload = {'version': METRICS_CONFIG['cache_version'], 'cleaning': _cleaning_signature(),
+               'partitions': partitions}
+    tmp_path.write_text(json.dumps(payload, sort_keys=True), encoding='utf-8')
+    os.replace(tmp_path, path)
+
+@instrumentation.timed('speedrun_stage_seconds', stage='build_metrics')
+def build_metrics(data_dir: Path, max_workers: Optional[int] = None, force: bool = False,
+                  fmt: Optional[str] = None) -> Dict[Tuple[str, str], Dict]:
+    """
+    Calcule (ou relit depuis le cache) les métriques de toutes les catégories
+
+    Args:
+        data_dir: Dossier des données
+        max_workers: Taille du pool de processus (1 : calcul séquentiel)
+        force: Recalcule toutes les catégories en ignorant le cache
+        fmt: Format de stockage (STORAGE_CONFIG['format'] par défaut)
+
+    Returns:
+        Entrées {'fingerprint', 'processed_at', 'metrics'} par (game_id, category_id)
+    """
+    data_dir = Path(data_dir)
+    fmt = fmt or STORAGE_CONFIG['format']
+    storage = get_storage(data_dir, fmt)
+    cache_path = data_dir / METRICS_CONFIG['cache_file']
+
+    with _cache_lock:
+        cached = {} if force else _load_cache(cache_path)
+        entries: Dict[str, Dict] = {}
+        stale: List[Tuple[str, str, str]] = []
+        for game_id, category_id in storage.list_partitions():
+            key = f"{game_id}_{category_id}"
+            fingerprint = storage.fingerprint(game_id, category_id)
+            if key in cached and cached[key]['fingerprint'] == fingerprint:
+                entries[key] = cached[key]
+            else:
+                stale.append((game_id, category_id, fingerprint))
+
+        if stale:
+            workers = max_workers or METRICS_CONFIG['max_workers'] or os.cpu_count() or 1
+            workers = min(workers, len(stale))
+            logger.info(f"Calcul des métriques de {len(stale)} catégories ({workers} processus)")
+            args = [(str(data_dir), fmt, game_id, category_id) for game_id, category_id, _ in stale]
+            if workers > 1:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    futures = [pool.submit(_compute_partition, *arg) for arg in args]
+                    results = [_result_or_none(future, arg) for future, arg in zip(futures, args)]
+            else:
+                results = [_call_or_none(arg) for arg in args]
+
+            for (game_id, category_id, fingerprint), metrics in zip(stale, results):
+                if metrics is not None:
+                    entries[f"{game_id}_{category_id}"] = {
+                        'fingerprint': fingerprint,
+                        'processed_at': datetime.now().isoformat(),
+                        'metrics': metrics
+                    }
+
+        if stale or entries.keys() != cached.keys():
+            _save_cache(cache_path, entries)
+
+    return {tuple(key.split('_', 1)): entry for key, entry in entries.items()}
+
+def live_metrics(data_dir: Path, game_id: Optional[str] = None) -> Optional[Dict]:
+    """
+    Métriques fusionnées des résumés par partition (d'un jeu, ou de tout le dossier)
+
+    Un résumé périmé (partition modifiée hors collecte) est reconstruit depuis
+    le stockage ; les autres ne relisent aucune run.
+    """
+    return AccumulatorStore(Path(data_dir)).merged(game_id).to_metrics()
+
+def _result_or_none(future, args: Tuple) -> Optional[Dict]:
+    try:
+        return future.result()
+    except Exception as e:
+        logger.error(f"Erreur lors du traitement de {args[2]}_{args[3]}: {e}")
+        return None
+
+def _call_or_none(args: Tuple) -> Optional[Dict]:
+    try:
+        return _compute_partition(*args)
+    except Exception as e:
+        logger.error(f"Erreur lors du traitement de {args[2]}_{args[3]}: {e}")
+        return None
+
+def main():
+    from ..utils.logging_config import setup_logging
+
+    parser = argparse.ArgumentParser(description="Calcul des métriques par catégorie")
+    parser.add_argument('data_dir', type=Path, nargs='?', default=Path('data'))
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--force', action='store_true', help="Ignore le cache de métriques")
+    parser.add_argument('--live', action='store_true',
+                        help="Affiche les métriques fusionnées de chaque jeu (résumés par partition)")
+    args = parser.parse_args()
+
+    setup_logging()
+    if args.live:
+        games = sorted({game_id for game_id, _ in get_storage(args.data_dir).list_partitions()})
+        print(json.dumps({game_id: live_metrics(args.data_dir, game_id) for game_id in games},
+                         indent=2, default=str))
+        return
+    entries = build_metrics(args.data_dir, max_workers=args.workers, force=args.force)
+    logger.info(f"Métriques disponibles pour {len(entries)} catégories")
+
+if __name__ == '__main__':
+    main()
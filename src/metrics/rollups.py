@@ -0,0 +1,219 @@
+"""
+Agrégats temporels par catégorie (jour, semaine, mois)
+
+Chaque période conserve le nombre de runs, le meilleur temps, un sketch
+de quantiles (médiane exacte tant que la période compte au plus k runs),
+le nombre de nouveaux joueurs et le nombre de runs sur émulateur. Les
+agrégats sont mis à jour par lots pendant la collecte : tendances et
+graphiques se calculent sur quelques centaines de lignes au lieu de
+regrouper toutes les runs.
+
+Sur disque, seuls les mois gardent leur sketch (borné par k) ; un jour ou
+une semaine ne garde qu'un résumé de summary_points quantiles, de taille
+fixe, d'où un sketch approché est reconstruit au chargement : la taille
+des fichiers dépend du nombre de périodes, pas du nombre de runs.
+
+Les périodes sont identifiées par leur premier jour (semaines ISO
+commençant le lundi) ; les runs sans date sont ignorées.
+"""
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+from config.settings import ROLLUP_CONFIG
+from .calculator import MetricsCalculator
+from .index_store import PartitionIndexStore
+from .streaming import QuantileSketch
+
+GRANULARITIES = ('day', 'week', 'month')
+
+_EPOCH = np.datetime64('1970-01-01', 'D')
+
+def period_starts(days: np.ndarray, granularity: str) -> np.ndarray:
+    """Premier jour (jours depuis 1970-01-01) de la période de chaque jour"""
+    if granularity == 'day':
+        return days
+    if granularity == 'week':
+        # Le 1970-01-01 est un jeudi : lundi = jour - (jour + 3) % 7
+        return days - (days + 3) % 7
+    if granularity == 'month':
+        unique_days, inverse = np.unique(days, return_inverse=True)
+        months = (unique_days + _EPOCH).astype('datetime64[M]').astype('datetime64[D]')
+        return (months - _EPOCH).astype('int64')[inverse]
+    raise ValueError(f"Granularité inconnue: {granularity}")
+
+def _to_day(value) -> int:
+    return int((np.datetime64(pd.Timestamp(value).date(), 'D') - _EPOCH).astype('int64'))
+
+class CategoryRollup:
+    """Agrégats jour / semaine / mois d'une catégorie, mis à jour par lots"""
+    def __init__(self, k: Optional[int] = None):
+        self.k = k or ROLLUP_CONFIG['sketch_k']
+        # Période -> [runs, runs sur émulateur, nouveaux joueurs, meilleur temps, sketch]
+        self.buckets: Dict[str, Dict[int, list]] = {granularity: {} for granularity in GRANULARITIES}
+        self.first_seen: Dict[str, int] = {}
+        self.fingerprint = ''
+        self._keys: Dict[str, List[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.buckets['day'])
+
+    def update(self, df: pd.DataFrame) -> int:
+        """
+        Intègre un lot de runs
+
+        Returns:
+            Nombre de runs datées intégrées
+        """
+        if df.empty:
+            return 0
+        dates = pd.to_datetime(df['date'], errors='coerce')
+        mask = dates.notna().to_numpy()
+        if not mask.any():
+            return 0
+        days = (dates[mask].to_numpy(dtype='datetime64[ns]').astype('datetime64[D]') - _EPOCH).astype('int64')
+        # Temps arrondis à la milliseconde (précision de l'API), identiques une fois persistés
+        times = np.round(df['time_seconds'].to_numpy(dtype='float64')[mask], 3)
+        emulator = (df['emulator'].fillna(False).to_numpy(dtype=bool)[mask] if 'emulator' in df
+                    else np.zeros(len(days), dtype=bool))
+
+        for granularity in GRANULARITIES:
+            keys, inverse = np.unique(period_starts(days, granularity), return_inverse=True)
+            counts = np.bincount(inverse)
+            emulator_counts = np.bincount(inverse, weights=emulator)
+            order = np.argsort(inverse, kind='stable')
+            sorted_times = times[order]
+            offsets = np.concatenate([[0], np.cumsum(counts)[:-1]])
+            best_times = np.fmin.reduceat(sorted_times, offsets)
+            buckets = self.buckets[granularity]
+            for key, count, emulated, best, start in zip(keys.tolist(), counts.tolist(),
+                                                          emulator_counts.tolist(), best_times.tolist(),
+                                                          offsets.tolist()):
+                bucket = buckets.get(key)
+                if bucket is None:
+                    bucket = buckets[key] = [0, 0, 0, np.nan, QuantileSketch(self.k)]
+                bucket[0] += count
+                bucket[1] += int(emulated)
+                bucket[3] = float(np.fmin(bucket[3], best))
+                bucket[4].update(sorted_times[start:start + count])
+
+        self._update_new_players(df['player'].astype(str).to_numpy()[mask], days)
+        self._keys.clear()
+        return int(mask.sum())
+
+    def _update_new_players(self, players: np.ndarray, days: np.ndarray) -> None:
+        """Première apparition de chaque joueur ; une run plus ancienne déplace son arrivée"""
+        first_days = pd.Series(days).groupby(players, sort=False).min()
+        arrivals, departures = [], []
+        for player, day in zip(first_days.index.tolist(), first_days.tolist()):
+            previous = self.first_seen.get(player)
+            if previous is None or day < previous:
+                if previous is not None:
+                    departures.append(previous)
+                arrivals.append(day)
+                self.first_seen[player] = day
+        for days_changed, delta in ((arrivals, 1), (departures, -1)):
+            if not days_changed:
+                continue
+            for granularity in GRANULARITIES:
+                buckets = self.buckets[granularity]
+                for key in period_starts(np.asarray(days_changed, dtype='int64'), granularity).tolist():
+                    buckets[key][2] += delta
+
+    # Requêtes
+
+    def _range(self, granularity: str, start=None, end=None) -> List[int]:
+        """Périodes chevauchant la fenêtre [start, end], par recherche dichotomique"""
+        if granularity not in self.buckets:
+            raise ValueError(f"Granularité inconnue: {granularity}")
+        keys = self._keys.get(granularity)
+        if keys is None:
+            keys = self._keys[granularity] = sorted(self.buckets[granularity])
+        low = 0
+        if start is not None:
+            low = bisect_left(keys, int(period_starts(np.array([_to_day(start)]), granularity)[0]))
+        high = len(keys) if end is None else bisect_right(keys, _to_day(end))
+        return keys[low:high]
+
+    def frame(self, granularity: str = 'month', start=None, end=None) -> pd.DataFrame:
+        """
+        Agrégats des périodes chevauchant la fenêtre [start, end] (bornes incluses, optionnelles)
+
+        Returns:
+            period, runs, best_time, median_time, new_players, emulator_share
+        """
+        keys = self._range(granularity, start, end)
+        selected = [self.buckets[granularity][key] for key in keys]
+        runs = np.array([bucket[0] for bucket in selected], dtype='int64')
+        return pd.DataFrame({
+            'period': (np.array(keys, dtype='int64') + _EPOCH).astype('datetime64[ns]'),
+            'runs': runs,
+            'best_time': np.array([bucket[3] for bucket in selected], dtype='float64'),
+            'median_time': np.array([bucket[4].quantile(0.5) for bucket in selected], dtype='float64'),
+            'new_players': np.array([bucket[2] for bucket in selected], dtype='int64'),
+            'emulator_share': np.array([bucket[1] for bucket in selected], dtype='float64') / np.maximum(runs, 1) * 100
+        })
+
+    def monthly_runs(self, start=None, end=None) -> pd.Series:
+        """Nombre de runs par mois (mois sans run exclus), comme streaming.monthly_counts"""
+        keys = self._range('month', start, end)
+        months = (np.array(keys, dtype='int64') + _EPOCH).astype('datetime64[M]')
+        return pd.Series([self.buckets['month'][key][0] for key in keys], dtype='int64',
+                         index=pd.PeriodIndex(months, freq='M'))
+
+    def trend_metrics(self, start=None, end=None) -> Dict[str, float]:
+        """Métriques de tendance (MetricsCalculator) à partir des agrégats mensuels"""
+        return MetricsCalculator.calculate_trend_from_counts(self.monthly_runs(start, end))
+
+    def runs_per_month(self, start=None, end=None) -> float:
+        monthly = self.monthly_runs(start, end)
+        return float(monthly.mean()) if len(monthly) else np.nan
+
+    # Persistance
+
+    @staticmethod
+    def _bucket_to_list(granularity: str, bucket: list) -> list:
+        """Période persistée : sketch pour un mois, résumé de quantiles sinon ; null pour un meilleur temps absent"""
+        runs, emulated, new_players, best, sketch = bucket
+        if granularity == 'month':
+            quantiles = sketch.to_dict()['levels']
+        else:
+            quantiles = np.round(sketch.summary(ROLLUP_CONFIG['summary_points']), 3).tolist()
+        return [runs, emulated, new_players, None if np.isnan(best) else best, quantiles]
+
+    def _bucket_from_list(self, bucket: list) -> list:
+        runs, emulated, new_players, best, quantiles = bucket
+        best = np.nan if best is None else best
+        if quantiles and isinstance(quantiles[0], list):
+            sketch = QuantileSketch.from_dict({'k': self.k, 'levels': quantiles})
+        else:
+            sketch = QuantileSketch.from_summary(quantiles, runs, self.k)
+        return [runs, emulated, new_players, best, sketch]
+
+    def to_dict(self) -> Dict:
+        return {
+            'fingerprint': self.fingerprint,
+            'k': self.k,
+            'buckets': {
+                granularity: {str(key): self._bucket_to_list(granularity, bucket)
+                              for key, bucket in buckets.items()}
+                for granularity, buckets in self.buckets.items()
+            },
+            'first_seen': self.first_seen
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'CategoryRollup':
+        rollup = cls(data.get('k'))
+        rollup.fingerprint = data.get('fingerprint', '')
+        for granularity, buckets in data.get('buckets', {}).items():
+            rollup.buckets[granularity] = {int(key): rollup._bucket_from_list(bucket)
+                                           for key, bucket in buckets.items()}
+        rollup.first_seen = data.get('first_seen', {})
+        return rollup
+
+class RollupStore(PartitionIndexStore):
+    """Agrégats temporels de toutes les catégories (data/.rollups/)"""
+    index_class = CategoryRollup
+    dirname = ROLLUP_CONFIG['dir']
+    label = 'agrégats temporels'
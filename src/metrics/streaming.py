@@ -0,0 +1,377 @@
+"""
+Statistiques des temps en une passe et résumés fusionnables
+
+- time_statistics / calculate_run_metrics : calcul exact et vectorisé de toutes
+  les métriques d'une catégorie (sélection partielle, pas de série intermédiaire)
+- MetricsAccumulator : résumé incrémental et fusionnable entre partitions
+  (moments de Welford, quantiles KLL, HyperLogLog pour les joueurs uniques)
+- AccumulatorStore : un résumé persisté par partition, mis à jour par le
+  collecteur à chaque synchronisation ; live_metrics les fusionne par jeu
+  ou pour tout le dossier sans relire les runs
+
+Les résumés portent sur les runs stockées, sans le filtrage des valeurs
+aberrantes de clean_data (ses bornes dépendent de toute la catégorie) : les
+métriques nettoyées restent celles de build_metrics.
+
+Tolérances documentées de MetricsAccumulator par rapport au calcul exact :
+- total_runs, best_time, emulator_percentage, runs_per_month, platform_distribution : exacts
+- avg_time, std_time : exacts à l'arrondi flottant près (erreur relative < 1e-9)
+- median_time : erreur de rang de l'ordre de 1.7 / k (k = 200 : ~1 % des runs)
+- unique_players : erreur relative type 1.04 / sqrt(2 ** p) (p = 12 : ~1.6 %)
+- difficulty_score : dérivé des valeurs ci-dessus (hérite de l'erreur sur la médiane)
+"""
+import base64
+import math
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+import pandas as pd
+from config.settings import METRICS_CONFIG
+from .index_store import PartitionIndexStore
+
+def time_statistics(times: np.ndarray) -> Dict[str, float]:
+    """Effectif, moyenne, écart-type (ddof=1), minimum, maximum et médiane des temps"""
+    times = np.asarray(times, dtype='float64')
+    times = times[~np.isnan(times)]
+    count = len(times)
+    if not count:
+        return {'count': 0, 'mean': math.nan, 'std': math.nan, 'min': math.nan, 'max': math.nan, 'median': math.nan}
+    mean = float(times.mean())
+    std = float(times.std(ddof=1)) if count > 1 else math.nan
+    # Sélection partielle (O(n)) plutôt qu'un tri complet pour la médiane
+    middle = count // 2
+    if count % 2:
+        median = float(np.partition(times, middle)[middle])
+    else:
+        lower_half = np.partition(times, (middle - 1, middle))
+        median = float((lower_half[middle - 1] + lower_half[middle]) / 2)
+    return {
+        'count': count,
+        'mean': mean,
+        'std': std,
+        'min': float(times.min()),
+        'max': float(times.max()),
+        'median': median
+    }
+
+def difficulty_from_stats(stats: Dict[str, float]) -> float:
+    """
+    Score de difficulté à partir des statistiques des temps
+
+    L'écart-type des temps normalisés (t - min) / (max - min) vaut
+    std / (max - min) : inutile de construire la série normalisée.
+    """
+    spread = stats['max'] - stats['min']
+    completion_variance = stats['std'] / spread if spread else math.nan
+    completion_variance = float(completion_variance or 0)
+    time_spread = float(spread / stats['median']) if stats['count'] else 0.0
+    return float(((completion_variance * 0.6 + time_spread * 0.4) * 100))
+
+def monthly_counts(dates: pd.Series) -> pd.Series:
+    """Nombre de runs par mois (mois sans run exclus, dates manquantes ignorées)"""
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates, errors='coerce')
+    days = dates.to_numpy(dtype='datetime64[ns]').astype('datetime64[D]')
+    days = days[~np.isnat(days)].astype('int64')
+    if not len(days):
+        return pd.Series([], dtype='int64', index=pd.PeriodIndex([], freq='M'))
+    # Comptage par jour en O(n), puis conversion calendaire des seuls jours distincts
+    first_day = days.min()
+    day_counts = np.bincount(days - first_day)
+    present = np.flatnonzero(day_counts)
+    months = (present + first_day).astype('datetime64[D]').astype('datetime64[M]')
+    values, inverse = np.unique(months, return_inverse=True)
+    counts = np.bincount(inverse, weights=day_counts[present]).astype('int64')
+    return pd.Series(counts, index=pd.PeriodIndex(values, freq='M'))
+
+def calculate_run_metrics(df: pd.DataFrame) -> Dict:
+    """Métriques principales d'une catégorie, en une passe vectorisée par colonne"""
+    stats = time_statistics(df['time_seconds'].to_numpy(dtype='float64'))
+    counts = df['platform'].value_counts()
+    months = monthly_counts(df['date'])
+    return {
+        'total_runs': len(df),
+        'unique_players': int(df['player'].nunique()),
+        'avg_time': stats['mean'],
+        'median_time': stats['median'],
+        'std_time': stats['std'],
+        'best_time': stats['min'],
+        'platform_distribution': {str(key): int(value) for key, value in counts[counts > 0].items()},
+        'emulator_percentage': float((df['emulator'].sum() / len(df)) * 100),
+        'runs_per_month': float(months.mean()) if len(months) else math.nan,
+        'difficulty_score': difficulty_from_stats(stats)
+    }
+
+class RunningStats:
+    """Moments de Welford (effectif, moyenne, M2) et extrema, fusionnables (Chan et al.)"""
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype='float64')
+        values = values[~np.isnan(values)]
+        if len(values):
+            batch = RunningStats()
+            batch.count = len(values)
+            batch.mean = float(values.mean())
+            batch.m2 = float(((values - batch.mean) ** 2).sum())
+            batch.min = float(values.min())
+            batch.max = float(values.max())
+            self.merge(batch)
+
+    def merge(self, other: 'RunningStats') -> None:
+        if not other.count:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else math.nan
+
+    def to_dict(self) -> Dict:
+        # Extrema infinis (aucune valeur) persistés comme null
+        return {'count': self.count, 'mean': self.mean, 'm2': self.m2,
+                'min': self.min if self.count else None, 'max': self.max if self.count else None}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'RunningStats':
+        stats = cls()
+        if data['count']:
+            stats.count, stats.mean, stats.m2 = data['count'], data['mean'], data['m2']
+            stats.min, stats.max = data['min'], data['max']
+        return stats
+
+class QuantileSketch:
+    """
+    Sketch de quantiles KLL simplifié, fusionnable
+
+    Le niveau h contient des éléments de poids 2 ** h ; un niveau plein est
+    trié puis compacté en promouvant un élément sur deux au niveau supérieur.
+    """
+    def __init__(self, k: int = 200, seed: int = 0):
+        self.k = k
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(2, int(math.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self) -> None:
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                kept = items[:len(items) % 2]
+                promoted = items[len(kept) + self._rng.integers(2)::2]
+                self.levels[level] = kept
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def update(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype='float64')
+        self.levels[0] = np.concatenate([self.levels[0], values[~np.isnan(values)]])
+        self._compress()
+
+    def merge(self, other: 'QuantileSketch') -> None:
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self._compress()
+
+    def to_dict(self) -> Dict:
+        return {'k': self.k, 'levels': [items.tolist() for items in self.levels]}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'QuantileSketch':
+        sketch = cls(data['k'])
+        sketch.levels = [np.asarray(items, dtype='float64') for items in data['levels']] or [np.empty(0)]
+        return sketch
+
+    def summary(self, points: int) -> List[float]:
+        """Valeurs exactes (au plus points) ou quantiles (i + 0.5) / points, de même masse"""
+        if len(self.levels) == 1 and len(self.levels[0]) <= points:
+            return np.sort(self.levels[0]).tolist()
+        return [self.quantile((i + 0.5) / points) for i in range(points)]
+
+    @classmethod
+    def from_summary(cls, values: List[float], count: int, k: int = 200) -> 'QuantileSketch':
+        """Sketch approché à partir d'un résumé (summary) de count valeurs"""
+        sketch = cls(k)
+        if not values or len(values) >= count:
+            sketch.levels = [np.asarray(values, dtype='float64')]
+            return sketch
+        # Chaque valeur du résumé représente count / len(values) éléments : poids 2 ** level le plus proche
+        level = max(0, int(round(math.log2(count / len(values)))))
+        sketch.levels = [np.empty(0) for _ in range(level)] + [np.asarray(values, dtype='float64')]
+        return sketch
+
+    def quantile(self, q: float) -> float:
+        if len(self.levels) == 1:
+            # Aucune compaction : quantile exact (interpolation linéaire, comme pandas)
+            return float(np.quantile(self.levels[0], q)) if len(self.levels[0]) else math.nan
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 2.0 ** level) for level, items in enumerate(self.levels)])
+        order = np.argsort(values, kind='stable')
+        cumulative = np.cumsum(weights[order])
+        position = np.searchsorted(cumulative, q * cumulative[-1], side='left')
+        return float(values[order][min(position, len(values) - 1)])
+
+class HyperLogLog:
+    """Estimation du nombre de valeurs distinctes (registres fusionnables par maximum)"""
+    def __init__(self, p: int = 12):
+        if not 11 <= p <= 18:
+            raise ValueError("La précision p doit être comprise entre 11 et 18")
+        self.p = p
+        self.registers = np.zeros(1 << p, dtype=np.uint8)
+
+    def update(self, values: Iterable) -> None:
+        values = pd.Series(values, dtype=object).dropna().astype(str).to_numpy(dtype=object)
+        if not len(values):
+            return
+        hashes = pd.util.hash_array(values)
+        index = (hashes >> np.uint64(64 - self.p)).astype(np.int64)
+        # Les 64 - p bits restants tiennent exactement dans la mantisse d'un float64
+        remainder = (hashes & np.uint64((1 << (64 - self.p)) - 1)).astype('float64')
+        bit_length = np.frexp(remainder)[1]
+        rank = (64 - self.p - bit_length + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other: 'HyperLogLog') -> None:
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def to_dict(self) -> Dict:
+        return {'p': self.p, 'registers': base64.b64encode(self.registers.tobytes()).decode('ascii')}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'HyperLogLog':
+        hll = cls(data['p'])
+        hll.registers = np.frombuffer(base64.b64decode(data['registers']), dtype=np.uint8).copy()
+        return hll
+
+    def estimate(self) -> float:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.exp2(-self.registers.astype('float64')))
+        zeros = int((self.registers == 0).sum())
+        if raw <= 2.5 * m and zeros:
+            return m * math.log(m / zeros)
+        return float(raw)
+
+class MetricsAccumulator:
+    """
+    Résumé incrémental des métriques d'une catégorie
+
+    update() intègre un lot de runs, merge() combine deux résumés (autres
+    partitions, autres processus) et to_metrics() produit le même dictionnaire
+    que SpeedrunDataProcessor.calculate_metrics, aux tolérances du module près.
+    """
+    def __init__(self, k: int = 200, p: int = 12):
+        self.times = RunningStats()
+        self.quantiles = QuantileSketch(k)
+        self.players = HyperLogLog(p)
+        self.emulator_runs = 0
+        self.platforms: Dict[str, int] = {}
+        self.months: Dict[pd.Period, int] = {}
+        self.fingerprint = ''
+
+    def __len__(self) -> int:
+        return self.times.count
+
+    def update(self, df: pd.DataFrame) -> 'MetricsAccumulator':
+        times = df['time_seconds'].to_numpy(dtype='float64')
+        self.times.update(times)
+        self.quantiles.update(times)
+        self.players.update(df['player'])
+        self.emulator_runs += int(df['emulator'].sum())
+        counts = df['platform'].value_counts()
+        for platform, count in counts[counts > 0].items():
+            self.platforms[str(platform)] = self.platforms.get(str(platform), 0) + int(count)
+        for month, count in monthly_counts(df['date']).items():
+            self.months[month] = self.months.get(month, 0) + int(count)
+        return self
+
+    def merge(self, other: 'MetricsAccumulator') -> 'MetricsAccumulator':
+        self.times.merge(other.times)
+        self.quantiles.merge(other.quantiles)
+        self.players.merge(other.players)
+        self.emulator_runs += other.emulator_runs
+        for platform, count in other.platforms.items():
+            self.platforms[platform] = self.platforms.get(platform, 0) + count
+        for month, count in other.months.items():
+            self.months[month] = self.months.get(month, 0) + count
+        return self
+
+    def to_metrics(self) -> Optional[Dict]:
+        if not self.times.count:
+            return None
+        stats = {
+            'count': self.times.count,
+            'mean': self.times.mean,
+            'std': self.times.std,
+            'min': self.times.min,
+            'max': self.times.max,
+            'median': self.quantiles.quantile(0.5)
+        }
+        return {
+            'total_runs': self.times.count,
+            'unique_players': int(round(self.players.estimate())),
+            'avg_time': stats['mean'],
+            'median_time': stats['median'],
+            'std_time': stats['std'],
+            'best_time': stats['min'],
+            'platform_distribution': dict(self.platforms),
+            'emulator_percentage': float(self.emulator_runs / self.times.count * 100),
+            'runs_per_month': float(np.mean(list(self.months.values()))) if self.months else math.nan,
+            'difficulty_score': difficulty_from_stats(stats)
+        }
+
+    def to_dict(self) -> Dict:
+        return {
+            'fingerprint': self.fingerprint,
+            'times': self.times.to_dict(),
+            'quantiles': self.quantiles.to_dict(),
+            'players': self.players.to_dict(),
+            'emulator_runs': self.emulator_runs,
+            'platforms': self.platforms,
+            'months': {str(month): count for month, count in self.months.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'MetricsAccumulator':
+        accumulator = cls()
+        accumulator.fingerprint = data.get('fingerprint', '')
+        accumulator.times = RunningStats.from_dict(data['times'])
+        accumulator.quantiles = QuantileSketch.from_dict(data['quantiles'])
+        accumulator.players = HyperLogLog.from_dict(data['players'])
+        accumulator.emulator_runs = data['emulator_runs']
+        accumulator.platforms = data['platforms']
+        accumulator.months = {pd.Period(month, freq='M'): count for month, count in data['months'].items()}
+        return accumulator
+
+class AccumulatorStore(PartitionIndexStore):
+    """Résumés de métriques de toutes les catégories (data/.accumulators/)"""
+    index_class = MetricsAccumulator
+    dirname = METRICS_CONFIG['accumulator_dir']
+    label = 'résumés de métriques'
+
+    def merged(self, game_id: Optional[str] = None) -> MetricsAccumulator:
+        """Fusion des résumés des partitions (d'un jeu, ou de tout le dossier)"""
+        total = MetricsAccumulator()
+        for partition_game, category_id in self.storage.list_partitions():
+            if game_id is None or partition_game == game_id:
+                total.merge(self.get(partition_game, category_id))
+        return total
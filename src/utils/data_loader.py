@@ -1,70 +1,333 @@
 import pandas as pd
+import json
+import os
+import threading
+from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 import logging
-from datetime import datetime
+from ..data.cleaning import clean_dataset
+from ..data.compact import CompactRuns
 from ..data.processor import SpeedrunDataProcessor
-from config.settings import GAME_NAMES
-from ..api.speedrun_api import SpeedrunAPI
+from ..utils.platform_mapping import get_platform_name
+from ..data.metadata import get_metadata_index
+from ..data.storage import get_storage
+from ..metrics.pipeline import build_metrics
+from ..metrics.leaderboard import LeaderboardStore
+from ..metrics.rollups import RollupStore
+from ..metrics import charts
+from ..metrics.batch import compare_categories, load_combined
+from . import instrumentation
+from config.settings import DASHBOARD_CONFIG, LEADERBOARD_CONFIG, METADATA_CONFIG
 
 logger = logging.getLogger(__name__)
 
-def get_category_name(game_id: str, category_id: str) -> str:
-    """Récupère le nom de la catégorie à partir de son ID"""
+# Catalogue et tableau comparatif par dossier de données : (signature des données, résultat)
+_catalogues: Dict[Path, Tuple[Tuple, List[Dict]]] = {}
+_comparisons: Dict[Path, Tuple[Tuple, pd.DataFrame]] = {}
+_catalogues_lock = threading.Lock()
+# Instantané publié par le service de collecte : (date de modification, contenu)
+_snapshots: Dict[Path, Tuple[int, Dict]] = {}
+
+def get_category_name(game_id: str, category_id: str, data_dir: Path = Path('data')) -> str:
+    """Récupère le nom de la catégorie à partir de son ID (index de métadonnées local)"""
     try:
-        api = SpeedrunAPI()
-        categories = api.get_game_categories(game_id)
-        for category in categories:
-            if category['id'] == category_id:
-                return category['name']
-        return category_id
+        index = get_metadata_index(data_dir)
+        name = index.category_name(category_id)
+        if name is None and index.needs_fetch(game_id):
+            # Un seul appel groupé par jeu inconnu, conservé dans l'index
+            index.refresh([game_id], include_platforms=False)
+            name = index.category_name(category_id)
+        return name or category_id
     except Exception as e:
         logger.error(f"Erreur lors de la récupération du nom de la catégorie: {e}")
         return category_id
 
-def load_processed_data(data_dir: Path) -> List[Dict]:
+def _resolve_platforms(distribution: Dict[str, int]) -> Dict[str, int]:
+    resolved: Dict[str, int] = {}
+    for platform, count in distribution.items():
+        name = get_platform_name(platform)
+        resolved[name] = resolved.get(name, 0) + count
+    return resolved
+
+@lru_cache(maxsize=None)
+def _leaderboard_store(data_dir: str) -> LeaderboardStore:
+    return LeaderboardStore(Path(data_dir))
+
+@lru_cache(maxsize=None)
+def _rollup_store(data_dir: str) -> RollupStore:
+    return RollupStore(Path(data_dir))
+
+def load_rollup(data_dir: Path, game_id: str, category_id: str, granularity: str = 'month',
+                start=None, end=None) -> Tuple[pd.DataFrame, Dict]:
+    """
+    Agrégats temporels d'une catégorie sur une fenêtre de dates (sans relire les runs)
+
+    Returns:
+        Agrégats par période et métriques de tendance de la fenêtre
+    """
+    try:
+        rollup = _rollup_store(str(Path(data_dir).resolve())).get(game_id, category_id)
+        periods = rollup.frame(granularity, start, end)
+        trend = rollup.trend_metrics(start, end) if len(periods) > 1 else {}
+        return periods, trend
+    except Exception as e:
+        logger.error(f"Erreur lors du chargement des agrégats de {game_id}_{category_id}: {e}")
+        return pd.DataFrame(), {}
+
+def data_signature(data_dir: Path) -> Tuple:
+    """Empreinte du dossier de données : fichiers de chaque partition et index de métadonnées"""
+    storage = get_storage(data_dir)
+    partitions = tuple((game_id, category_id, storage.fingerprint(game_id, category_id))
+                       for game_id, category_id in storage.list_partitions())
+    metadata_path = Path(data_dir) / METADATA_CONFIG['file']
+    return partitions + (metadata_path.stat().st_mtime_ns if metadata_path.exists() else 0,)
+
+@instrumentation.timed('speedrun_stage_seconds', stage='load_catalogue')
+def load_catalogue(data_dir: Path) -> List[Dict]:
+    """
+    Catalogue des catégories (IDs, noms, métriques résumées), sans les runs
+
+    Lu depuis l'instantané publié par le service de collecte s'il correspond
+    encore aux données ; sinon calculé, conservé en mémoire pour tout le
+    processus et rechargé seulement lorsque la signature du dossier de
+    données change.
+    """
+    signature = data_signature(data_dir)
+    snapshot = load_current_snapshot(data_dir, signature)
+    if snapshot is not None:
+        return snapshot['catalogue']
+
+    key = Path(data_dir).resolve()
+    with _catalogues_lock:
+        cached = _catalogues.get(key)
+    if cached and cached[0] == signature:
+        return cached[1]
+
+    catalogue = load_processed_data(data_dir, include_rows=False)
+    # Signature relevée après le chargement, qui peut rafraîchir l'index de métadonnées
+    with _catalogues_lock:
+        _catalogues[key] = (data_signature(data_dir), catalogue)
+    return catalogue
+
+def _build_comparison(data_dir: Path) -> pd.DataFrame:
+    table = compare_categories(load_combined(data_dir))
+    index = get_metadata_index(data_dir)
+    table.insert(1, 'game_name', [index.game_name(game_id) for game_id in table['game_id']])
+    table.insert(3, 'category_name', [index.category_name(category_id) or category_id
+                                      for category_id in table['category_id']])
+    return table
+
+def load_comparison(data_dir: Path) -> pd.DataFrame:
+    """
+    Tableau comparatif de toutes les catégories (analyse en un seul lot vectorisé)
+
+    Noms des jeux et catégories résolus ; lu depuis l'instantané publié s'il
+    correspond encore aux données, ou conservé en cache comme le catalogue.
+    """
+    signature = data_signature(data_dir)
+    snapshot = load_current_snapshot(data_dir, signature)
+    if snapshot is not None:
+        comparison = snapshot['comparison']
+        return pd.DataFrame(comparison['data'], columns=comparison['columns'])
+
+    key = Path(data_dir).resolve()
+    with _catalogues_lock:
+        cached = _comparisons.get(key)
+    if cached and cached[0] == signature:
+        return cached[1]
+
+    try:
+        table = _build_comparison(data_dir)
+    except Exception as e:
+        logger.error(f"Erreur lors de la comparaison des catégories: {e}")
+        return pd.DataFrame()
+    with _catalogues_lock:
+        _comparisons[key] = (signature, table)
+    return table
+
+def snapshot_path(data_dir: Path) -> Path:
+    return Path(data_dir) / DASHBOARD_CONFIG['snapshot_file']
+
+def load_snapshot(data_dir: Path) -> Optional[Dict]:
+    """
+    Dernier instantané publié (catalogue et tableau comparatif), None s'il n'y en a pas
+
+    Relu seulement lorsque le fichier est remplacé par une nouvelle publication.
+    """
+    path = snapshot_path(data_dir)
+    try:
+        mtime = path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+    key = path.resolve()
+    with _catalogues_lock:
+        cached = _snapshots.get(key)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    try:
+        snapshot = json.loads(path.read_text(encoding='utf-8'))
+    except (OSError, ValueError) as e:
+        logger.error(f"Instantané illisible ({path}): {e}")
+        return None
+    with _catalogues_lock:
+        _snapshots[key] = (mtime, snapshot)
+    return snapshot
+
+def load_current_snapshot(data_dir: Path, signature: Optional[Tuple] = None) -> Optional[Dict]:
     """
-    Charge et traite les données des fichiers CSV
+    Instantané publié s'il correspond à la signature actuelle des données, None sinon
+
+    Des données écrites hors du service de collecte (migration, collecte
+    manuelle, build-metrics) rendent l'instantané périmé jusqu'à la
+    prochaine publication.
+    """
+    snapshot = load_snapshot(data_dir)
+    if snapshot is None:
+        return None
+    signature = data_signature(data_dir) if signature is None else signature
+    # Signature comparée sous sa forme JSON (tuples persistés en listes)
+    if snapshot.get('signature') != json.loads(json.dumps(signature)):
+        logger.debug(f"Instantané périmé ({snapshot_path(data_dir)}), données recalculées")
+        return None
+    return snapshot
+
+@instrumentation.timed('speedrun_stage_seconds', stage='publish_snapshot')
+def publish_snapshot(data_dir: Path) -> Dict:
+    """
+    Calcule le catalogue et le tableau comparatif, puis les publie atomiquement
+
+    Appelé par le service de collecte : le tableau de bord n'a plus qu'à lire
+    le fichier publié, tant que la signature des données qu'il enregistre
+    n'a pas changé.
+    """
+    path = snapshot_path(data_dir)
+    snapshot = {
+        'published_at': datetime.now().isoformat(),
+        'catalogue': load_processed_data(data_dir, include_rows=False),
+        'comparison': json.loads(_build_comparison(data_dir).to_json(orient='split', index=False))
+    }
+    # Signature relevée après le calcul, qui peut rafraîchir l'index de métadonnées
+    snapshot['signature'] = data_signature(data_dir)
+    tmp_path = path.with_suffix('.tmp')
+    tmp_path.write_text(json.dumps(snapshot), encoding='utf-8')
+    os.replace(tmp_path, path)
+    logger.info(f"Instantané publié: {len(snapshot['catalogue'])} catégories")
+    return snapshot
+
+@lru_cache(maxsize=DASHBOARD_CONFIG['rows_cache_size'])
+@instrumentation.timed('speedrun_stage_seconds', stage='category_rows')
+def _read_category_rows(data_dir: str, game_id: str, category_id: str, fingerprint: str) -> pd.DataFrame:
+    """Runs nettoyées d'une catégorie, source des graphiques (partagées : ne pas modifier)"""
+    df = get_storage(Path(data_dir)).read(game_id, category_id)
+    return SpeedrunDataProcessor().clean_data(df)
+
+# Type de graphique : (calcul, clé de la résolution par défaut dans DASHBOARD_CONFIG)
+CHART_KINDS = {
+    'histogram': (charts.histogram, 'histogram_bins'),
+    'bands': (charts.quantile_bands, 'band_granularity'),
+    'series': (charts.downsample, 'max_points')
+}
+
+@lru_cache(maxsize=DASHBOARD_CONFIG['chart_cache_size'])
+@instrumentation.timed('speedrun_stage_seconds', stage='chart_data')
+def _chart_data(data_dir: str, game_id: str, category_id: str, fingerprint: str, kind: str,
+                resolution) -> pd.DataFrame:
+    compute, _ = CHART_KINDS[kind]
+    return compute(_read_category_rows(data_dir, game_id, category_id, fingerprint), resolution)
+
+def load_chart_data(data_dir: Path, game_id: str, category_id: str, kind: str,
+                    resolution=None) -> pd.DataFrame:
+    """
+    Données d'un graphique au niveau des runs, agrégées côté serveur (taille bornée)
+
+    Args:
+        kind: 'histogram' (classes de temps), 'bands' (quantiles par période)
+            ou 'series' (temps / date réduits par LTTB)
+        resolution: Nombre de classes, granularité ('day', 'week', 'month') ou nombre
+            de points (DASHBOARD_CONFIG par défaut)
+
+    Le résultat est en cache par catégorie (empreinte de la partition) et résolution ;
+    le DataFrame renvoyé est partagé et ne doit pas être modifié.
+    """
+    resolution = DASHBOARD_CONFIG[CHART_KINDS[kind][1]] if resolution is None else resolution
+    try:
+        fingerprint = get_storage(data_dir).fingerprint(game_id, category_id)
+        return _chart_data(str(Path(data_dir).resolve()), game_id, category_id, fingerprint, kind, resolution)
+    except Exception as e:
+        logger.error(f"Erreur lors du calcul du graphique {kind} de {game_id}_{category_id}: {e}")
+        return pd.DataFrame()
+
+def load_leaderboard(data_dir: Path, game_id: str, category_id: str, k: Optional[int] = None) -> Dict:
+    """
+    Classement d'une catégorie depuis l'index précalculé (sans relire les runs)
+
+    Returns:
+        top (k meilleurs joueurs, noms résolus), wr_progression et nombre de joueurs classés
+    """
+    k = k or LEADERBOARD_CONFIG['top_k']
+    try:
+        board = _leaderboard_store(str(Path(data_dir).resolve())).get(game_id, category_id)
+        index = get_metadata_index(data_dir)
+        top = [{**entry, 'player_name': index.player_name(entry['player']) or entry['player']}
+               for entry in board.top(k)]
+        progression = [{'date': date, 'time_seconds': time,
+                        'player_name': index.player_name(player) or player, 'run_id': run_id}
+                       for date, time, player, run_id in board.wr_progression]
+        return {'top': top, 'wr_progression': progression, 'ranked_players': len(board)}
+    except Exception as e:
+        logger.error(f"Erreur lors du chargement du classement de {game_id}_{category_id}: {e}")
+        return {'top': [], 'wr_progression': [], 'ranked_players': 0}
+
+@instrumentation.timed('speedrun_stage_seconds', stage='load_processed_data')
+def load_processed_data(data_dir: Path, include_rows: bool = True) -> List[Dict]:
+    """
+    Charge les métriques de toutes les catégories stockées
+
+    Les métriques proviennent de l'étape build_metrics (pool de processus,
+    cache par empreinte de partition) ; les lignes nettoyées ne sont relues
+    que si include_rows est vrai (nettoyage de tout le jeu de données en une
+    passe, clean_dataset) et conservées sous forme compacte
+    (item['data'] : CompactRuns, DataFrame via to_frame()).
     """
-    processor = SpeedrunDataProcessor()
     processed_data = []
     
     try:
-        csv_files = list(data_dir.glob('*.csv'))
-        if not csv_files:
-            logger.warning(f"Aucun fichier CSV trouvé dans {data_dir}")
+        entries = build_metrics(data_dir)
+        if not entries:
+            logger.warning(f"Aucune donnée trouvée dans {data_dir}")
             return []
-            
-        for csv_file in csv_files:
+
+        rows = {}
+        if include_rows:
+            cleaned = clean_dataset(data_dir).data
+            rows = {key: group.drop(columns=['game_id', 'category_id'])
+                    for key, group in cleaned.groupby(['game_id', 'category_id'], observed=True, sort=False)}
+        index = get_metadata_index(data_dir)
+        index.ensure_fresh({game_id for game_id, _ in entries})
+        for (game_id, category_id), entry in sorted(entries.items()):
             try:
-                df = pd.read_csv(csv_file)
-                if df.empty:
-                    logger.warning(f"Fichier vide: {csv_file}")
-                    continue
-                    
-                # Extraction des identifiants du nom de fichier
-                game_id, category_id = csv_file.stem.split('_')
-                
                 # Récupération des noms réels
-                game_name = GAME_NAMES.get(game_id, game_id)
-                category_name = get_category_name(game_id, category_id)
-                
-                # Nettoyage et calcul des métriques
-                df_cleaned = processor.clean_data(df)
-                metrics = processor.calculate_metrics(df_cleaned)
-                
-                processed_data.append({
+                game_name = index.game_name(game_id)
+                category_name = get_category_name(game_id, category_id, data_dir)
+
+                item = {
                     'game_id': game_id,
                     'game_name': game_name,
                     'category_id': category_id,
                     'category_name': category_name,
-                    'data': df_cleaned.to_dict('records'),
-                    'processed_at': datetime.now().isoformat(),
-                    **metrics
-                })
+                    'processed_at': entry['processed_at'],
+                    **entry['metrics']
+                }
+                # Les IDs de plateforme stockés bruts sont résolus via l'index
+                item['platform_distribution'] = _resolve_platforms(item['platform_distribution'])
+                if include_rows:
+                    item['data'] = CompactRuns.from_frame(rows.get((game_id, category_id), pd.DataFrame()))
+                processed_data.append(item)
                 
             except Exception as e:
-                logger.error(f"Erreur lors du traitement de {csv_file}: {e}")
+                logger.error(f"Erreur lors du traitement de {game_id}_{category_id}: {e}")
                 continue
         
         return processed_data
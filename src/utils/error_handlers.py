@@ -1,18 +1,28 @@
 import logging
+import time
 from functools import wraps
 from typing import Callable, Any
+from . import instrumentation
 
 logger = logging.getLogger(__name__)
 
 def handle_api_errors(func: Callable) -> Callable:
     """
     Décorateur pour gérer les erreurs d'API de manière uniforme
+
+    Mesure aussi la durée de chaque appel et compte les erreurs (instrumentation).
     """
     @wraps(func)
     def wrapper(*args: Any, **kwargs: Any) -> Any:
+        start = time.perf_counter()
         try:
             return func(*args, **kwargs)
         except Exception as e:
+            instrumentation.increment('speedrun_call_errors_total', function=func.__name__,
+                                      error=type(e).__name__)
             logger.error(f"Erreur API dans {func.__name__}: {str(e)}")
             raise
+        finally:
+            instrumentation.observe('speedrun_call_seconds', time.perf_counter() - start,
+                                    function=func.__name__)
     return wrapper
\ No newline at end of file
@@ -0,0 +1,227 @@
+"""
+Instrumentation légère de la chaîne : compteurs, histogrammes et chronomètres
+
+Les mesures sont regroupées par nom et par étiquettes (endpoint, étape,
+motif de rejet...) dans un registre de processus, exposé au format texte
+Prometheus (render_prometheus, serve_metrics) ou en JSON (snapshot,
+start_json_dump). Les points de mesure sont placés par lot (page, bloc,
+partition), jamais par run ; désactivée (INSTRUMENTATION_CONFIG ou
+SPEEDRUN_METRICS=0), chaque mesure se réduit au test d'un booléen.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional, Sequence, Tuple
+from config.settings import INSTRUMENTATION_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Secondes (latences, durées d'étapes) et tailles (runs par page ou par lot)
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = (0, 1, 10, 25, 50, 100, 150, 200, 500, 1000, 5000, 10000)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+class _Histogram:
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+class Registry:
+    """Compteurs et histogrammes étiquetés, partagés entre threads"""
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, _Histogram]] = {}
+        self._buckets: Dict[str, Sequence[float]] = {}
+        self._help: Dict[str, str] = {}
+
+    def describe(self, name: str, help_text: str, buckets: Optional[Sequence[float]] = None) -> None:
+        """Texte d'aide et, pour un histogramme, bornes des classes (LATENCY_BUCKETS par défaut)"""
+        self._help[name] = help_text
+        if buckets is not None:
+            self._buckets[name] = buckets
+
+    def increment(self, name: str, value: float = 1, **labels) -> None:
+        if not self.enabled:
+            return
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        if not self.enabled:
+            return
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = _Histogram(self._buckets.get(name, LATENCY_BUCKETS))
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels) -> Iterator[None]:
+        """Durée du bloc (secondes) observée dans l'histogramme name"""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def timed(self, name: str, **labels) -> Callable:
+        """Décorateur : durée de chaque appel observée dans l'histogramme name"""
+        def decorator(func: Callable) -> Callable:
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe(name, time.perf_counter() - start, **labels)
+            return wrapper
+        return decorator
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    # Exposition
+
+    def snapshot(self) -> Dict:
+        """Copie JSON-sérialisable de toutes les mesures"""
+        with self._lock:
+            return {
+                'timestamp': time.time(),
+                'counters': {name: [{'labels': dict(key), 'value': value} for key, value in series.items()]
+                             for name, series in self._counters.items()},
+                'histograms': {
+                    name: [{'labels': dict(key), 'count': h.count, 'sum': h.sum,
+                            'buckets': dict(zip([f"{bound:g}" for bound in h.bounds] + ['+Inf'], h.counts))}
+                           for key, h in series.items()]
+                    for name, series in self._histograms.items()
+                }
+            }
+
+    def render_prometheus(self) -> str:
+        """Format texte d'exposition Prometheus (classes d'histogramme cumulées)"""
+        def label_text(key: Labels, extra: str = '') -> str:
+            parts = [f'{name}="{str(value)}"' for name, value in key] + ([extra] if extra else [])
+            return '{' + ','.join(parts) + '}' if parts else ''
+
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} counter")
+                lines.extend(f"{name}{label_text(key)} {value:g}" for key, value in series.items())
+            for name, series in sorted(self._histograms.items()):
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} histogram")
+                for key, histogram in series.items():
+                    cumulative = 0
+                    for bound, count in zip([f"{bound:g}" for bound in histogram.bounds] + ['+Inf'],
+                                            histogram.counts):
+                        cumulative += count
+                        bucket_labels = label_text(key, 'le="' + bound + '"')
+                        lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+                    lines.append(f"{name}_sum{label_text(key)} {histogram.sum:g}")
+                    lines.append(f"{name}_count{label_text(key)} {histogram.count}")
+        return '\n'.join(lines) + '\n'
+
+registry = Registry(INSTRUMENTATION_CONFIG['enabled'])
+
+# Raccourcis sur le registre du processus
+increment = registry.increment
+observe = registry.observe
+timer = registry.timer
+timed = registry.timed
+
+registry.describe('speedrun_api_request_seconds', "Latence des requêtes HTTP par endpoint")
+registry.describe('speedrun_api_requests_total', "Requêtes HTTP envoyées, par endpoint et statut")
+registry.describe('speedrun_api_cache_total', "Consultations du cache de réponses, par résultat")
+registry.describe('speedrun_call_seconds', "Durée des appels décorés par handle_api_errors")
+registry.describe('speedrun_call_errors_total', "Erreurs des appels décorés par handle_api_errors")
+registry.describe('speedrun_page_runs', "Runs par page reçue de l'API", SIZE_BUCKETS)
+registry.describe('speedrun_runs_ingested_total', "Runs valides converties")
+registry.describe('speedrun_runs_rejected_total', "Runs rejetées, par motif")
+registry.describe('speedrun_runs_stored_total', "Runs ajoutées au stockage")
+registry.describe('speedrun_runs_filtered_total', "Runs écartées au nettoyage, par motif")
+registry.describe('speedrun_stage_seconds', "Durée des étapes (traitement, sauvegarde, chargement, métriques)")
+registry.describe('speedrun_job_seconds', "Durée des tâches du service de collecte, par type")
+registry.describe('speedrun_jobs_total', "Tâches du service de collecte exécutées, par type et issue")
+
+def dump_json(path: Path) -> None:
+    """Écrit atomiquement l'instantané des mesures"""
+    path = Path(path)
+    tmp_path = path.with_suffix('.tmp')
+    tmp_path.write_text(json.dumps(registry.snapshot()), encoding='utf-8')
+    os.replace(tmp_path, path)
+
+def start_json_dump(path: Path, interval: Optional[float] = None,
+                    stop: Optional[threading.Event] = None) -> threading.Thread:
+    """Écrit l'instantané des mesures toutes les interval secondes (thread démon)"""
+    interval = interval or INSTRUMENTATION_CONFIG['dump_interval']
+    stop = stop or threading.Event()
+
+    def loop() -> None:
+        while not stop.wait(interval):
+            try:
+                dump_json(path)
+            except OSError as e:
+                logger.error(f"Erreur lors de l'écriture des mesures ({path}): {e}")
+
+    thread = threading.Thread(target=loop, name='metrics-dump', daemon=True)
+    thread.start()
+    return thread
+
+def serve_metrics(port: int, host: str = '0.0.0.0') -> ThreadingHTTPServer:
+    """Sert /metrics (texte Prometheus) et /metrics.json dans un thread démon"""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == '/metrics':
+                body, content_type = registry.render_prometheus().encode(), 'text/plain; version=0.0.4'
+            elif self.path == '/metrics.json':
+                body, content_type = json.dumps(registry.snapshot()).encode(), 'application/json'
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+    logger.info(f"Mesures exposées sur http://{host}:{server.server_address[1]}/metrics")
+    return server
@@ -17,6 +17,18 @@ PLATFORM_NAMES = {
     # Ajoutez d'autres mappings selon les  besoins
 }
 
+# Noms résolus via l'API (index de métadonnées) pour les IDs absents de PLATFORM_NAMES
+_resolved_names = {}
+
+def register_platform_names(names: dict) -> None:
+    """
+    Enregistre des noms de plateformes résolus dynamiquement
+
+    Args:
+        names: Dictionnaire ID de plateforme -> nom
+    """
+    _resolved_names.update(names)
+
 def get_platform_name(platform_id: str) -> str:
     """
     Convertit l'ID de la plateforme en nom lisible
@@ -28,7 +40,7 @@ def get_platform_name(platform_id: str) -> str:
         Nom de la plateforme ou l'ID si non trouvé
     """
     try:
-        return PLATFORM_NAMES.get(platform_id, platform_id)
+        return PLATFORM_NAMES.get(platform_id) or _resolved_names.get(platform_id, platform_id)
     except Exception as e:
         logger.error(f"Erreur lors de la conversion de l'ID de plateforme {platform_id}: {e}")
         return platform_id
\ No newline at end of file
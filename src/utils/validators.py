@@ -1,5 +1,6 @@
 from typing import Dict, Any, Optional
 import logging
+from . import instrumentation
 
 logger = logging.getLogger(__name__)
 
@@ -17,14 +18,17 @@ def validate_run_data(run_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
     
     try:
         # Vérifie la présence des champs requis
+        # Rejets comptés par motif ; une ligne de journal par run coûterait plus que la validation
         if not all(field in run_data for field in required_fields):
             missing_fields = [f for f in required_fields if f not in run_data]
-            logger.warning(f"Champs manquants dans les données: {missing_fields}")
+            instrumentation.increment('speedrun_runs_rejected_total', reason='missing_fields')
+            logger.debug(f"Champs manquants dans les données: {missing_fields}")
             return None
             
         # Vérifie la validité des valeurs
         if not run_data['times'].get('primary_t'):
-            logger.warning("Temps principal manquant")
+            instrumentation.increment('speedrun_runs_rejected_total', reason='missing_time')
+            logger.debug("Temps principal manquant")
             return None
             
         return run_data
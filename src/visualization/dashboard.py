@@ -5,12 +5,9 @@ import plotly.graph_objects as go
 from pathlib import Path
 from typing import List, Dict
 from datetime import datetime
-from ..utils.data_loader import load_processed_data
+from ..utils.data_loader import load_catalogue, load_chart_data, load_comparison, load_leaderboard, load_rollup
 
 class Dashboard:
-    def __init__(self):
-        st.set_page_config(page_title="Speedrun Analytics", layout="wide")
-
     def create_metrics_cards(self, data: Dict):
         cols = st.columns(4)
         with cols[0]:
@@ -44,12 +41,134 @@ class Dashboard:
         fig.update_layout(title="Utilisation de l'émulateur vs Hardware Original")
         st.plotly_chart(fig, use_container_width=True)
 
+    def create_time_distribution(self, bins: pd.DataFrame):
+        if bins.empty:
+            st.warning("Pas de runs disponibles pour cette catégorie")
+            return
+
+        # Classes calculées côté serveur : le navigateur ne reçoit pas les runs
+        fig = go.Figure(go.Bar(x=(bins['left'] + bins['right']) / 2, y=bins['runs'],
+                               width=bins['right'] - bins['left']))
+        fig.update_layout(title="Distribution des temps", xaxis_title="Temps (s)", yaxis_title="Runs",
+                          bargap=0)
+        st.plotly_chart(fig, use_container_width=True)
+
+    def create_time_bands(self, bands: pd.DataFrame):
+        if bands.empty:
+            st.info("Pas de runs datées pour cette catégorie")
+            return
+
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(x=bands['period'], y=bands['q90'], line={'width': 0}, showlegend=False,
+                                 hoverinfo='skip'))
+        fig.add_trace(go.Scatter(x=bands['period'], y=bands['q10'], fill='tonexty', line={'width': 0},
+                                 name="10e - 90e centile"))
+        fig.add_trace(go.Scatter(x=bands['period'], y=bands['q75'], line={'width': 0}, showlegend=False,
+                                 hoverinfo='skip'))
+        fig.add_trace(go.Scatter(x=bands['period'], y=bands['q25'], fill='tonexty', line={'width': 0},
+                                 name="Quartiles"))
+        fig.add_trace(go.Scatter(x=bands['period'], y=bands['q50'], name="Médiane", mode='lines'))
+        fig.add_trace(go.Scatter(x=bands['period'], y=bands['best_time'], name="Meilleur temps",
+                                 mode='lines', line={'dash': 'dot'}))
+        fig.update_layout(title="Temps par période", yaxis_title="Temps (s)")
+        st.plotly_chart(fig, use_container_width=True)
+
+    def create_time_series(self, series: pd.DataFrame):
+        if series.empty:
+            st.info("Pas de runs datées pour cette catégorie")
+            return
+
+        fig = px.scatter(
+            series,
+            x='date',
+            y='time_seconds',
+            title=f"Temps en fonction de la date ({len(series)} points représentatifs)",
+            labels={'date': 'Date', 'time_seconds': 'Temps (s)'}
+        )
+        st.plotly_chart(fig, use_container_width=True)
+
+    def create_trend_chart(self, periods: pd.DataFrame, trend: Dict):
+        if periods.empty:
+            st.info("Pas d'historique disponible pour cette catégorie")
+            return
+
+        fig = go.Figure()
+        fig.add_trace(go.Bar(x=periods['period'], y=periods['runs'], name="Runs"))
+        fig.add_trace(go.Scatter(x=periods['period'], y=periods['best_time'], name="Meilleur temps (s)",
+                                 yaxis='y2', mode='lines+markers'))
+        fig.update_layout(
+            title="Activité et meilleur temps par période",
+            yaxis=dict(title="Runs"),
+            yaxis2=dict(title="Temps (s)", overlaying='y', side='right')
+        )
+        st.plotly_chart(fig, use_container_width=True)
+        if trend:
+            st.caption(f"Tendance : {trend['trend_coefficient']:+.2f} runs/mois, "
+                       f"croissance mensuelle moyenne {trend['monthly_growth']:.1f} %")
+
+    def create_leaderboard(self, leaderboard: Dict):
+        if not leaderboard['top']:
+            st.info("Pas de classement disponible pour cette catégorie")
+            return
+
+        st.subheader(f"Classement ({leaderboard['ranked_players']} joueurs classés)")
+        top = pd.DataFrame(leaderboard['top'])
+        st.dataframe(
+            top[['rank', 'player_name', 'time_seconds', 'date']].rename(columns={
+                'rank': 'Rang', 'player_name': 'Joueur', 'time_seconds': 'Temps (s)', 'date': 'Date'
+            }).set_index('Rang'),
+            use_container_width=True
+        )
+
+        if leaderboard['wr_progression']:
+            progression = pd.DataFrame(leaderboard['wr_progression'])
+            fig = px.line(
+                progression,
+                x='date',
+                y='time_seconds',
+                hover_data=['player_name'],
+                line_shape='hv',
+                markers=True,
+                title="Progression du record du monde",
+                labels={'date': 'Date', 'time_seconds': 'Temps (s)', 'player_name': 'Joueur'}
+            )
+            st.plotly_chart(fig, use_container_width=True)
+
+    def create_comparison_view(self, comparison: pd.DataFrame):
+        if comparison.empty:
+            st.warning("Pas de données à comparer")
+            return
+
+        st.subheader("Classement des catégories par difficulté")
+        fig = px.bar(
+            comparison.head(30),
+            x='difficulty_score',
+            y=comparison.head(30)['game_name'] + " - " + comparison.head(30)['category_name'],
+            orientation='h',
+            title="Catégories les plus difficiles",
+            labels={'difficulty_score': 'Score de difficulté', 'y': ''}
+        )
+        fig.update_layout(yaxis={'autorange': 'reversed'})
+        st.plotly_chart(fig, use_container_width=True)
+        st.dataframe(
+            comparison[['difficulty_rank', 'game_name', 'category_name', 'difficulty_score', 'total_runs',
+                        'unique_players', 'best_time', 'median_time', 'p10', 'p90', 'emulator_percentage']]
+            .set_index('difficulty_rank'),
+            use_container_width=True
+        )
+
     def run(self, data_dir: Path):
+        # Premier appel streamlit de la page (et non effet de bord de la construction)
+        st.set_page_config(page_title="Speedrun Analytics", layout="wide")
         st.title("Speedrun Analytics Dashboard")
         st.markdown("Analyse des données et mesure de la difficulté des speedruns")
         
-        # Chargement des données
-        data_list = load_processed_data(data_dir)
+        if st.sidebar.radio("Vue", ["Catégorie", "Comparaison entre jeux"]) == "Comparaison entre jeux":
+            self.create_comparison_view(load_comparison(data_dir))
+            return
+
+        # Catalogue léger (IDs, noms, métriques), en cache pour tout le processus
+        data_list = load_catalogue(data_dir)
         
         if not data_list:
             st.error("Aucune donnée n'a été trouvée. Veuillez d'abord collecter des données.")
@@ -90,6 +209,20 @@ class Dashboard:
             self.create_platform_distribution(selected_data.get('platform_distribution', {}))
         with col2:
             self.create_emulator_pie(selected_data.get('emulator_percentage', 0))
+
+        # Tendances depuis les agrégats temporels précalculés
+        granularity = st.radio("Période", ['month', 'week', 'day'], horizontal=True,
+                               format_func={'day': 'Jour', 'week': 'Semaine', 'month': 'Mois'}.get)
+        self.create_trend_chart(*load_rollup(data_dir, selected[0], selected[1], granularity))
+
+        # Classement depuis l'index précalculé (les runs ne sont pas relues)
+        self.create_leaderboard(load_leaderboard(data_dir, selected[0], selected[1]))
+
+        # Graphiques au niveau des runs : données agrégées côté serveur, en cache par catégorie
+        if st.checkbox("Afficher la distribution des temps"):
+            self.create_time_distribution(load_chart_data(data_dir, selected[0], selected[1], 'histogram'))
+            self.create_time_bands(load_chart_data(data_dir, selected[0], selected[1], 'bands', granularity))
+            self.create_time_series(load_chart_data(data_dir, selected[0], selected[1], 'series'))
             
         # Informations supplémentaires
         st.sidebar.write(f"Dernière mise à jour: {selected_data.get('processed_at', 'Non disponible')}")
@@ -0,0 +1,9 @@
+import pytest
+from src.api import cache
+from config.api_config import CACHE_CONFIG
+
+@pytest.fixture(autouse=True)
+def memory_cache(monkeypatch):
+    """Cache de réponses en mémoire : aucun test n'écrit dans .cache/"""
+    monkeypatch.setitem(CACHE_CONFIG, 'enabled', False)
+    monkeypatch.setattr(cache, '_default_cache', None)
@@ -0,0 +1,45 @@
+import math
+import pytest
+from benchmarks.synthetic import SyntheticDataset
+from src.data.processor import SpeedrunDataProcessor
+from src.data.storage import get_storage
+from src.metrics.batch import compare_categories, load_combined, platform_breakdown
+
+FIELDS = ['total_runs', 'unique_players', 'avg_time', 'median_time', 'std_time', 'best_time',
+          'emulator_percentage', 'runs_per_month', 'difficulty_score']
+
+@pytest.fixture(scope='module')
+def data_dir(tmp_path_factory):
+    path = tmp_path_factory.mktemp('batch')
+    SyntheticDataset(20000, games=3, categories_per_game=3, seed=4).write(path)
+    return path
+
+def expected_metrics(data_dir):
+    storage = get_storage(data_dir)
+    processor = SpeedrunDataProcessor()
+    return {partition: processor.calculate_metrics(processor.clean_data(storage.read(*partition)))
+            for partition in storage.list_partitions()}
+
+def assert_close(actual, expected):
+    if isinstance(expected, float) and math.isnan(expected):
+        assert math.isnan(actual)
+    else:
+        assert actual == pytest.approx(expected, rel=1e-9)
+
+def test_compare_categories_matches_calculate_metrics(data_dir):
+    table = compare_categories(load_combined(data_dir)).set_index(['game_id', 'category_id'])
+    expected = expected_metrics(data_dir)
+    assert set(table.index) == set(expected)
+    for partition, metrics in expected.items():
+        for field in FIELDS:
+            assert_close(float(table.loc[partition, field]), float(metrics[field]))
+    # Rang de difficulté cohérent avec le tri
+    assert list(table['difficulty_rank']) == sorted(table['difficulty_rank'])
+
+def test_platform_breakdown_matches_platform_distribution(data_dir):
+    breakdown = platform_breakdown(load_combined(data_dir))
+    for (game_id, category_id), metrics in expected_metrics(data_dir).items():
+        rows = breakdown[(breakdown['game_id'] == game_id) & (breakdown['category_id'] == category_id)]
+        assert dict(zip(rows['platform'], rows['runs'].tolist())) == metrics['platform_distribution']
+        assert rows['share'].sum() == pytest.approx(
+            100 * sum(metrics['platform_distribution'].values()) / metrics['total_runs'])
@@ -0,0 +1,69 @@
+import pytest
+from benchmarks.fake_api import FakeSpeedrunAPI
+from src.api import cache as cache_module
+from src.api.cache import CacheMissError, ResponseCache
+from src.api.rate_limiter import TokenBucket
+from src.api.speedrun_api import SpeedrunAPI
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        self.now += 0.001
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module.time, 'time', clock)
+    return clock
+
+def test_ttl_is_per_endpoint(clock):
+    cache = ResponseCache(ttl={'runs': 10, 'default': 60})
+    cache.put('a', 'runs', {'data': 1})
+    cache.put('b', 'games', {'data': 2})
+    assert cache.is_fresh(cache.get('a'), 'runs') and cache.is_fresh(cache.get('b'), 'games')
+
+    clock.now += 30
+    assert not cache.is_fresh(cache.get('a'), 'runs')
+    assert cache.is_fresh(cache.get('b'), 'games')
+
+    cache.touch('a')
+    assert cache.is_fresh(cache.get('a'), 'runs')
+
+def test_least_recently_used_entries_are_evicted(clock):
+    cache = ResponseCache(max_bytes=50)
+    cache.put('a', 'runs', {'data': 'x' * 10})
+    cache.put('b', 'runs', {'data': 'y' * 10})
+    cache.get('a')
+    cache.put('c', 'runs', {'data': 'z' * 10})
+
+    assert cache.get('b') is None
+    assert cache.get('a').payload == {'data': 'x' * 10}
+    assert cache.get_stats()['evictions'] == 1
+    assert cache.get_stats()['bytes'] <= 50
+
+def test_entries_persist_on_disk(tmp_path):
+    path = str(tmp_path / 'cache.sqlite')
+    cache = ResponseCache(path)
+    cache.put('a', 'runs', {'data': [1, 2]}, etag='"v1"')
+    reopened = ResponseCache(path)
+    assert reopened.get('a').payload == {'data': [1, 2]}
+    assert reopened.get('a').etag == '"v1"'
+    assert reopened.get_stats()['bytes'] == cache.get_stats()['bytes']
+
+def test_offline_mode_serves_stale_entries_without_network():
+    cache = ResponseCache(ttl={'default': 0})
+    limiter = TokenBucket(rate=1000, capacity=10)
+    with FakeSpeedrunAPI(games=1, categories_per_game=2, runs_per_category=10) as fake:
+        SpeedrunAPI(base_url=fake.base_url, rate_limiter=limiter, cache=cache, offline=False) \
+            .get_game_categories('game0000')
+        requests_before = fake.request_count
+
+        offline = SpeedrunAPI(base_url=fake.base_url, rate_limiter=limiter, cache=cache, offline=True)
+        assert [category['id'] for category in offline.get_game_categories('game0000')] == \
+            ['game0000c000', 'game0000c001']
+        with pytest.raises(CacheMissError):
+            offline.get_runs('game0000', 'game0000c000')
+        assert fake.request_count == requests_before
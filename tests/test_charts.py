@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+from benchmarks.synthetic import SyntheticDataset
+from src.data.storage import get_storage
+from src.metrics.charts import downsample, histogram, lttb, quantile_bands
+from src.utils.data_loader import load_chart_data
+
+def runs(count, seed=0):
+    rng = np.random.default_rng(seed)
+    times = rng.lognormal(7, 0.2, count)
+    times[::50] = np.nan
+    dates = pd.Timestamp('2020-01-01') + pd.to_timedelta(rng.integers(0, 400, count), unit='D')
+    return pd.DataFrame({'date': dates.where(np.arange(count) % 30 != 0), 'time_seconds': times})
+
+def test_histogram_counts_every_timed_run():
+    df = runs(5000)
+    table = histogram(df, bins=20)
+    assert len(table) == 20
+    assert table['runs'].sum() == df['time_seconds'].notna().sum()
+    assert table['left'].iloc[0] == df['time_seconds'].min()
+    assert histogram(df.iloc[:0]).empty
+
+@pytest.mark.parametrize('granularity', ['day', 'week', 'month'])
+def test_quantile_bands_match_grouped_quantiles(granularity):
+    df = runs(5000).dropna()
+    bands = quantile_bands(df, granularity, quantiles=(0.1, 0.5, 0.9))
+    freq = {'day': 'D', 'week': 'W-SUN', 'month': 'M'}[granularity]
+    periods = df['date'].dt.to_period(freq).dt.start_time
+    grouped = df.groupby(periods)['time_seconds']
+    expected = pd.DataFrame({'runs': grouped.size(), 'best_time': grouped.min(),
+                             'q50': grouped.quantile(0.5), 'q90': grouped.quantile(0.9)})
+    assert list(bands['period']) == list(expected.index)
+    assert bands['runs'].tolist() == expected['runs'].tolist()
+    np.testing.assert_allclose(bands['best_time'], expected['best_time'])
+    np.testing.assert_allclose(bands['q50'], expected['q50'])
+    np.testing.assert_allclose(bands['q90'], expected['q90'])
+
+def test_lttb_keeps_ends_and_bounds_size():
+    x = np.arange(10_000, dtype='float64')
+    y = np.sin(x / 500)
+    y[4321] = 50
+    kept = lttb(x, y, 200)
+    assert len(kept) == 200
+    assert kept[0] == 0 and kept[-1] == len(x) - 1
+    assert np.all(np.diff(kept) > 0)
+    assert 4321 in kept
+    assert len(lttb(x[:100], y[:100], 200)) == 100
+
+def test_downsample_is_sorted_and_bounded():
+    df = runs(20_000)
+    series = downsample(df, max_points=300)
+    assert len(series) == 300
+    assert series['date'].is_monotonic_increasing
+    dated = df.dropna()
+    assert series['date'].iloc[0] == dated['date'].min()
+    assert series['date'].iloc[-1] == dated['date'].max()
+
+def test_chart_data_size_does_not_depend_on_run_count(tmp_path):
+    SyntheticDataset(20_000, games=1, categories_per_game=1).write(tmp_path)
+    storage = get_storage(tmp_path)
+    partition = storage.list_partitions()[0]
+    assert len(load_chart_data(tmp_path, *partition, 'histogram', 30)) == 30
+    assert len(load_chart_data(tmp_path, *partition, 'series', 250)) == 250
+    months = load_chart_data(tmp_path, *partition, 'bands', 'month')
+    assert months['runs'].sum() <= len(storage.read(*partition))
+
+    # Nouvelle empreinte de partition : données recalculées
+    before = load_chart_data(tmp_path, *partition, 'histogram', 30)['runs'].sum()
+    storage.append(storage.read(*partition).head(100).assign(run_id=lambda df: df['run_id'] + 'x'), *partition)
+    after = load_chart_data(tmp_path, *partition, 'histogram', 30)['runs'].sum()
+    assert after > before
+
+def test_quantile_bands_rejects_unknown_granularity():
+    with pytest.raises(ValueError):
+        quantile_bands(runs(10), 'year')
+    assert quantile_bands(runs(10).iloc[:0]).empty
@@ -0,0 +1,103 @@
+import pandas as pd
+import pytest
+from benchmarks.fake_api import FakeSpeedrunAPI
+from src.api.cache import ResponseCache
+from src.api.speedrun_api import SpeedrunAPI
+from src.data.collector import SpeedrunCollector
+from config.settings import DATABASE_CONFIG
+
+def write_partial(path, runs):
+    pd.DataFrame(runs, columns=['run_id', 'category', 'date', 'time_seconds', 'player', 'verified',
+                                'platform', 'emulator']).to_csv(path, index=False)
+    return path
+
+def run(run_id, time, player='p1', date='2024-01-01', platform='PC'):
+    return [run_id, 'c1', date, time, player, True, platform, False]
+
+@pytest.fixture
+def collector(tmp_path, monkeypatch):
+    monkeypatch.setitem(DATABASE_CONFIG, 'enabled', True)
+    return SpeedrunCollector(output_dir=str(tmp_path))
+
+def test_merge_upserts_runs_seen_again(collector, tmp_path):
+    partial = tmp_path / 'g1_c1.csv.partial'
+    assert collector.merge_file('g1', 'c1', write_partial(partial, [
+        run('r1', 100.0), run('r2', 120.0, player='p2'), run('r3', 90.0, player='00123')
+    ])) == 3
+
+    # r1 corrigée (temps), r3 inchangée (ID de joueur numérique), r4 nouvelle
+    added = collector.merge_file('g1', 'c1', write_partial(partial, [
+        run('r1', 80.0), run('r3', 90.0, player='00123'), run('r4', 110.0, player='p3', date='2024-02-01')
+    ]))
+    assert added == 1
+
+    stored = collector.storage.read('g1', 'c1').set_index('run_id')
+    assert sorted(stored.index) == ['r1', 'r2', 'r3', 'r4']
+    assert stored.loc['r1', 'time_seconds'] == 80.0
+    assert stored.loc['r3', 'player'] == '00123'
+
+    board = collector.leaderboards.get('g1', 'c1')
+    assert board.world_record()['time_seconds'] == 80.0
+    assert collector.rollups.get('g1', 'c1').frame('month')['best_time'].tolist() == [80.0, 110.0]
+    summary = collector.accumulators.get('g1', 'c1').to_metrics()
+    assert (summary['total_runs'], summary['best_time']) == (4, 80.0)
+    rows = collector.database.query("SELECT run_id, time_seconds FROM runs ORDER BY run_id")
+    assert rows.set_index('run_id')['time_seconds'].to_dict() == {'r1': 80.0, 'r2': 120.0, 'r3': 90.0, 'r4': 110.0}
+
+def test_merge_leaves_partition_untouched_without_corrections(collector, tmp_path):
+    partial = tmp_path / 'g1_c1.csv.partial'
+    collector.merge_file('g1', 'c1', write_partial(partial, [run('r1', 100.0), run('r2', 120.0)]))
+    fingerprint = collector.storage.fingerprint('g1', 'c1')
+
+    # Seules les runs relues sont lues : jamais la partition complète
+    read = collector.storage.read
+    def read_ids_only(game_id, category_id, columns=None):
+        assert columns == ['run_id']
+        return read(game_id, category_id, columns)
+    collector.storage.read = read_ids_only
+    assert collector.merge_file('g1', 'c1', write_partial(partial, [run('r1', 100.0)])) == 0
+    assert collector.storage.fingerprint('g1', 'c1') == fingerprint
+
+@pytest.fixture
+def fake():
+    with FakeSpeedrunAPI(games=1, categories_per_game=1, runs_per_category=300) as server:
+        yield server
+
+def synced_collector(tmp_path, fake):
+    collector = SpeedrunCollector(output_dir=str(tmp_path))
+    collector.api = SpeedrunAPI(base_url=fake.base_url, cache=ResponseCache(), offline=False)
+    return collector
+
+def stored_ids(collector):
+    return set(collector.storage.read('game0000', 'game0000c000', columns=['run_id'])['run_id'])
+
+def test_sync_backfills_history_beyond_max_runs(tmp_path, fake):
+    collector = synced_collector(tmp_path, fake)
+    assert collector.sync_category('game0000', 'game0000c000', max_runs=200) == 200
+    assert collector.checkpoints.get('game0000', 'game0000c000').get('latest_date') is None
+
+    assert collector.sync_category('game0000', 'game0000c000', max_runs=200) == 100
+    assert len(stored_ids(collector)) == 300
+    assert collector.checkpoints.get('game0000', 'game0000c000')['latest_date'] == '2010-10-27'
+    assert collector.sync_category('game0000', 'game0000c000', max_runs=200) == 0
+
+def test_first_sync_backfill_survives_new_runs(tmp_path, fake):
+    collector = synced_collector(tmp_path, fake)
+    collector.sync_category('game0000', 'game0000c000', max_runs=200)
+    fake.add_runs('game0000c000', 500)
+
+    added = [collector.sync_category('game0000', 'game0000c000', max_runs=200) for _ in range(6)]
+    assert 200 + sum(added) == 800
+    assert stored_ids(collector) == {run['id'] for run in fake.runs['game0000c000']}
+
+def test_sync_catches_up_when_more_than_max_runs_arrive(tmp_path, fake):
+    collector = synced_collector(tmp_path, fake)
+    collector.sync_category('game0000', 'game0000c000', max_runs=None)
+    fake.add_runs('game0000c000', 500)
+
+    for _ in range(6):
+        collector.sync_category('game0000', 'game0000c000', max_runs=200)
+    assert stored_ids(collector) == {run['id'] for run in fake.runs['game0000c000']}
+    checkpoint = collector.checkpoints.get('game0000', 'game0000c000')
+    assert checkpoint['latest_date'] == fake.runs['game0000c000'][-1]['date']
+    assert not checkpoint.get('backfill')
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+from benchmarks.synthetic import SyntheticDataset
+from src.data.compact import CompactRuns, RunStore, memory_report
+from src.data.storage import RUN_COLUMNS, apply_schema, get_storage
+
+def runs(players, start=0):
+    count = len(players)
+    return apply_schema(pd.DataFrame({
+        'run_id': [f"run{i}" for i in range(start, start + count)],
+        'category': 'c1',
+        'date': [None if i % 4 == 0 else f"2023-0{1 + i % 9}-15" for i in range(count)],
+        'time_seconds': [np.nan if i == 1 else 60.5 + i for i in range(count)],
+        'player': players,
+        'verified': True,
+        'platform': [None if i % 3 == 0 else 'PC' for i in range(count)],
+        'emulator': [i % 2 == 0 for i in range(count)]
+    }))[RUN_COLUMNS]
+
+def test_round_trip_matches_storage_schema(tmp_path):
+    SyntheticDataset(3000, games=1, categories_per_game=1).write(tmp_path)
+    storage = get_storage(tmp_path)
+    stored = storage.read(*storage.list_partitions()[0])
+    restored = CompactRuns.from_frame(stored).to_frame()
+
+    assert restored['run_id'].dtype == stored['run_id'].dtype
+    # Résolution des dates propre à chaque version de pandas : comparée en nanosecondes
+    pd.testing.assert_frame_equal(restored.astype({'date': 'datetime64[ns]'}),
+                                  stored.astype({'date': 'datetime64[ns]'}),
+                                  check_categorical=False, check_dtype=False)
+    assert restored['time_seconds'].dtype == 'float32'
+
+def test_missing_values_survive_encoding():
+    df = runs(['a', None, 'b', 'a', 'c'])
+    restored = CompactRuns.from_frame(df).to_frame()
+    assert restored['player'].isna().tolist() == df['player'].isna().tolist()
+    assert restored['platform'].isna().tolist() == df['platform'].isna().tolist()
+    assert restored['date'].isna().tolist() == df['date'].isna().tolist()
+    assert np.isnan(restored['time_seconds'][1])
+    assert restored['emulator'].tolist() == df['emulator'].tolist()
+
+def test_concat_merges_dictionaries():
+    first, second = runs(['a', 'b', None]), runs(['c', 'a', 'd', None], start=3)
+    merged = CompactRuns.concat([CompactRuns.from_frame(first), CompactRuns.from_frame(second)]).to_frame()
+    expected = pd.concat([first, second], ignore_index=True)
+    assert merged['run_id'].tolist() == expected['run_id'].tolist()
+    assert merged['player'].astype(object).where(merged['player'].notna(), None).tolist() == \
+        ['a', 'b', None, 'c', 'a', 'd', None]
+    assert merged['emulator'].tolist() == expected['emulator'].tolist()
+
+def test_run_store_rebuilds_partitions(tmp_path):
+    SyntheticDataset(4000, games=2, categories_per_game=2).write(tmp_path)
+    storage = get_storage(tmp_path)
+    store = RunStore.load(tmp_path)
+    assert len(store) == sum(len(storage.read(*partition)) for partition in storage.list_partitions())
+    partition = storage.list_partitions()[-1]
+    pd.testing.assert_frame_equal(store.frame(*partition, columns=['run_id', 'time_seconds']),
+                                  storage.read(*partition)[['run_id', 'time_seconds']], check_dtype=False)
+
+    report = memory_report(storage.read(*partition))
+    assert report['compact'] < report['schema_frame'] < report['object_frame']
+    assert report['reduction'] > 5
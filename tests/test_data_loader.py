@@ -0,0 +1,36 @@
+import pytest
+from benchmarks.synthetic import SyntheticDataset
+from src.data.metadata import MetadataIndex
+from src.data.storage import get_storage
+from src.utils import data_loader
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    # Aucun rafraîchissement de l'index de métadonnées par l'API
+    monkeypatch.setattr(MetadataIndex, 'ensure_fresh', lambda self, game_ids, background=True: None)
+    SyntheticDataset(3000, games=1, categories_per_game=2).write(tmp_path)
+    return tmp_path
+
+def total_runs(catalogue):
+    return sum(item['total_runs'] for item in catalogue)
+
+def test_snapshot_is_used_while_data_is_unchanged(data_dir, monkeypatch):
+    published = data_loader.publish_snapshot(data_dir)
+    monkeypatch.setattr(data_loader, 'load_processed_data', lambda *args, **kwargs: pytest.fail("recalcul"))
+
+    assert data_loader.load_catalogue(data_dir) == published['catalogue']
+    assert len(data_loader.load_comparison(data_dir)) == len(published['catalogue'])
+
+def test_stale_snapshot_falls_back_to_storage(data_dir):
+    published = data_loader.publish_snapshot(data_dir)
+    storage = get_storage(data_dir)
+    game_id, category_id = storage.list_partitions()[0]
+    # Écriture hors du service de collecte (collecte manuelle, migration)
+    runs = storage.read(game_id, category_id)
+    storage.write(runs.iloc[:len(runs) // 2], game_id, category_id)
+
+    assert data_loader.load_current_snapshot(data_dir) is None
+    catalogue = data_loader.load_catalogue(data_dir)
+    assert total_runs(catalogue) < total_runs(published['catalogue'])
+    comparison = data_loader.load_comparison(data_dir)
+    assert comparison['total_runs'].sum() == total_runs(catalogue)
@@ -0,0 +1,66 @@
+import sys
+from benchmarks.synthetic import SyntheticDataset
+from src.data import database as database_module
+from src.data.database import RunDatabase, get_database
+from src.data.storage import get_storage
+from config.settings import DATABASE_CONFIG
+
+def stored_runs(data_dir):
+    storage = get_storage(data_dir)
+    return sum(len(storage.read(*partition)) for partition in storage.list_partitions())
+
+def run_count(database):
+    return int(database.query("SELECT COUNT(*) AS runs FROM runs")['runs'].iloc[0])
+
+def test_first_open_loads_existing_storage(tmp_path):
+    SyntheticDataset(2000, games=1, categories_per_game=2).write(tmp_path)
+    assert run_count(get_database(tmp_path)) == stored_runs(tmp_path)
+
+def test_partial_table_is_reloaded(tmp_path):
+    SyntheticDataset(2000, games=1, categories_per_game=2).write(tmp_path)
+    storage = get_storage(tmp_path)
+    game_id, category_id = storage.list_partitions()[0]
+    # Base alimentée par le collecteur sans chargement initial
+    partial = RunDatabase(str(tmp_path / DATABASE_CONFIG['file']))
+    partial.insert_runs(storage.read(game_id, category_id).head(10), game_id, category_id)
+    partial.close()
+
+    assert run_count(get_database(tmp_path)) == stored_runs(tmp_path)
+
+def test_cli_build_accepts_data_dir(tmp_path, monkeypatch):
+    SyntheticDataset(1000, games=1, categories_per_game=1).write(tmp_path)
+    monkeypatch.setattr(sys, 'argv', ['database', '--data-dir', str(tmp_path), 'build'])
+    database_module.main()
+    assert run_count(get_database(tmp_path)) == stored_runs(tmp_path)
+
+def test_cli_build_loads_storage_once(tmp_path, monkeypatch):
+    SyntheticDataset(1000, games=1, categories_per_game=1).write(tmp_path)
+    loads = []
+    original = RunDatabase.load_from_storage
+    monkeypatch.setattr(RunDatabase, 'load_from_storage',
+                        lambda self, *args: loads.append(1) or original(self, *args))
+    monkeypatch.setattr(sys, 'argv', ['database', '--data-dir', str(tmp_path), 'build'])
+    database_module.main()
+    assert len(loads) == 1
+
+class CountingConnection:
+    """Connexion SQLite qui compte les appels à commit()"""
+    def __init__(self, connection):
+        self._connection = connection
+        self.commits = 0
+
+    def commit(self):
+        self.commits += 1
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+def test_duckdb_engine_does_not_commit(tmp_path):
+    # Sans transaction explicite, commit() échoue sous DuckDB : seul SQLite valide
+    database = RunDatabase(':memory:')
+    database.engine = 'duckdb'
+    database._conn = CountingConnection(database._conn)
+    SyntheticDataset(200, games=1, categories_per_game=1).write(tmp_path)
+    storage = get_storage(tmp_path)
+    assert database.load_from_storage(storage) == stored_runs(tmp_path)
+    assert database._conn.commits == 0
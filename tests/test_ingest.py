@@ -0,0 +1,33 @@
+import numpy as np
+from src.data.ingest import runs_to_columns, runs_to_frame
+from src.data.processor import SpeedrunDataProcessor
+from src.data.storage import apply_schema
+
+def make_run(run_id, platform='o0e3y2rw', time=100.0, players=None):
+    return {
+        'id': run_id, 'category': 'c1', 'date': '2024-01-02',
+        'times': {'primary_t': time}, 'players': players or [{'rel': 'user', 'id': 'p1'}],
+        'status': {'status': 'verified'}, 'system': {'platform': platform, 'emulated': False}
+    }
+
+def test_runs_without_platform_are_kept():
+    runs = [make_run('r1'), make_run('r2', platform=None), make_run('r3')]
+    columns, rejected = runs_to_columns(runs)
+
+    assert rejected == {}
+    assert list(columns['run_id']) == ['r1', 'r2', 'r3']
+    assert list(columns['platform']) == ['PC', None, 'PC']
+    # Même résultat que le traitement run par run
+    processor = SpeedrunDataProcessor()
+    assert [processor.process_run_data(run)['platform'] for run in runs] == ['PC', None, 'PC']
+
+def test_only_time_and_player_are_required():
+    runs = [make_run('r1', time=None), make_run('r2', players=[{'rel': 'guest', 'name': 'invité'}]),
+            make_run('r3', platform=None), {'id': 'r4'}]
+    frame, rejected = runs_to_frame(runs)
+
+    assert rejected == {'missing_fields': 1, 'missing_time': 1, 'invalid_player': 1}
+    assert list(frame['run_id']) == ['r3']
+    stored = apply_schema(frame)
+    assert stored['platform'].isna().all()
+    assert np.isclose(stored['time_seconds'].iloc[0], 100.0)
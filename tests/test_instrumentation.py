@@ -0,0 +1,94 @@
+import json
+import urllib.error
+import urllib.request
+import pytest
+from benchmarks.fake_api import FakeSpeedrunAPI
+from src.api.cache import ResponseCache
+from src.api.rate_limiter import TokenBucket
+from src.api.speedrun_api import SpeedrunAPI
+from src.utils import instrumentation
+from src.utils.instrumentation import Registry, SIZE_BUCKETS
+
+def counter(snapshot, name, **labels):
+    return sum(entry['value'] for entry in snapshot['counters'].get(name, [])
+               if all(entry['labels'].get(key) == value for key, value in labels.items()))
+
+def test_counters_and_histograms_by_label():
+    registry = Registry()
+    registry.describe('runs', "Runs par page", SIZE_BUCKETS)
+    registry.increment('requests', endpoint='runs')
+    registry.increment('requests', 2, endpoint='runs')
+    registry.increment('requests', endpoint='games')
+    for value in (0, 150, 200, 20000):
+        registry.observe('runs', value, endpoint='runs')
+
+    snapshot = registry.snapshot()
+    assert counter(snapshot, 'requests', endpoint='runs') == 3
+    assert counter(snapshot, 'requests', endpoint='games') == 1
+    histogram = snapshot['histograms']['runs'][0]
+    assert (histogram['count'], histogram['sum']) == (4, 20350)
+    assert (histogram['buckets']['0'], histogram['buckets']['150'], histogram['buckets']['200'],
+            histogram['buckets']['+Inf']) == (1, 1, 1, 1)
+
+def test_prometheus_buckets_are_cumulative():
+    registry = Registry()
+    registry.describe('latency', "Latence", (0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 5.0):
+        registry.observe('latency', value, stage='save')
+    text = registry.render_prometheus()
+    assert '# HELP latency Latence' in text
+    assert '# TYPE latency histogram' in text
+    assert 'latency_bucket{stage="save",le="0.1"} 1' in text
+    assert 'latency_bucket{stage="save",le="1"} 3' in text
+    assert 'latency_bucket{stage="save",le="+Inf"} 4' in text
+    assert 'latency_count{stage="save"} 4' in text
+
+def test_timers_and_disabled_registry():
+    registry = Registry()
+    with registry.timer('stage_seconds', stage='load'):
+        pass
+    registry.timed('stage_seconds', stage='save')(lambda: None)()
+    assert {entry['labels']['stage'] for entry in registry.snapshot()['histograms']['stage_seconds']} == \
+        {'load', 'save'}
+
+    disabled = Registry(enabled=False)
+    disabled.increment('requests')
+    with disabled.timer('stage_seconds'):
+        pass
+    assert disabled.snapshot()['counters'] == disabled.snapshot()['histograms'] == {}
+
+def test_json_dump_and_http_exposition(tmp_path, monkeypatch):
+    registry = Registry()
+    registry.increment('speedrun_jobs_total', kind='sync', status='done')
+    monkeypatch.setattr(instrumentation, 'registry', registry)
+
+    instrumentation.dump_json(tmp_path / 'metrics.json')
+    assert counter(json.loads((tmp_path / 'metrics.json').read_text()), 'speedrun_jobs_total') == 1
+
+    server = instrumentation.serve_metrics(0, host='127.0.0.1')
+    try:
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        assert 'speedrun_jobs_total{kind="sync",status="done"} 1' in \
+            urllib.request.urlopen(f"{base}/metrics").read().decode()
+        assert counter(json.loads(urllib.request.urlopen(f"{base}/metrics.json").read()),
+                       'speedrun_jobs_total', kind='sync') == 1
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(f"{base}/other")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def test_api_requests_and_cache_are_measured():
+    if not instrumentation.registry.enabled:
+        pytest.skip("Instrumentation désactivée (SPEEDRUN_METRICS=0)")
+    instrumentation.registry.reset()
+    with FakeSpeedrunAPI(games=1, categories_per_game=1, runs_per_category=10) as fake:
+        api = SpeedrunAPI(base_url=fake.base_url, rate_limiter=TokenBucket(rate=1000, capacity=10),
+                          cache=ResponseCache(), offline=False)
+        api.get_game_categories('game0000')
+        api.get_game_categories('game0000')
+
+    snapshot = instrumentation.registry.snapshot()
+    assert counter(snapshot, 'speedrun_api_requests_total', endpoint='categories', status='200') == 1
+    assert counter(snapshot, 'speedrun_api_cache_total', endpoint='categories', result='hit') == 1
+    assert counter(snapshot, 'speedrun_api_cache_total', endpoint='categories', result='miss') == 1
@@ -0,0 +1,19 @@
+from src.metrics.leaderboard import CategoryLeaderboard, _insert_record
+
+def test_older_record_replaces_later_ones_it_beats():
+    records = [['2020-01-01', 100.0, 'a'], ['2020-03-01', 90.0, 'b'], ['2020-05-01', 80.0, 'c']]
+    assert _insert_record(records, ['2020-02-01', 85.0, 'd'])
+    assert records == [['2020-01-01', 100.0, 'a'], ['2020-02-01', 85.0, 'd'], ['2020-05-01', 80.0, 'c']]
+
+def test_same_day_keeps_best_time():
+    records = [['2020-01-01', 100.0, 'a']]
+    assert not _insert_record(records, ['2020-01-01', 105.0, 'b'])
+    assert _insert_record(records, ['2020-01-01', 95.0, 'c'])
+    assert records == [['2020-01-01', 95.0, 'c']]
+
+def test_world_record_progression_out_of_order():
+    board = CategoryLeaderboard()
+    board.add_run('p1', 90.0, 'r2', '2021-06-01')
+    board.add_run('p2', 120.0, 'r1', '2021-01-01')
+    board.add_run('p3', 95.0, 'r3', '2021-03-01')
+    assert [entry[3] for entry in board.wr_progression] == ['r1', 'r3', 'r2']
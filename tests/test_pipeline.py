@@ -0,0 +1,67 @@
+import pytest
+from benchmarks.synthetic import SyntheticDataset
+from src.data.processor import SpeedrunDataProcessor
+from src.data.storage import get_storage
+from src.metrics import pipeline
+from src.metrics.pipeline import build_metrics
+from config.settings import CLEANING_CONFIG
+
+@pytest.fixture
+def data_dir(tmp_path):
+    SyntheticDataset(4000, games=2, categories_per_game=2).write(tmp_path)
+    return tmp_path
+
+@pytest.fixture
+def computed(monkeypatch):
+    calls = []
+    compute = pipeline._compute_partition
+    def counting(data_dir, fmt, game_id, category_id):
+        calls.append((game_id, category_id))
+        return compute(data_dir, fmt, game_id, category_id)
+    monkeypatch.setattr(pipeline, '_compute_partition', counting)
+    return calls
+
+def test_metrics_match_direct_computation(data_dir):
+    storage = get_storage(data_dir)
+    processor = SpeedrunDataProcessor()
+    entries = build_metrics(data_dir, max_workers=1)
+    assert set(entries) == set(storage.list_partitions())
+    for partition, entry in entries.items():
+        assert entry['metrics'] == processor.calculate_metrics(processor.clean_data(storage.read(*partition)))
+        assert entry['fingerprint'] == storage.fingerprint(*partition)
+
+def test_only_changed_partitions_are_recomputed(data_dir, computed):
+    build_metrics(data_dir, max_workers=1)
+    assert len(computed) == 4
+
+    storage = get_storage(data_dir)
+    changed = storage.list_partitions()[1]
+    storage.append(storage.read(*changed).head(5).assign(run_id=lambda df: df['run_id'] + 'x'), *changed)
+    computed.clear()
+    entries = build_metrics(data_dir, max_workers=1)
+    assert computed == [changed]
+    assert entries[changed]['fingerprint'] == storage.fingerprint(*changed)
+
+    computed.clear()
+    build_metrics(data_dir, max_workers=1, force=True)
+    assert len(computed) == 4
+
+def test_cleaning_change_invalidates_cache(data_dir, computed, monkeypatch):
+    build_metrics(data_dir, max_workers=1)
+    computed.clear()
+    monkeypatch.setitem(CLEANING_CONFIG, 'method', 'mad')
+    build_metrics(data_dir, max_workers=1)
+    assert len(computed) == 4
+
+def test_removed_partition_leaves_the_cache(data_dir):
+    storage = get_storage(data_dir)
+    removed = storage.list_partitions()[0]
+    build_metrics(data_dir, max_workers=1)
+    storage.path_for(*removed).unlink()
+    assert removed not in build_metrics(data_dir, max_workers=1)
+
+def test_process_pool_matches_sequential(data_dir):
+    sequential = build_metrics(data_dir, max_workers=1, force=True)
+    pooled = build_metrics(data_dir, max_workers=2, force=True)
+    assert {key: entry['metrics'] for key, entry in pooled.items()} == \
+        {key: entry['metrics'] for key, entry in sequential.items()}
@@ -0,0 +1,27 @@
+from src.data.processor import SpeedrunDataProcessor
+
+def make_run(players):
+    return {
+        'id': 'r1', 'category': 'c1', 'date': '2024-01-02',
+        'times': {'primary_t': 123.4}, 'players': players,
+        'status': {'status': 'verified'}, 'system': {'platform': 'o0e3y2rw', 'emulated': False}
+    }
+
+def test_process_run_data_reads_plain_and_embedded_players():
+    processor = SpeedrunDataProcessor()
+    player = {'rel': 'user', 'id': 'p1'}
+    embedded = {'data': [{**player, 'names': {'international': 'Runner'}}]}
+
+    assert processor.process_run_data(make_run([player]))['player'] == 'p1'
+    assert processor.process_run_data(make_run(embedded))['player'] == 'p1'
+    assert processor.process_run_data(make_run({'data': []}))['player'] == 'unknown'
+    assert processor.process_run_data(make_run([{'rel': 'guest', 'name': 'invité'}])) is None
+
+def test_process_run_data_keeps_synthetic_embedded_pages():
+    from benchmarks.synthetic import SyntheticDataset
+
+    dataset = SyntheticDataset(1000, invalid_ratio=0.0)
+    game_id, category_id = next(iter(dataset.run_counts))
+    page = next(dataset.iter_pages(game_id, category_id, embed_players=True))
+    processor = SpeedrunDataProcessor()
+    assert all(processor.process_run_data(run) for run in page)
@@ -0,0 +1,62 @@
+import threading
+import time
+from benchmarks.fake_api import FakeSpeedrunAPI
+from src.api.cache import ResponseCache
+from src.api.rate_limiter import TokenBucket
+from src.api.speedrun_api import SpeedrunAPI
+from src.data.collector import SpeedrunCollector
+from src.data.engine import CollectionEngine
+
+def test_429_pauses_bucket_for_retry_after():
+    limiter = TokenBucket(rate=1000, capacity=10)
+    pauses = []
+    pause = limiter.pause
+    limiter.pause = lambda seconds: (pauses.append(seconds), pause(seconds))
+    with FakeSpeedrunAPI(games=1, categories_per_game=1, runs_per_category=10, rate_limit_every=2) as fake:
+        api = SpeedrunAPI(base_url=fake.base_url, rate_limiter=limiter, cache=ResponseCache(), offline=False)
+        api.get_game_categories('game0000')
+        start = time.monotonic()
+        runs = api.get_runs('game0000', 'game0000c000')['data']
+
+    # Seconde requête : 429 avec Retry-After: 1, puis reprise après la pause
+    assert len(runs) == 10
+    assert pauses == [1.0]
+    assert time.monotonic() - start >= 0.95
+    assert api.get_stats()['runs']['retries'] == 1
+
+def test_bucket_is_shared_across_threads():
+    rate, per_thread, threads = 100.0, 5, 8
+    limiter = TokenBucket(rate=rate, capacity=1)
+    start = time.monotonic()
+    workers = [threading.Thread(target=lambda: [limiter.acquire() for _ in range(per_thread)])
+               for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    # Un seul jeton disponible au départ, puis rate jetons par seconde pour tous les threads
+    assert time.monotonic() - start >= (per_thread * threads - 1) / rate * 0.95
+
+def test_pause_blocks_every_thread():
+    limiter = TokenBucket(rate=1000, capacity=5)
+    limiter.pause(0.3)
+    waits = []
+    workers = [threading.Thread(target=lambda: waits.append(limiter.acquire())) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert min(waits) >= 0.25
+
+def test_engine_workers_share_the_rate_limit(tmp_path):
+    rate = 40.0
+    with FakeSpeedrunAPI(games=1, categories_per_game=4, runs_per_category=450) as fake:
+        api = SpeedrunAPI(base_url=fake.base_url, rate_limiter=TokenBucket(rate=rate, capacity=1),
+                          cache=ResponseCache(), offline=False)
+        collector = SpeedrunCollector(output_dir=str(tmp_path))
+        collector.api = collector.metadata.api = api
+        report = CollectionEngine(collector, max_concurrency=4, max_runs=None).run(['game0000'])
+
+    assert report['errors'] == 0
+    assert report['runs'] == 4 * 450
+    assert report['requests'] <= 1 + rate * report['wall_time']
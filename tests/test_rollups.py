@@ -0,0 +1,67 @@
+import json
+import numpy as np
+import pandas as pd
+from src.metrics.rollups import CategoryRollup
+from config.settings import ROLLUP_CONFIG
+
+def make_runs(count, seed=0, start='2020-01-01', days=60):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'date': pd.Timestamp(start) + pd.to_timedelta(rng.integers(0, days, count), unit='D'),
+        'time_seconds': np.round(rng.uniform(100, 200, count), 3),
+        'player': rng.integers(0, 50, count).astype(str),
+        'emulator': rng.random(count) < 0.1
+    })
+
+def reload(rollup):
+    return CategoryRollup.from_dict(json.loads(json.dumps(rollup.to_dict(), allow_nan=False)))
+
+def test_only_months_keep_a_sketch_on_disk():
+    rollup = CategoryRollup()
+    rollup.update(make_runs(20000))
+    buckets = rollup.to_dict()['buckets']
+
+    for granularity in ('day', 'week'):
+        assert all(len(bucket[4]) <= ROLLUP_CONFIG['summary_points'] for bucket in buckets[granularity].values())
+    assert all(isinstance(bucket[4][0], list) for bucket in buckets['month'].values())
+    # Taille indépendante du nombre de runs une fois les périodes remplies
+    rollup.update(make_runs(20000, seed=1))
+    assert len(json.dumps(rollup.to_dict()['buckets']['day'])) < 1.1 * len(json.dumps(buckets['day']))
+
+def test_reload_keeps_medians_and_writes_null_best_times():
+    rollup = CategoryRollup()
+    runs = make_runs(5000)
+    runs.loc[runs.index[:3], 'date'] = pd.Timestamp('2019-06-01')
+    runs.loc[runs.index[:3], 'time_seconds'] = np.nan
+    rollup.update(runs)
+
+    reloaded = reload(rollup)
+    for granularity in ('day', 'week', 'month'):
+        expected, actual = rollup.frame(granularity), reloaded.frame(granularity)
+        pd.testing.assert_frame_equal(actual.drop(columns='median_time'), expected.drop(columns='median_time'))
+        assert np.allclose(actual['median_time'], expected['median_time'], atol=1e-3, equal_nan=True)
+    assert np.isnan(reloaded.frame('day')['best_time'].iloc[0])
+
+def test_reloaded_summary_merges_new_runs():
+    first, second = make_runs(3000, seed=0, days=7), make_runs(3000, seed=1, days=7)
+    rollup = CategoryRollup()
+    rollup.update(first)
+    merged = reload(rollup)
+    merged.update(second)
+
+    exact = CategoryRollup()
+    exact.update(pd.concat([first, second]))
+    expected, actual = exact.frame('day'), merged.frame('day')
+    assert (actual['runs'] == expected['runs']).all()
+    assert (actual['best_time'] == expected['best_time']).all()
+    # Médiane approchée : le résumé de la première moitié pèse autant que ses runs
+    assert np.allclose(actual['median_time'], expected['median_time'], rtol=0.05)
+
+def test_reads_previous_format_with_full_sketches():
+    rollup = CategoryRollup()
+    rollup.update(make_runs(500))
+    data = rollup.to_dict()
+    data['buckets'] = {granularity: {str(key): bucket[:4] + [bucket[4].to_dict()['levels']]
+                                     for key, bucket in buckets.items()}
+                       for granularity, buckets in rollup.buckets.items()}
+    pd.testing.assert_frame_equal(CategoryRollup.from_dict(data).frame('day'), rollup.frame('day'))
@@ -0,0 +1,140 @@
+import threading
+import pytest
+from benchmarks.fake_api import FakeSpeedrunAPI
+from src.api.cache import ResponseCache
+from src.api.rate_limiter import TokenBucket
+from src.api.speedrun_api import SpeedrunAPI
+from src.data import sharding
+from src.data.sharding import ShardWorker, WorkItem, WorkQueue, merge_shards
+from src.data.storage import get_storage
+from config.api_config import API_CONFIG
+from config.settings import SHARDING_CONFIG
+
+SPAN = 2 * API_CONFIG['runs_per_page']
+
+@pytest.fixture
+def config(monkeypatch):
+    monkeypatch.setitem(SHARDING_CONFIG, 'max_attempts', 2)
+    monkeypatch.setitem(SHARDING_CONFIG, 'retry_after', 0)
+    monkeypatch.setitem(SHARDING_CONFIG, 'idle_sleep', 0.01)
+    monkeypatch.setitem(SHARDING_CONFIG, 'heartbeat_interval', 0.05)
+
+@pytest.fixture
+def queue(tmp_path, config):
+    queue = WorkQueue(sharding.queue_path(tmp_path), lease_seconds=10)
+    yield queue
+    queue.close()
+
+class FailingAPI:
+    """Client dont une plage de la catégorie donnée échoue toujours"""
+    def __init__(self, api, category_id, offset):
+        self.api = api
+        self.failing = (category_id, offset)
+
+    def get_runs(self, game_id, category_id, offset, direction=None, embed=None):
+        if (category_id, offset) == self.failing:
+            raise ConnectionError("page indisponible")
+        return self.api.get_runs(game_id, category_id, offset, direction=direction, embed=embed)
+
+def stored_runs(data_dir):
+    storage = get_storage(data_dir)
+    return {category_id: storage.read(game_id, category_id)
+            for game_id, category_id in storage.list_partitions()}
+
+def test_expired_lease_is_reclaimed(queue):
+    item = WorkItem('g', 'c', 0, SPAN)
+    queue.enqueue(item)
+    assert queue.lease('a', now=1000) == item
+    assert queue.lease('b', now=1005) is None
+
+    reclaimed = queue.lease('b', now=1011)
+    assert reclaimed == item._replace(attempts=1)
+    assert not queue.heartbeat(item, 'a')
+    assert not queue.complete(item, 'a', 10, 'a')
+    assert queue.heartbeat(reclaimed, 'b')
+    assert queue.complete(reclaimed, 'b', 10, 'b')
+    assert queue.is_drained()
+
+def test_expired_lease_fails_after_max_attempts(queue):
+    queue.enqueue(WorkItem('g', 'c', 0, SPAN))
+    queue.lease('a', now=1000)
+    queue.lease('b', now=1011)
+    # Plage abandonnée : la plage suivante, mise en file malgré l'abandon, est louée à sa place
+    assert queue.lease('c', now=1022).key == ('g', 'c', SPAN)
+    assert [item.key for item, _ in queue.failed()] == [('g', 'c', 0)]
+
+def test_fail_retries_then_gives_up(queue):
+    first = WorkItem('g', 'c', 0, SPAN)
+    queue.enqueue(first)
+    queue.complete(queue.lease('w'), 'w', SPAN, 'w')
+
+    second = first.following
+    queue.enqueue(second)
+    assert queue.fail(queue.lease('w'), 'w', "erreur")
+    assert queue.stats()['pending'] == 2
+    retried = queue.lease('w')
+    assert retried == second._replace(attempts=1)
+    assert queue.fail(retried, 'w', "erreur")
+    assert queue.failed() == [(retried._replace(attempts=2), "erreur")]
+    assert not queue.is_drained()
+
+    # La plage qui suit une plage abandonnée est en file, mais pas au-delà de deux échecs consécutifs
+    third = queue.lease('w')
+    assert third.key == second.following.key
+    queue.fail(third, 'w', "erreur")
+    queue.fail(queue.lease('w'), 'w', "erreur")
+    assert queue.is_drained()
+    assert queue.stats() == {'done': 1, 'failed': 2, 'runs': SPAN}
+
+    assert queue.retry_failed() == 2
+    assert [item.key for item in (queue.lease('w'), queue.lease('w'))] == [second.key, third.key]
+
+def test_fail_ignores_lost_lease(queue):
+    item = WorkItem('g', 'c', 0, SPAN)
+    queue.enqueue(item)
+    queue.lease('a', now=1000)
+    queue.lease('b', now=1011)
+    assert not queue.fail(item, 'a', "erreur")
+    assert queue.stats() == {'leased': 1, 'runs': 0}
+
+def test_workers_merge_all_runs(tmp_path, config, monkeypatch):
+    with FakeSpeedrunAPI(games=2, categories_per_game=2, runs_per_category=1100) as fake:
+        monkeypatch.setitem(API_CONFIG, 'base_url', fake.base_url)
+        monkeypatch.setitem(API_CONFIG, 'requests_per_minute', 10 ** 6)
+        queue = WorkQueue(sharding.queue_path(tmp_path))
+        for game_id, categories in fake.games.items():
+            for category in categories:
+                queue.enqueue(WorkItem(game_id, category['id'], 0, SPAN))
+
+        report = sharding.run_workers(tmp_path, threads=3, name='host')
+        assert report['runs'] == 4 * 1100
+        assert queue.is_drained()
+        added = merge_shards(tmp_path, queue)
+        queue.close()
+
+    assert sum(added.values()) == 4 * 1100
+    runs = stored_runs(tmp_path)
+    assert {category_id: len(frame) for category_id, frame in runs.items()} == \
+        {category_id: 1100 for category_id in fake.runs}
+    assert not any(frame['run_id'].duplicated().any() for frame in runs.values())
+    assert not sharding.shards_root(tmp_path).exists() or not any(sharding.shards_root(tmp_path).iterdir())
+
+def test_failed_range_blocks_merge_without_losing_category(tmp_path, queue):
+    with FakeSpeedrunAPI(games=1, categories_per_game=2, runs_per_category=2500) as fake:
+        api = SpeedrunAPI(base_url=fake.base_url, rate_limiter=TokenBucket(1e6, 1000), cache=ResponseCache())
+        categories = sorted(fake.runs)
+        for category_id in categories:
+            queue.enqueue(WorkItem('game0000', category_id, 0, SPAN))
+        worker = ShardWorker(queue, tmp_path, 'w', FailingAPI(api, categories[0], SPAN))
+        worker.run(threading.Event())
+
+    assert queue.is_drained()
+    assert [item.key for item, _ in queue.failed()] == [('game0000', categories[0], SPAN)]
+    with pytest.raises(RuntimeError, match="abandonnées"):
+        merge_shards(tmp_path, queue)
+
+    merge_shards(tmp_path, queue, force=True)
+    runs = stored_runs(tmp_path)
+    # Seule la plage abandonnée manque : les plages suivantes ont été collectées
+    assert len(runs[categories[0]]) == 2500 - SPAN
+    assert len(runs[categories[1]]) == 2500
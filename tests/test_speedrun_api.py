@@ -0,0 +1,85 @@
+import pytest
+import requests
+from benchmarks.fake_api import FakeSpeedrunAPI
+from src.api import speedrun_api
+from src.api.cache import ResponseCache
+from src.api.rate_limiter import TokenBucket
+from src.api.speedrun_api import SpeedrunAPI, _backoff_delay
+from config.api_config import API_CONFIG
+
+@pytest.fixture
+def fake():
+    with FakeSpeedrunAPI(games=1, categories_per_game=1, runs_per_category=50) as server:
+        yield server
+
+def test_sync_pages_are_always_revalidated(fake):
+    api = SpeedrunAPI(base_url=fake.base_url, cache=ResponseCache(), offline=False)
+    first = api.get_runs('game0000', 'game0000c000', direction='desc')['data'][0]['id']
+
+    assert api.get_runs('game0000', 'game0000c000', direction='desc')['data'][0]['id'] == first
+    assert api.cache.stats['revalidated'] == 1
+
+    fake.add_runs('game0000c000', 1)
+    latest = api.get_runs('game0000', 'game0000c000', direction='desc')['data'][0]['id']
+    assert latest == 'game0000c000r000050'
+
+def test_history_pages_stay_cached(fake):
+    api = SpeedrunAPI(base_url=fake.base_url, cache=ResponseCache(), offline=False)
+    api.get_runs('game0000', 'game0000c000', direction='asc')
+    requests_before = fake.request_count
+    api.get_runs('game0000', 'game0000c000', direction='asc')
+    assert fake.request_count == requests_before
+    assert api.cache.stats['hits'] == 1
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    delays = []
+    monkeypatch.setattr(speedrun_api, '_backoff_delay', lambda attempt: delays.append(attempt) or 0.0)
+    return delays
+
+def fast_api(base_url, cache=None):
+    return SpeedrunAPI(base_url=base_url, rate_limiter=TokenBucket(rate=1000, capacity=10),
+                       cache=cache or ResponseCache(), offline=False)
+
+def test_transient_errors_are_retried_with_backoff(no_backoff):
+    with FakeSpeedrunAPI(games=1, categories_per_game=1, runs_per_category=10, error_every=2) as server:
+        api = fast_api(server.base_url)
+        api.get_game_categories('game0000')
+        assert len(api.get_runs('game0000', 'game0000c000')['data']) == 10
+
+    assert no_backoff == [0]
+    assert api.get_stats()['runs']['retries'] == 1
+    assert api.get_stats()['runs']['errors'] == 0
+
+def test_retries_stop_after_max_retries(no_backoff):
+    with FakeSpeedrunAPI(games=1, categories_per_game=1, runs_per_category=10, error_every=1) as server:
+        api = fast_api(server.base_url)
+        with pytest.raises(requests.exceptions.HTTPError):
+            api.get_runs('game0000', 'game0000c000')
+
+    assert no_backoff == list(range(API_CONFIG['max_retries']))
+    assert api.get_stats()['runs']['requests'] == API_CONFIG['max_retries'] + 1
+    assert api.get_stats()['runs']['errors'] == 1
+
+def test_network_errors_are_retried(no_backoff):
+    with FakeSpeedrunAPI() as server:
+        base_url = server.base_url
+    api = fast_api(base_url)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        api.get_runs('game0000', 'game0000c000')
+    assert no_backoff == list(range(API_CONFIG['max_retries']))
+
+def test_backoff_delay_is_capped_full_jitter():
+    for attempt in range(10):
+        ceiling = min(API_CONFIG['backoff_max'], API_CONFIG['backoff_base'] * 2 ** attempt)
+        assert all(0 <= _backoff_delay(attempt) <= ceiling for _ in range(50))
+
+def test_expired_entry_is_revalidated_with_etag(fake):
+    api = fast_api(fake.base_url, ResponseCache(ttl={'default': 0}))
+    categories = api.get_game_categories('game0000')
+    requests_before = fake.request_count
+
+    assert api.get_game_categories('game0000') == categories
+    assert fake.request_count == requests_before + 1
+    assert api.get_stats()['categories']['not_modified'] == 1
+    assert api.cache.stats['revalidated'] == 1
@@ -0,0 +1,82 @@
+import pandas as pd
+import pytest
+from src.data.storage import RUN_COLUMNS, apply_schema, get_storage, migrate
+from config.settings import STORAGE_CONFIG
+
+def runs(count, start=0):
+    return apply_schema(pd.DataFrame({
+        'run_id': [f"r{i:04d}" for i in range(start, start + count)],
+        'category': 'c1',
+        'date': pd.date_range('2024-01-01', periods=count).astype(str),
+        'time_seconds': [100.0 + i for i in range(start, start + count)],
+        'player': [f"p{i % 7}" for i in range(count)],
+        'verified': True,
+        'platform': [None if i % 5 == 0 else 'PC' for i in range(count)],
+        'emulator': [i % 3 == 0 for i in range(count)]
+    }))[RUN_COLUMNS]
+
+@pytest.fixture(params=['csv', 'parquet'])
+def storage(request, tmp_path, monkeypatch):
+    monkeypatch.setitem(STORAGE_CONFIG, 'chunk_size', 7)
+    return get_storage(tmp_path, request.param)
+
+def test_read_runs_returns_only_requested_ids(storage):
+    storage.write(runs(20), 'g1', 'c1')
+    storage.append(runs(10, start=20), 'g1', 'c1')
+    found = storage.read_runs('g1', 'c1', ['r0003', 'r0025', 'missing'])
+    assert sorted(found['run_id']) == ['r0003', 'r0025']
+    assert found.set_index('run_id').loc['r0025', 'time_seconds'] == 125.0
+
+def test_replace_runs_keeps_other_rows(storage):
+    storage.write(runs(20), 'g1', 'c1')
+    storage.append(runs(10, start=20), 'g1', 'c1')
+    corrected = runs(30).set_index('run_id').loc[['r0004', 'r0022']].reset_index()
+    corrected['time_seconds'] = 50.0
+    storage.replace_runs(corrected, 'g1', 'c1')
+
+    stored = storage.read('g1', 'c1').set_index('run_id')
+    assert len(stored) == 30
+    assert stored.loc['r0004', 'time_seconds'] == stored.loc['r0022', 'time_seconds'] == 50.0
+    assert stored.loc['r0005', 'time_seconds'] == 105.0
+    assert pd.isna(stored.loc['r0010', 'platform'])
+    assert bool(stored.loc['r0009', 'emulator'])
+
+def test_round_trip_keeps_schema_and_values(storage):
+    df = runs(12)
+    storage.write(df, 'g1', 'c1')
+    stored = storage.read('g1', 'c1')
+    assert list(stored.columns) == RUN_COLUMNS
+    for column in ('category', 'player', 'platform'):
+        assert isinstance(stored[column].dtype, pd.CategoricalDtype)
+    assert stored['time_seconds'].dtype == 'float32'
+    assert pd.api.types.is_datetime64_any_dtype(stored['date'])
+    assert stored['verified'].dtype == bool and stored['emulator'].dtype == bool
+    pd.testing.assert_frame_equal(stored.astype({column: object for column in ('category', 'player', 'platform')}),
+                                  df.astype({column: object for column in ('category', 'player', 'platform')}),
+                                  check_dtype=False)
+
+def test_append_columns_and_partitions(storage):
+    storage.write(runs(5), 'g1', 'c1')
+    fingerprint = storage.fingerprint('g1', 'c1')
+    storage.append(runs(5, start=5), 'g1', 'c1')
+    storage.write(runs(3), 'g2', 'c9')
+
+    assert storage.fingerprint('g1', 'c1') != fingerprint
+    assert storage.list_partitions() == [('g1', 'c1'), ('g2', 'c9')]
+    assert list(storage.read('g1', 'c1', columns=['run_id'])['run_id']) == [f"r{i:04d}" for i in range(10)]
+    combined = storage.read_all(['run_id', 'time_seconds'])
+    assert len(combined) == 13
+    assert combined.groupby('game_id', observed=True).size().to_dict() == {'g1': 10, 'g2': 3}
+
+def test_migrate_copies_every_partition(tmp_path):
+    csv = get_storage(tmp_path, 'csv')
+    csv.write(runs(20), 'g1', 'c1')
+    csv.write(runs(7), 'g2', 'c2')
+
+    report = migrate(tmp_path, 'csv', 'parquet')
+    assert (report['partitions'], report['runs']) == (2, 27)
+    parquet = get_storage(tmp_path, 'parquet')
+    assert parquet.list_partitions() == csv.list_partitions()
+    for partition in csv.list_partitions():
+        pd.testing.assert_frame_equal(parquet.read(*partition), csv.read(*partition), check_categorical=False,
+                                      check_dtype=False)
@@ -0,0 +1,103 @@
+import json
+import math
+import numpy as np
+import pandas as pd
+import pytest
+from benchmarks.synthetic import SyntheticDataset
+from src.data.storage import get_storage
+from src.metrics.pipeline import live_metrics
+from src.metrics.streaming import (AccumulatorStore, HyperLogLog, MetricsAccumulator, QuantileSketch,
+                                   RunningStats, calculate_run_metrics)
+
+def runs(count, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'time_seconds': rng.lognormal(7.5, 0.3, count),
+        'date': pd.Timestamp('2015-01-01') + pd.to_timedelta(rng.integers(0, 2000, count), unit='D'),
+        'player': pd.Categorical(rng.integers(0, count // 10, count).astype(str)),
+        'platform': pd.Categorical(rng.choice(['PC', 'Wii', 'NES'], count)),
+        'emulator': rng.random(count) < 0.15
+    })
+
+def accumulate(df, partitions):
+    total = MetricsAccumulator()
+    for part in np.array_split(np.arange(len(df)), partitions):
+        total.merge(MetricsAccumulator().update(df.iloc[part]))
+    return total
+
+def test_welford_moments_match_numpy():
+    values = np.random.default_rng(1).lognormal(7.5, 0.3, 100_000)
+    stats = RunningStats()
+    for batch in np.array_split(values, 37):
+        partial = RunningStats()
+        partial.update(batch)
+        stats.merge(partial)
+    assert stats.count == len(values)
+    assert stats.mean == pytest.approx(values.mean(), rel=1e-9)
+    assert stats.std == pytest.approx(values.std(ddof=1), rel=1e-9)
+    assert (stats.min, stats.max) == (values.min(), values.max())
+
+@pytest.mark.parametrize('seed', range(5))
+def test_kll_median_rank_error_within_documented_bound(seed):
+    k = 200
+    values = np.random.default_rng(seed).lognormal(7.5, 0.3, 100_000)
+    total = QuantileSketch(k, seed=seed)
+    for part in np.array_split(values, 16):
+        sketch = QuantileSketch(k, seed=seed + 1)
+        for batch in np.array_split(part, 10):
+            sketch.update(batch)
+        total.merge(sketch)
+    rank = (values < total.quantile(0.5)).mean()
+    # De l'ordre de 1.7 / k, au plus ~1 % des runs pour k = 200
+    assert abs(rank - 0.5) <= 2 / k
+
+def test_kll_is_exact_below_k():
+    values = np.random.default_rng(2).normal(size=150)
+    sketch = QuantileSketch(200)
+    sketch.update(values)
+    assert sketch.quantile(0.5) == np.median(values)
+
+def test_hyperloglog_error_within_documented_bound():
+    p = 12
+    standard_error = 1.04 / math.sqrt(2 ** p)
+    errors = []
+    for seed in range(10):
+        ids = np.unique(np.random.default_rng(seed).integers(0, 10 ** 12, 50_000)).astype(str)
+        parts = [HyperLogLog(p) for _ in range(4)]
+        for hll, chunk in zip(parts, np.array_split(ids, 4)):
+            hll.update(chunk)
+        for hll in parts[1:]:
+            parts[0].merge(hll)
+        errors.append(parts[0].estimate() / len(ids) - 1)
+    assert max(abs(error) for error in errors) < 4 * standard_error
+    assert math.sqrt(np.mean(np.square(errors))) < 1.5 * standard_error
+
+def test_accumulator_metrics_match_exact_computation():
+    df = runs(50_000)
+    expected = calculate_run_metrics(df)
+    actual = accumulate(df, 8).to_metrics()
+    for key in ('total_runs', 'best_time', 'emulator_percentage', 'runs_per_month', 'platform_distribution'):
+        assert actual[key] == pytest.approx(expected[key], rel=1e-12)
+    assert actual['avg_time'] == pytest.approx(expected['avg_time'], rel=1e-9)
+    assert actual['std_time'] == pytest.approx(expected['std_time'], rel=1e-9)
+    assert abs((df['time_seconds'] < actual['median_time']).mean() - 0.5) <= 2 / 200
+    assert actual['unique_players'] == pytest.approx(expected['unique_players'], rel=4 * 1.04 / 64)
+
+def test_accumulator_survives_json_round_trip():
+    accumulator = accumulate(runs(5_000), 3)
+    restored = MetricsAccumulator.from_dict(json.loads(json.dumps(accumulator.to_dict())))
+    assert restored.to_metrics() == accumulator.to_metrics()
+    assert MetricsAccumulator.from_dict(MetricsAccumulator().to_dict()).to_metrics() is None
+
+def test_live_metrics_merge_partition_accumulators(tmp_path):
+    SyntheticDataset(6000, games=2, categories_per_game=2).write(tmp_path)
+    storage = get_storage(tmp_path)
+    game_id = storage.list_partitions()[0][0]
+    game_runs = pd.concat([storage.read(g, c) for g, c in storage.list_partitions() if g == game_id])
+
+    live = live_metrics(tmp_path, game_id)
+    assert live['total_runs'] == len(game_runs)
+    assert live['best_time'] == pytest.approx(game_runs['time_seconds'].min())
+    assert live_metrics(tmp_path)['total_runs'] == sum(len(storage.read(*p)) for p in storage.list_partitions())
+    # Résumés persistés : relus sans reconstruction tant que les partitions sont inchangées
+    assert all(AccumulatorStore(tmp_path).path_for(*p).exists() for p in storage.list_partitions())